@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
-import os, time, math, random, tempfile, subprocess, threading, traceback, sys
+import os, time, math, random, subprocess, threading, traceback, sys
 import tkinter as tk
 from tkinter import Canvas
 import speech_recognition as sr
-from openai import OpenAI
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scrlk.clients import get_client, warm_up
+from scrlk.mic import MicStream
+from scrlk.aec import EchoCanceller
+from scrlk.tts_stream import StreamPlayer
+from scrlk.bargein import BargeIn
+from scrlk.stt import make_backend
+from scrlk.tts_cache import get_cache
+from scrlk.speculate import Speculator
+from scrlk.reply_cache import ReplyCache
+from scrlk.face_atlas import SpriteFace
+from scrlk import trace
 
 # ------------- CONFIG -------------
 MIC_DEVICE_INDEX = 1          # your Sandberg mic index
 LANG = "sv-SE"                # speech recognition language
+STT_BACKEND = "google"        # google | whisper-api | local | stub ($SCRLK_STT overrides)
 LLM_MODEL = "gpt-4o-mini"
 TTS_MODEL = "gpt-4o-mini-tts"
 TTS_VOICE = "alloy"           # try: alloy, verse, etc.
+REPLY_TTL_S = 6 * 3600        # cached replies to "hej", "tack", ... expire after this
+REPLY_VARIANTS = 3            # different replies collected per utterance, then rotated
+SPECULATE = os.getenv("SCRLK_SPECULATE", "0") == "1"  # ask_gpt on a stable partial (extra STT call, wasted tokens on a miss)
+SPEC_STABLE_MS = 150          # higher = fewer wasted calls, less latency saved
+FACE_SPRITES = True           # pre-rendered face images (cached per screen size); False = vectors
 INTRO = ("Hej. Jag heter Macintosh. Jag jobbar för E Q två. "
          "Jag finns här med dig och lyssnar. Hur mår du just nu?")
 SYSTEM_PROMPT = (
@@ -19,33 +38,56 @@ SYSTEM_PROMPT = (
 )
 
 # ------------- OPENAI + STT -------------
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+client = get_client()   # shared keep-alive pool, warmed in App.__init__
 rec = sr.Recognizer()
 rec.energy_threshold = 300
 rec.dynamic_energy_threshold = True
+# TTS is played as PCM through sounddevice, so the same samples can be
+# subtracted from the mic (echo cancellation) and we can listen right away
+aec = EchoCanceller()
+player = StreamPlayer()
+player.reference = aec
+# opened once when the convo loop starts, never closed between turns
+mic = MicStream(device=MIC_DEVICE_INDEX, energy_threshold=rec.energy_threshold,
+                echo_canceller=aec)
+stt = make_backend(STT_BACKEND, client=client, language=LANG, fallback="google")
+tts_cache = get_cache()   # INTRO and repeated replies are synthesized once
+reply_cache = ReplyCache(ttl_s=REPLY_TTL_S, variants=REPLY_VARIANTS, tts_cache=tts_cache,
+                         tts_model=TTS_MODEL, tts_voice=TTS_VOICE)
 
 def debug(msg): print(msg, flush=True)
 
-def listen_once(timeout=5, phrase_limit=8):
+def start_mic():
+    mic.start()
+    mic.calibrate(duration=0.2)
+
+def listen_once(timeout=5, phrase_limit=8, start=None):
     try:
-        with sr.Microphone(device_index=MIC_DEVICE_INDEX) as source:
-            rec.adjust_for_ambient_noise(source, duration=0.2)
-            debug("[MIC] Lyssnar...")
-            audio = rec.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
-        debug("[STT] tolkar...")
-        text = rec.recognize_google(audio, language=LANG)
-        debug(f"[STT] Du sa: {text}")
+        mic.start()
+        debug("[MIC] Lyssnar...")
+        if speculator is not None:
+            speculator.reset()
+        pcm = mic.listen(timeout=timeout, phrase_limit=phrase_limit, pause_s=rec.pause_threshold,
+                         start=start, on_partial=speculator.hear if speculator else None)
+        if pcm is None:
+            return None
+        debug(f"[STT] tolkar ({stt.name})...")
+        text = stt.transcribe(pcm, mic.samplerate)
+        if text:
+            debug(f"[STT] Du sa: {text}")
         return text
-    except sr.WaitTimeoutError:
-        return None
-    except sr.UnknownValueError:
-        return None
     except Exception as e:
         debug(f"[STT FEL] {e}")
         return None
 
 def ask_gpt(user_text):
+    cached = reply_cache.get(user_text, SYSTEM_PROMPT)
+    if cached is not None:
+        ans = " ".join(cached.sentences)
+        debug(f"[GPT cache] {ans}")
+        return ans
     try:
+        trace.mark(trace.LLM_REQUEST)
         r = client.chat.completions.create(
             model=LLM_MODEL,
             messages=[
@@ -54,41 +96,63 @@ def ask_gpt(user_text):
             ],
             temperature=0.7, max_tokens=120
         )
+        trace.mark(trace.LLM_FIRST_TOKEN)
+        trace.mark(trace.LLM_LAST_TOKEN)
         ans = r.choices[0].message.content.strip()
         debug(f"[GPT] {ans}")
+        reply_cache.put(user_text, SYSTEM_PROMPT, ans)
         return ans
     except Exception as e:
         debug(f"[GPT FEL] {e}")
         traceback.print_exc()
         return "Jag hade lite svårt att tänka nyss. Kan du säga det igen?"
 
-def play_mp3(path):
+# ask_gpt can already be running on the partial transcript when STT is done
+speculator = Speculator(ask_gpt, transcribe=stt.transcribe, stable_ms=SPEC_STABLE_MS,
+                        samplerate=mic.samplerate) if SPECULATE else None
+
+def reply_to(user_text):
+    reply = speculator.take(user_text) if speculator is not None else None
+    if reply is not None:
+        debug(f"[SPEC] hit: {user_text!r}")
+        return reply
+    return ask_gpt(user_text)
+
+_espeak = None   # running espeak fallback, so barge-in can cut it off
+_hush = threading.Event()   # set by stop_speaking(), cleared per reply
+
+def stop_speaking():
+    _hush.set()
+    player.stop()
+    proc = _espeak
+    if proc is not None and proc.poll() is None:
+        try: proc.terminate()
+        except Exception: pass
+
+def espeak(text):
+    global _espeak
     try:
-        subprocess.run(["mpg123","-q",path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _espeak = subprocess.Popen(["espeak","-v","sv","-s","160",text],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        trace.mark(trace.PLAYBACK_START)
+        _espeak.wait()
+        trace.mark(trace.PLAYBACK_END)
     except Exception as e:
-        debug(f"[PLAY FEL] {e}")
+        debug(f"[ESPEAK FEL] {e}")
+    finally:
+        _espeak = None
 
 def speak(text):
-    # Try OpenAI TTS -> mp3 -> play; else fall back to espeak
+    # OpenAI TTS (cached, streamed PCM) -> sounddevice; else fall back to espeak
     debug(f"[TTS] {text}")
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-        mp3_path = tmp.name
+    if _hush.is_set():   # barged in before playback started
+        return
     try:
-        speech = client.audio.speech.create(model=TTS_MODEL, voice=TTS_VOICE, input=text)
-        # support different client payload shapes
-        if hasattr(speech, "read"):
-            audio_bytes = speech.read()
-        elif hasattr(speech, "content"):
-            audio_bytes = speech.content
-        else:
-            audio_bytes = bytes(speech)
-        with open(mp3_path, "wb") as f:
-            f.write(audio_bytes)
-        play_mp3(mp3_path)
+        player.speak(client, text, model=TTS_MODEL, voice=TTS_VOICE, cache=tts_cache)
     except Exception as e:
         debug(f"[TTS FEL] {e}")
-        subprocess.run(["espeak","-v","sv","-s","160",text],
-                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not _hush.is_set():
+            espeak(text)
 
 # ------------- TK: MAC FACE -------------
 class MacFace:
@@ -104,6 +168,8 @@ class MacFace:
 
         self.canvas = Canvas(self.root, width=self.w, height=self.h, bg="#111", highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
+        self.face_view = SpriteFace(self.canvas, "live", self.w, self.h, bg="#111",
+                                    sprites=FACE_SPRITES)
 
         # animation state
         self.eye_offset_x = 0
@@ -140,85 +206,8 @@ class MacFace:
         self.head_tilt    = max(-4,  min(4,  dx*20))
 
     def draw(self):
-        self.canvas.delete("all")
-        scale = min(self.w/1000, self.h/700) * 1.35  # bigger
-        base_x, base_y = self.w/2, self.h/2
-        tilt = self.head_tilt * scale
-        w, h = 170*scale, 250*scale
-
-        # shadow
-        self.canvas.create_polygon(
-            [base_x - w, base_y + h*0.65,
-             base_x + w, base_y + h*0.65,
-             base_x + w*0.85, base_y + h*0.8,
-             base_x - w*0.85, base_y + h*0.8],
-            fill="#0a0a0a", outline="", smooth=True)
-
-        # body
-        front="#e8dcc8"; side="#cdbb9b"; line="#8b7355"
-        back = [base_x - w*0.75 + tilt, base_y - h,
-                base_x + w*0.75 + tilt, base_y - h,
-                base_x + w + tilt,      base_y + h*0.45,
-                base_x - w + tilt,      base_y + h*0.45]
-        self.canvas.create_polygon(back, fill=side, outline=line, width=int(2*scale))
-
-        self.canvas.create_rectangle(base_x-w, base_y-h, base_x+w, base_y+h*0.45,
-                                     fill=front, outline=line, width=int(3*scale))
-
-        # bezel
-        screen_w = w*0.68
-        screen_h = screen_w*(342/512)
-        self.canvas.create_rectangle(base_x-screen_w, base_y-h*0.78,
-                                     base_x+screen_w, base_y-h*0.78+screen_h,
-                                     fill="#111", outline="#000", width=int(3*scale))
-
-        # inner screen tint: green when listening, warm when idle, teal when speaking
-        tint = "#ccffcc" if self.is_listening else ("#ffd9b3" if not self.is_speaking else "#b3ffec")
-        self.canvas.create_rectangle(base_x-screen_w*0.88, base_y-h*0.71,
-                                     base_x+screen_w*0.88, base_y-h*0.78+screen_h*0.88,
-                                     fill=tint, outline="#666", width=int(2*scale))
-
-        # face (eyes/mouth)
-        eye_y = base_y - h*0.48
-        eye_size = max(10, int(14*scale))
-        left_x  = base_x - screen_w*0.36 + self.eye_offset_x*scale
-        right_x = base_x + screen_w*0.36 + self.eye_offset_x*scale
-        eofy    = self.eye_offset_y*scale
-
-        # blink/wink scales
-        blink = self.blink_progress
-        def eye_rect(cx, cy, wink=False):
-            if blink > 0.0 or wink:
-                # draw a slit (line) when closed
-                self.canvas.create_line(cx - eye_size, cy+eofy,
-                                        cx + eye_size, cy+eofy,
-                                        fill="#000", width=int(3*scale))
-            else:
-                self.canvas.create_oval(cx-eye_size, cy+eofy-eye_size,
-                                        cx+eye_size, cy+eofy+eye_size,
-                                        fill="#000", outline="")
-
-        # left eye (wink_left overrides)
-        eye_rect(left_x, eye_y, wink=self.wink_left)
-        # right eye winks only when wink_left is False
-        eye_rect(right_x, eye_y, wink=False if self.wink_left else False)
-
-        # mouth (smile curve + open)
-        mouth_y = base_y - h*0.26
-        mouth_w = screen_w*0.48
-        mouth_h = 26*scale + self.mouth_open*22*scale
-        # smile factor arcs higher when smiling
-        smile = self.is_smiling
-        arc_extent = -180 + smile*30  # -180(flat) to -150(smiley)
-        self.canvas.create_arc(base_x - mouth_w, mouth_y,
-                               base_x + mouth_w, mouth_y + mouth_h,
-                               start=0, extent=arc_extent,
-                               style="arc", outline="#000", width=int(4*scale))
-
-        # base
-        self.canvas.create_rectangle(base_x - w*0.85, base_y + h*0.45,
-                                     base_x + w*0.85, base_y + h*0.56,
-                                     fill=side, outline=line, width=int(2*scale))
+        # one pre-rendered frame per state (scrlk/face_atlas.py)
+        self.face_view.draw(self)
 
     def animate(self):
         # mouth easing
@@ -252,25 +241,42 @@ class MacFace:
 # ------------- ORCHESTRATION -------------
 class App:
     def __init__(self):
+        warm_up()
         self.face = MacFace()
-        # start conversation in background
+        # the mic stays live while Macintosh talks; speaking over it stops playback
+        self.barge_in = BargeIn(mic, self._on_barge_in)
+        # intro + conversation in background
         threading.Thread(target=self.convo_loop, daemon=True).start()
-        # intro speak (animate mouth while speaking)
-        threading.Thread(target=self.say_with_anim, args=(INTRO, True), daemon=True).start()
+
+    def _on_barge_in(self):
+        debug("[BARGE-IN] användaren pratar, tystnar")
+        stop_speaking()
 
     def say_with_anim(self, text, smile=False):
         self.face.is_listening = False
         self.face.is_speaking = True
         if smile: self.face.is_smiling = 1.0
-        speak(text)
-        self.face.is_speaking = False
-        if smile: self.face.is_smiling = 0.5
+        _hush.clear()
+        player.reset()
+        self.barge_in.arm()
+        try:
+            speak(text)
+        finally:
+            self.barge_in.disarm()
+            self.face.is_speaking = False
+            if smile: self.face.is_smiling = 0.5
 
     def convo_loop(self):
+        try:
+            start_mic()
+        except Exception as e:
+            debug(f"[MIC FEL] {e}")
+        # intro speak (animate mouth while speaking)
+        self.say_with_anim(INTRO, True)
         while True:
-            # 1) listen
+            # 1) listen; after a barge-in, from where the user started talking
             self.face.is_listening = True
-            user_text = listen_once(timeout=6, phrase_limit=8)
+            user_text = listen_once(timeout=6, phrase_limit=8, start=self.barge_in.take_start())
             self.face.is_listening = False
 
             if not user_text:
@@ -278,14 +284,14 @@ class App:
 
             # 2) think
             self.face.is_smiling = 0.3
-            reply = ask_gpt(user_text)
+            reply = reply_to(user_text)
+            if speculator is not None:
+                debug(speculator.summary())
 
-            # 3) speak with mouth anim
+            # 3) speak with mouth anim; the mic is echo-cancelled, so
+            # we go straight back to listening
             self.say_with_anim(reply, smile=True)
 
-            # small gap so it doesn't self-hear
-            time.sleep(0.8)
-
     def run(self):
         self.face.root.mainloop()
 
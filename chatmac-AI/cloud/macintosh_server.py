@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Many Macintosh conversations in one process, for thin kiosk terminals.
+
+    python macintosh_server.py [--host 127.0.0.1] [--port 8770] [--max-sessions 48]
+
+There is no authentication, so it listens on localhost only unless told
+otherwise; --host 0.0.0.0 (or $SCRLK_SERVER_HOST) only on a network
+where every client may use the OpenAI account.
+
+A terminal opens a WebSocket to ws://host:8770/session (add ?intro=0 to
+skip the greeting) and then:
+
+    terminal -> server   binary: mic audio, s16le 16 kHz mono, any frame size
+                         text:   {"type": "bye"}
+    server -> terminal   binary: reply audio, s16le 24 kHz mono, 20 ms frames,
+                                 sent at real-time pace (play on arrival)
+                         text:   face/state events, as tools/macintosh_headless.py
+                                 emits them, plus "session": <id>
+
+Every connection is one HeadlessMacintosh session with its own mic
+ring, echo canceller, VAD, speculator and chat history
+(scrlk.context.ChatContext). All sessions share the OpenAI client pool,
+the TTS cache and the reply cache, so "hej" is synthesized once for
+the whole fleet and the first kiosk to hear it pays for the chat call.
+
+The echo canceller's reference is the audio as it is sent, so the
+terminal's network + playback + capture delay has to fit inside
+scrlk.aec.FILTER_MS; terminals should play and capture with small
+buffers.
+
+Per-turn tracing (scrlk.trace) is per process, so it is off here unless
+SCRLK_TRACE is set.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+os.environ.setdefault("SCRLK_TRACE", "0")
+# shared modules (scrlk/) live in the repo root, the persona in tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools"))
+from scrlk.clients import get_client, warm_up
+from scrlk.tts_cache import get_cache
+from scrlk.reply_cache import get_reply_cache
+from scrlk.context import ChatContext, openai_summarizer
+from scrlk.audio_io import PushSource, SinkPlayer
+from scrlk.ws import accept, WebSocketError, BINARY, TEXT
+from macintosh_headless import (HeadlessMacintosh, INTRO, SYSTEM_PROMPT, MIC_SR, LLM_MODEL,
+                                TTS_MODEL, TTS_VOICE, REPLY_TTL_S, REPLY_VARIANTS)
+
+HOST = os.getenv("SCRLK_SERVER_HOST", "127.0.0.1")
+PORT = 8770
+MAX_SESSIONS = 48
+TTS_SR = 24000
+CONNECTIONS_PER_SESSION = 2    # OpenAI pool size: STT/chat and TTS can overlap per session
+OUT_QUEUE = 500                # ~10 s of 20 ms frames; a terminal this far behind is dropped
+
+
+def debug(msg): print(msg, file=sys.stderr, flush=True)
+
+
+class _Outbox:
+    """File-like sink for SinkPlayer: every block becomes a binary message."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def write(self, block):
+        self.session.post(bytes(block))
+
+
+class Session:
+    def __init__(self, sid, loop, client, intro=True):
+        self.sid = sid
+        self.loop = loop
+        self.out = asyncio.Queue(maxsize=OUT_QUEUE)
+        self.stalled = False
+        self.started = time.time()
+        self.source = PushSource(MIC_SR)
+        self.player = SinkPlayer(_Outbox(self), samplerate=TTS_SR)
+        self.app = HeadlessMacintosh(
+            source=self.source, player=self.player, emit=self.emit, client=client,
+            intro=INTRO if intro else None,
+            context=ChatContext(SYSTEM_PROMPT, summarize=openai_summarizer(client, LLM_MODEL)))
+        self._thread = None
+
+    # ------------- to the terminal (any thread) -------------
+    def post(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:     # loop already closed
+            pass
+
+    def _put(self, item):
+        # on the loop; a terminal that stops reading gets cut off instead
+        # of the server buffering its audio without limit
+        if self.stalled:
+            return
+        try:
+            self.out.put_nowait(item)
+        except asyncio.QueueFull:
+            self.stalled = True
+            debug(f"[SERVER] session {self.sid}: terminal not reading, closing")
+            while not self.out.empty():
+                self.out.get_nowait()
+            self.out.put_nowait(None)
+
+    def emit(self, event):
+        self.post(json.dumps({**event, "session": self.sid}, ensure_ascii=False))
+
+    # ------------- life cycle -------------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"session-{self.sid}")
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.app.event("start", input="terminal", output="terminal")
+            self.app.run()
+        except Exception as e:
+            self.app.event("error", where="session", message=str(e))
+        finally:
+            self.post(None)
+
+    def close(self):
+        self.source.finish()
+        self.app.stop()
+
+
+class MacintoshServer:
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        # one pool for everyone, sized for the sessions it has to carry
+        conns = max(16, CONNECTIONS_PER_SESSION * max_sessions)
+        self.client = get_client(max_connections=conns, max_keepalive=conns // 2)
+        self.tts_cache = get_cache()
+        self.reply_cache = get_reply_cache(ttl_s=REPLY_TTL_S, variants=REPLY_VARIANTS,
+                                           tts_cache=self.tts_cache, tts_model=TTS_MODEL,
+                                           tts_voice=TTS_VOICE)
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    async def handle(self, reader, writer):
+        try:
+            ws, path = await accept(reader, writer)
+        except (WebSocketError, asyncio.IncompleteReadError, ConnectionError) as e:
+            debug(f"[SERVER] {e}")
+            return
+        if len(self.sessions) >= self.max_sessions:
+            await ws.send(json.dumps({"event": "error", "where": "server",
+                                      "message": f"full ({self.max_sessions} sessions)"}))
+            await ws.close(1013)     # try again later
+            return
+
+        query = parse_qs(urlsplit(path).query)
+        sid = next(self._ids)
+        session = Session(sid, asyncio.get_running_loop(), self.client,
+                          intro=query.get("intro", ["1"])[0] != "0")
+        self.sessions[sid] = session
+        debug(f"[SERVER] session {sid} open ({len(self.sessions)} active)")
+        sender = asyncio.create_task(self._send_loop(ws, session))
+        session.start()
+        try:
+            while True:
+                kind, data = await ws.recv()
+                if kind == BINARY:
+                    session.source.push(np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16))
+                elif kind == TEXT:
+                    try:
+                        msg = json.loads(data)
+                    except ValueError:
+                        continue
+                    if msg.get("type") == "bye":
+                        break
+                else:
+                    break
+        except (WebSocketError, ConnectionError) as e:
+            debug(f"[SERVER] session {sid}: {e}")
+        finally:
+            session.close()
+            sender.cancel()
+            await ws.close()
+            del self.sessions[sid]
+            debug(f"[SERVER] session {sid} closed after {time.time() - session.started:.0f}s, "
+                  f"{session.app.turns} turns ({len(self.sessions)} active)")
+
+    async def _send_loop(self, ws, session):
+        try:
+            while True:
+                item = await session.out.get()
+                if item is None:
+                    break
+                await ws.send(item)
+            if session.stalled:
+                await ws.close(1008)     # ends the receive loop in handle()
+        except (WebSocketError, ConnectionError):
+            pass
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        debug(f"[SERVER] ws://{host}:{port}/session, max {self.max_sessions} sessions")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Many Macintosh conversations in one process")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = ap.parse_args(argv)
+    server = MacintoshServer(args.max_sessions)
+    warm_up()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
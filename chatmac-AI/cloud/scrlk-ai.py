@@ -6,16 +6,29 @@ import sys
 import time
 import math
 import shutil
-import threading
-import tempfile
+import asyncio
 import subprocess
 import tkinter as tk
 from tkinter import Canvas
 
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
-from scipy.io.wavfile import write as wav_write
+
+# delade moduler (scrlk/) ligger i repo-roten
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scrlk.clients import get_client, warm_up
+from scrlk.tts_stream import StreamPlayer
+from scrlk.tts_cache import get_cache
+from scrlk.reply_cache import ReplyCache
+from scrlk.stt import make_backend
+from scrlk.mic import MicStream
+from scrlk.aec import EchoCanceller
+from scrlk.bargein import BargeIn
+from scrlk.sentences import iter_sentences
+from scrlk.orchestrator import TurnOrchestrator
+from scrlk.speculate import Speculator
+from scrlk.face import HAPPY_BG
+from scrlk.face_atlas import SpriteFace
+from scrlk import trace
 
 # -------------------------
 # OpenAI
@@ -32,28 +45,67 @@ except Exception:
 # Modeller & röst
 # -------------------------
 MODEL_CHAT = "gpt-4o-mini"
-MODEL_WHISPER = "whisper-1"   # STT
 MODEL_TTS = "tts-1"           # TTS
 VOICE_TTS = "onyx"            # röst
 
-# STT-inspelning
+# STT-motor: "whisper-api" (moln), "google", "local" (faster-whisper på enheten)
+# eller "stub" (test). $SCRLK_STT går före.
+STT_BACKEND = "whisper-api"
+STT_LANG = "sv"
+
+# STT-inspelning (VAD-endpointing: slutar när man slutat prata)
 REC_SAMPLE_RATE = 16000
-REC_CHANNELS = 1
-REC_SECONDS = 4.0
+REC_TIMEOUT_S = 5.0    # max väntan på att någon börjar prata
+REC_HANG_S = 0.4       # tystnad som avslutar ett yttrande
+REC_MAX_S = 8.0        # längsta yttrande
+
+# Spekulativt svar: STT på ljudet hittills vid första pausen, och chatten
+# startas när delresultatet stått still SPEC_STABLE_MS. Kostar ett extra
+# STT-anrop per yttrande och tokens för varje miss, så det är av om inte
+# SCRLK_SPECULATE=1.
+SPECULATE = os.getenv("SCRLK_SPECULATE", "0") == "1"
+SPEC_STABLE_MS = 150
+
+# Max antal meningar per svar
+MAX_SENTENCES = 2
+
+# Svarscache för återkommande repliker ("hej", "tack"): REPLY_VARIANTS
+# olika svar samlas per yttrande och roteras sedan, i REPLY_TTL_S sekunder
+REPLY_TTL_S = 6 * 3600
+REPLY_VARIANTS = 3
 
 # Canvas-layout
 MAC_REL_SCALE = 0.62
 MOUTH_PX_H = 3
+# Ansiktet från förrenderade bilder (bakas en gång per skärmstorlek,
+# cachas i ~/.cache/scrlk/face). False = vektorritning varje bildruta.
+FACE_SPRITES = True
 
 class MacintoshAI:
     def __init__(self):
         # state
         self.client = None
-        self.is_listening_loop_running = False
+        self.stt = None
         self.shutting_down = False
         self.is_speaking = False
         self.debug = True
-        self.block_stt_until = 0.0  # tidpunkt då STT åter tillåten
+        # ekosläckning: det vi spelar dras av från mikrofonen, så ingen
+        # STT-spärr efter tal behövs
+        self.aec = EchoCanceller(REC_SAMPLE_RATE)
+        self.player = StreamPlayer()  # strömmad TTS-uppspelning
+        self.player.reference = self.aec
+        self.tts_cache = get_cache()  # upprepade repliker spelas utan nätverk
+        self.reply_cache = ReplyCache(ttl_s=REPLY_TTL_S, variants=REPLY_VARIANTS,
+                                      tts_cache=self.tts_cache, tts_model=MODEL_TTS,
+                                      tts_voice=VOICE_TTS)
+        # mikrofonen står öppen hela tiden så att vi hör användaren även när vi pratar
+        self.mic = MicStream(samplerate=REC_SAMPLE_RATE, echo_canceller=self.aec)
+        # chatten kan starta på ett stabilt delresultat innan slut-STT är klar
+        self.speculator = Speculator(
+            self.generate_response_stream,
+            transcribe=lambda pcm, sr: self.stt.transcribe(pcm, sr),
+            stable_ms=SPEC_STABLE_MS, stream=True, samplerate=REC_SAMPLE_RATE,
+        ) if SPECULATE else None
 
         # UI
         self.root = tk.Tk()
@@ -85,6 +137,9 @@ class MacintoshAI:
 
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
+        self.face_view = SpriteFace(self.canvas, "happy", canvas_width, canvas_height,
+                                    bg=HAPPY_BG, sprites=FACE_SPRITES,
+                                    rel_scale=MAC_REL_SCALE, mouth_px_h=MOUTH_PX_H)
 
         self.status_label = tk.Label(
             main_frame, text="Initializing...", font=("Courier", 16),
@@ -104,14 +159,21 @@ class MacintoshAI:
 
         self.draw_mac()
 
-        # model init
-        threading.Thread(target=self.load_model_thread, daemon=True).start()
-
         # anim loop
         self.animate()
 
-        # mic loop startas efter init
-        self.root.after(1500, self.start_listening_loop_once)
+        # en asyncio-loop kör mic -> STT -> chat -> TTS och pumpar Tk
+        self.orchestrator = TurnOrchestrator(
+            capture=self.record_phrase,
+            transcribe=self.transcribe,
+            reply=self.reply_sentences,
+            speak=self.speak_blocking,
+            stop_speaking=self.player.stop,
+            on_event=self.on_turn_event,
+            root=self.root,
+        )
+        # användaren pratar i munnen på oss -> tystna och lyssna direkt
+        self.barge_in = BargeIn(self.mic, self.orchestrator.barge_in)
 
     # -------------------------
     # UI helpers
@@ -136,74 +198,8 @@ class MacintoshAI:
 
     def draw_mac(self):
         """Ritar en vektoriserad Happy-Mac i Canvas med 1x2-ögon, spegelvänt L-näsa, leende mun."""
-        c = self.canvas
-        c.delete("all")
-
-        W, H = self.canvas_width, self.canvas_height
-
-        # Skala och centrering
-        mac_h = int(H * MAC_REL_SCALE)
-        mac_w = int(mac_h * 0.82)
-        x0 = (W - mac_w) // 2
-        y0 = (H - mac_h) // 2
-        x1 = x0 + mac_w
-        y1 = y0 + mac_h
-
-        px = mac_h / 200.0
-        bg = "#ffffff"
-        fg = "#000000"
-        c.configure(bg=bg)
-        lw = int(3 * px)
-
-        # Kropp
-        c.create_rectangle(x0, y0, x1, y1 - 30*px, outline=fg, width=lw)
-        c.create_rectangle(x0 + 20*px, y1 - 28*px, x1 - 20*px, y1 - 6*px, outline=fg, width=lw)
-
-        # Skärm
-        sx0 = x0 + 24*px; sy0 = y0 + 18*px
-        sx1 = x1 - 24*px; sy1 = y0 + 118*px
-        c.create_rectangle(sx0, sy0, sx1, sy1, outline=fg, width=lw)
-        c.create_rectangle(sx0+6*px, sy0+6*px, sx1-6*px, sy1-6*px, outline=fg, width=lw)
-
-        # Front-springor
-        c.create_line(x0+28*px, y0+138*px, x0+40*px, y0+138*px, fill=fg, width=lw)
-        c.create_line(x0+96*px, y0+138*px, x0+138*px, y0+138*px, fill=fg, width=lw)
-
-        # Ansikte
-        sw = sx1 - sx0
-        sh = sy1 - sy0
-
-        ox = max(-3*px, min(3*px, self.eye_offset_x * 0.05))
-        oy = max(-2*px, min(2*px, self.eye_offset_y * 0.05))
-
-        # Ögon 1x2 “pixlar”
-        eye_w = 4 * px
-        eye_h = 7 * px
-        exl = sx0 + 0.32*sw + ox
-        exr = sx0 + 0.68*sw + ox
-        ey  = sy0 + 0.42*sh + oy
-        c.create_rectangle(exl - eye_w/2, ey - eye_h, exl + eye_w/2, ey + eye_h, fill=fg, outline=fg)
-        c.create_rectangle(exr - eye_w/2, ey - eye_h, exr + eye_w/2, ey + eye_h, fill=fg, outline=fg)
-
-        # Näsa: spegelvänt “L” (┘) – lodrät nedåt + kort horisontell åt höger
-        nx = sx0 + 0.50*sw + ox*0.2
-        n_top = sy0 + 0.36*sh
-        n_bot = sy0 + 0.52*sh
-        c.create_line(nx, n_top, nx, n_bot, fill=fg, width=lw)
-        c.create_line(nx, n_bot, nx + 6*px, n_bot, fill=fg, width=lw)
-
-        # Mun: standard = leende. Öppning ökar nedåt med mouth_open.
-        mcy = sy0 + 0.66*sh
-        base_drop  = 4 * px
-        extra_drop = (self.mouth_open * 6.0) * px
-        drop = base_drop + extra_drop
-        mw = 0.36*sw
-        seg = mw/3
-
-        # U-form: vänster \_ / höger
-        c.create_line(nx - seg, mcy, nx - seg/2, mcy + drop, fill=fg, width=MOUTH_PX_H*px)
-        c.create_line(nx - seg/2, mcy + drop, nx + seg/2, mcy + drop, fill=fg, width=MOUTH_PX_H*px)
-        c.create_line(nx + seg/2, mcy + drop, nx + seg, mcy, fill=fg, width=MOUTH_PX_H*px)
+        # en förrenderad bild per tillstånd (scrlk/face_atlas.py)
+        self.face_view.draw(self)
 
     def animate(self):
         if abs(self.mouth_open - self.target_mouth) > 0.01:
@@ -216,19 +212,22 @@ class MacintoshAI:
     # -------------------------
     # AI
     # -------------------------
-    def load_model_thread(self):
+    def load_model(self) -> bool:
         if not AI_AVAILABLE:
             self.safe_set_status("AI ej tillgänglig. Installera openai och sätt OPENAI_API_KEY.")
-            return
+            return False
         try:
-            self.client = OpenAI()
+            self.client = get_client()
+            warm_up()  # varma anslutningar innan första STT/chat/TTS
+            self.stt = make_backend(STT_BACKEND, client=self.client, language=STT_LANG,
+                                    fallback="whisper-api")
             self.safe_set_status("Klar. Lyssnar.")
-            # Hälsning, blockera STT så den inte hör sig själv
-            self.speak_text("God kväll. Jag är online i detta Macintosh-chassi.")
+            return True
         except Exception as e:
             self.client = None
             self.safe_set_status(f"OpenAI-initfel: {e}")
             print(f"OpenAI init error: {e}", file=sys.stderr)
+            return False
 
     def mac_system_prompt(self) -> str:
         return (
@@ -241,50 +240,75 @@ class MacintoshAI:
             "Citera inte HAL ordagrant. Svara på svenska."
         )
 
-    def generate_response_blocking(self, user_text: str) -> str:
+    def generate_response_stream(self, user_text: str):
+        """Svaret mening för mening medan det strömmas (max MAX_SENTENCES)."""
         if not self.client:
-            return "AI-klienten är inte initialiserad."
+            yield "AI-klienten är inte initialiserad."
+            return
+        persona = self.mac_system_prompt()
+        cached = self.reply_cache.get(user_text, persona)
+        if cached is not None:
+            if self.debug:
+                print(f"[CHAT] cache: {user_text!r}")
+            yield from cached.sentences
+            return
+        produced = []
         try:
-            resp = self.client.chat.completions.create(
+            trace.mark(trace.LLM_REQUEST)
+            stream = self.client.chat.completions.create(
                 model=MODEL_CHAT,
                 messages=[
-                    {"role": "system", "content": self.mac_system_prompt()},
+                    {"role": "system", "content": persona},
                     {"role": "system", "content": "Svara alltid på svenska."},
                     {"role": "user", "content": user_text}
                 ],
                 temperature=0.4,
                 max_tokens=160,
+                stream=True,
             )
-            text = (resp.choices[0].message.content or "").strip()
-            # Kortare svar: max två meningar
-            parts = [p.strip() for p in text.split(".") if p.strip()]
-            if len(parts) >= 2:
-                return parts[0] + ". " + parts[1] + "."
-            return text
+            deltas = (chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+            # Kortare svar: max två meningar, resten av strömmen kastas
+            for sentence in iter_sentences(trace.tokens(deltas)):
+                produced.append(sentence)
+                yield sentence
+                if len(produced) >= MAX_SENTENCES:
+                    break
+            # bara hela svar cachas (ett avbrutet svar kommer aldrig hit)
+            self.reply_cache.put(user_text, persona, produced)
         except Exception as e:
             print(f"[CHAT] {e}", file=sys.stderr)
-            return "Jag stötte på ett bearbetningsfel."
+            if not produced:
+                yield "Jag stötte på ett bearbetningsfel."
+
+    def reply_sentences(self, user_text: str):
+        """Det spekulativa svaret om slut-texten matchar, annars ett nytt anrop."""
+        if self.speculator is not None:
+            spec = self.speculator.take(user_text)
+            if spec is not None:
+                if self.debug:
+                    print(f"[SPEC] träff: {user_text!r}")
+                return spec
+        return self.generate_response_stream(user_text)
 
     # -------------------------
-    # STT (Whisper)
+    # STT (backend enligt STT_BACKEND)
     # -------------------------
-    def record_phrase_wav(self) -> str | None:
-        # blockera inspelning medan/strax efter tal
-        if time.time() < self.block_stt_until:
-            time.sleep(0.1)
-            return None
+    def record_phrase(self) -> np.ndarray | None:
         try:
             self.safe_set_status("🎤 Lyssnar… (prata nu)")
-            frames = int(REC_SAMPLE_RATE * REC_SECONDS)
-            audio = sd.rec(frames, samplerate=REC_SAMPLE_RATE, channels=REC_CHANNELS, dtype="float32")
-            sd.wait()
-
-            if not isinstance(audio, np.ndarray) or audio.size == 0:
-                if self.debug: print("[STT] tom buffert")
+            self.mic.start()
+            if self.speculator is not None:
+                self.speculator.reset()
+            # efter barge-in börjar vi där användaren började prata; vid
+            # varje paus får speculatorn ljudet hittills
+            pcm = self.mic.listen(timeout=REC_TIMEOUT_S, phrase_limit=REC_MAX_S,
+                                  pause_s=REC_HANG_S, start=self.barge_in.take_start(),
+                                  on_partial=self.speculator.hear if self.speculator else None)
+            if pcm is None or pcm.size == 0:
                 return None
-
-            if audio.ndim > 1:
-                audio = audio[:, 0]
+            audio = pcm.astype(np.float32) / 32768.0
+            if self.debug:
+                print(f"[STT] yttrande {audio.size / REC_SAMPLE_RATE:.2f}s")
 
             peak = float(np.max(np.abs(audio)))
             rms  = float(np.sqrt(np.mean(audio**2)))
@@ -299,93 +323,49 @@ class MacintoshAI:
             if peak > 0:
                 audio = audio / max(1.0, peak)
 
-            tmp_wav = os.path.join(tempfile.gettempdir(), f"mac_phrase_{int(time.time()*1000)}.wav")
-            wav_write(tmp_wav, REC_SAMPLE_RATE, (audio * 32767).astype(np.int16))
-            return tmp_wav
+            return (audio * 32767).astype(np.int16)
         except Exception as e:
             print(f"[STT] Record error: {e}", file=sys.stderr)
             return None
 
-    def transcribe_with_whisper(self, wav_path: str) -> str | None:
-        try:
-            with open(wav_path, "rb") as f:
-                tr = self.client.audio.transcriptions.create(
-                    model=MODEL_WHISPER,
-                    file=f,
-                    # Lås gärna språket:
-                    language="sv"
-                )
-            text = (getattr(tr, "text", "") or "").strip()
-            if self.debug:
-                print(f"[STT] whisper: {text!r}")
-            return text or None
-        except Exception as e:
-            print(f"[STT] Whisper error: {e}", file=sys.stderr)
-            return None
-        finally:
-            try: os.remove(wav_path)
-            except Exception: pass
+    def transcribe(self, pcm: np.ndarray) -> str | None:
+        text = self.stt.transcribe(pcm, REC_SAMPLE_RATE)
+        if self.debug:
+            print(f"[STT] {self.stt.name}: {text!r}")
+        return text or None
 
     # -------------------------
-    # TTS (Onyx) – WAV → sounddevice
+    # TTS (Onyx) – PCM-ström → sounddevice
     # -------------------------
-    def speak_text(self, text: str):
+    def speak_blocking(self, text: str):
+        """Spelar en mening; returnerar när den är klar eller player.stop() anropats."""
         if not text:
             return
-        self.is_speaking = True
-        self.block_stt_until = time.time() + 0.9  # blockera STT medan han pratar
-        self.safe_set_status("🔊 Talar…")
+        try:
+            if self.client is None:
+                raise RuntimeError("OpenAI client saknas")
 
-        def _speak():
+            # uppspelning startar efter första chunken, ingen tempfil
+            self.player.speak(self.client, text, model=MODEL_TTS, voice=VOICE_TTS,
+                              cache=self.tts_cache)
+        except Exception as e:
+            print(f"[TTS] {e}", file=sys.stderr)
+            # Fallback: SAPI (WSL)
             try:
-                if self.client is None:
-                    raise RuntimeError("OpenAI client saknas")
-
-                res = self.client.audio.speech.create(
-                    model=MODEL_TTS,
-                    voice=VOICE_TTS,
-                    input=text,
-                    response_format="wav"
-                )
-                try:
-                    audio_bytes = getattr(res, "read", None) and res.read() or getattr(res, "content", None)
-                    if audio_bytes is None:
-                        audio_bytes = bytes(res)
-                except Exception:
-                    audio_bytes = bytes(res)
-
-                wav_path = os.path.join(tempfile.gettempdir(), f"mac_tts_{int(time.time()*1000)}.wav")
-                with open(wav_path, "wb") as f:
-                    f.write(audio_bytes)
-
-                data, sr = sf.read(wav_path, dtype="float32", always_2d=False)
-                sd.play(data, sr)
-                sd.wait()
-            except Exception as e:
-                print(f"[TTS] {e}", file=sys.stderr)
-                # Fallback: SAPI (WSL)
-                try:
-                    if self._in_wsl() and shutil.which("powershell.exe"):
-                        ps = shutil.which("powershell.exe")
-                        cmd = [
-                            ps, "-NoProfile", "-Command",
-                            'Add-Type -AssemblyName System.Speech; '
-                            '$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; '
-                            '$s.Rate=-1; $s.Volume=100; '
-                            f'$s.Speak(@\'{text}\'@);'
-                        ]
-                        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                except Exception:
-                    pass
-            finally:
-                self.is_speaking = False
-                self.block_stt_until = time.time() + 0.6  # lite svans efter tal
-                if self.debug:
-                    print("[TTS] done")
-                if not self.shutting_down:
-                    self.safe_set_status("Klar. Lyssnar.")
-
-        threading.Thread(target=_speak, daemon=True).start()
+                if self._in_wsl() and shutil.which("powershell.exe"):
+                    ps = shutil.which("powershell.exe")
+                    cmd = [
+                        ps, "-NoProfile", "-Command",
+                        'Add-Type -AssemblyName System.Speech; '
+                        '$s=New-Object System.Speech.Synthesis.SpeechSynthesizer; '
+                        '$s.Rate=-1; $s.Volume=100; '
+                        f'$s.Speak(@\'{text}\'@);'
+                    ]
+                    trace.mark(trace.PLAYBACK_START)
+                    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    trace.mark(trace.PLAYBACK_END)
+            except Exception:
+                pass
 
     def _in_wsl(self) -> bool:
         try:
@@ -394,79 +374,84 @@ class MacintoshAI:
             return False
 
     # -------------------------
-    # High-level: text → svar → tala
+    # Turhändelser (körs i Tk-tråden)
     # -------------------------
-    def handle_user_text_mainthread(self, user_text: str):
-        self.safe_set_status(f"Du sa: {user_text}")
-        threading.Thread(target=self._answer_worker, args=(user_text,), daemon=True).start()
-
-    def _answer_worker(self, user_text: str):
-        try:
-            answer = self.generate_response_blocking(user_text)
-        except Exception as e:
-            print(f"[AI] {e}", file=sys.stderr)
-            answer = "Jag fick ett fel när jag skulle svara."
-        if not self.shutting_down:
-            self.root.after(0, lambda a=answer: self.status_label.config(text=f"Jag: {a}"))
-            self.speak_text(answer)
-
-    # -------------------------
-    # Lyssningsloop
-    # -------------------------
-    def start_listening_loop_once(self):
-        if self.is_listening_loop_running or self.shutting_down or not AI_AVAILABLE:
+    def on_turn_event(self, kind: str, text: str):
+        if self.shutting_down:
             return
-        self.is_listening_loop_running = True
-        threading.Thread(target=self.listen_loop_thread, daemon=True).start()
-
-    def listen_loop_thread(self):
-        while not self.shutting_down:
-            try:
-                # hoppa om TTS fortfarande “svansar”
-                if time.time() < self.block_stt_until or self.is_speaking:
-                    time.sleep(0.05)
-                    continue
-
-                wav_path = self.record_phrase_wav()
-                if not wav_path:
-                    time.sleep(0.05)
-                    continue
-
-                text = self.transcribe_with_whisper(wav_path)
-                if text:
-                    self.root.after(0, lambda t=text: self.handle_user_text_mainthread(t))
-                else:
-                    self.safe_set_status("…(ingen röst uppfattad)")
-            except Exception as e:
-                print(f"[STT] listen loop error: {e}", file=sys.stderr)
-                self.safe_set_status("Mikrofonfel. Försöker igen…")
-                time.sleep(0.3)
+        if kind == "listening":
+            self.status_label.config(text="🎤 Lyssnar… (prata nu)")
+        elif kind == "heard":
+            self.status_label.config(text=f"Du sa: {text}")
+        elif kind == "no_speech":
+            self.status_label.config(text="…(ingen röst uppfattad)")
+        elif kind == "stt_error":
+            self.status_label.config(text="STT-fel. Försöker igen…")
+        elif kind == "mic_error":
+            self.status_label.config(text="Mikrofonfel. Försöker igen…")
+        elif kind == "speaking":
+            # ett nytt svar: en tidigare player.stop() gäller inte längre
+            self.player.reset()
+            self.is_speaking = True
+            self.barge_in.arm()
+        elif kind == "say":
+            self.status_label.config(text=f"Jag: {text}")
+        elif kind in ("done", "cancelled", "llm_error"):
+            self.barge_in.disarm()
+            if self.is_speaking and self.debug:
+                print(f"[TTS] done (AEC ERLE {self.aec.erle_db:.1f} dB)")
+                if self.speculator is not None:
+                    print(self.speculator.summary())
+            self.is_speaking = False
 
     # -------------------------
     # Shutdown
     # -------------------------
     def quit_app(self):
         self.shutting_down = True
-        self.is_listening_loop_running = False
+        # körs inuti root.update(), dvs på orkestrerarens loop
+        asyncio.get_running_loop().create_task(self._goodbye())
 
-        def _final_exit():
-            try:
-                self.root.destroy()
-            except Exception:
-                pass
-            sys.exit(0)
+    async def _goodbye(self):
+        self.orchestrator.cancel_turn()
+        self.is_speaking = True
 
+        def _bye():
+            self.player.reset()
+            self.speak_blocking("Avslutar. Tack för sällskapet.")
         try:
-            self.speak_text("Avslutar. Tack för sällskapet.")
-            self.root.after(900, _final_exit)
+            await asyncio.wait_for(asyncio.to_thread(_bye), 5)
         except Exception:
-            _final_exit()
+            pass
+        self.orchestrator.stop()
 
     # -------------------------
     # Mainloop
     # -------------------------
+    async def main(self):
+        # klient och STT skapas snabbt; uppvärmning och ev. lokal modell
+        # laddas i bakgrundstrådar medan UI:t redan ritas
+        try:
+            self.mic.start()
+        except Exception as e:
+            print(f"[STT] mic: {e}", file=sys.stderr)
+        if self.load_model():
+            await self.orchestrator.run(
+                intro="God kväll. Jag är online i detta Macintosh-chassi.")
+        else:
+            await self.orchestrator.run(listen=False)
+
     def run(self):
-        self.root.mainloop()
+        try:
+            asyncio.run(self.main())
+        finally:
+            self.player.stop()
+            self.mic.stop()
+            try:
+                self.root.destroy()
+            except Exception:
+                pass
+        sys.exit(0)
 
 # -------------------------
 # Entrypoint
@@ -480,7 +465,7 @@ if __name__ == "__main__":
     print("=" * 60)
     if not AI_AVAILABLE:
         print("Installera: pip install openai  # och sätt OPENAI_API_KEY")
-    print("Kräver även: pip install sounddevice soundfile scipy numpy")
+    print("Kräver även: pip install sounddevice numpy")
     print("=" * 60)
 
     # Tips WSLg: export PULSE_SERVER=/mnt/wslg/PulseServer i ~/.bashrc
@@ -1,6 +1,7 @@
 import os
 import math
 import time
+import asyncio
 import threading
 import subprocess
 import sys
@@ -8,8 +9,18 @@ import random
 import tkinter as tk
 from tkinter import Canvas
 
-import speech_recognition as sr
-from openai import OpenAI
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scrlk.clients import get_client, warm_up
+from scrlk.mic import MicStream
+from scrlk.bargein import BargeIn
+from scrlk.stt import make_backend
+from scrlk import trace
+from scrlk.context import ChatContext, openai_summarizer
+from scrlk.sentences import iter_sentences, split_sentences
+from scrlk.orchestrator import TurnOrchestrator
+from scrlk.face_atlas import SpriteFace
 
 
 #####################################
@@ -26,10 +37,31 @@ MIC_DEVICE_INDEX = 1
 # 'sv-SE' to understand Swedish, 'en-US' for English
 STT_LANG = 'sv-SE'
 
+# STT engine: 'google' (cloud), 'whisper-api' (cloud), 'local' (on-device
+# faster-whisper) or 'stub' (tests). $SCRLK_STT overrides.
+STT_BACKEND = 'google'
+
 # What language to speak with espeak
 TTS_VOICE = 'sv'   # try 'sv' for Swedish, 'en' for English
 TTS_WPM = '160'
 
+# Stop talking when the user talks over a reply. Off: espeak/say play
+# outside the app, so the mic has no echo reference and Macintosh's own
+# voice from the speaker would count as the user barging in.
+BARGE_IN = False
+
+# Stream the reply from OpenAI and start speaking the first sentence
+# while the rest is still being generated. False = wait for the full reply.
+STREAM_REPLIES = True
+
+# Max prompt size sent to OpenAI. Older turns are folded into a running
+# summary so long sessions keep a flat per-turn latency.
+CONTEXT_BUDGET_TOKENS = 1200
+
+# Draw the face from pre-rendered images (baked once per screen size and
+# cached in ~/.cache/scrlk/face). False = vector drawing every frame.
+FACE_SPRITES = True
+
 # Persona / system identity
 SYSTEM_PERSONA = (
     "Du är Macintosh, en emotionell stöddator från EQ2 Support. "
@@ -43,35 +75,45 @@ SYSTEM_PERSONA = (
 # HELPERS
 #####################################
 
-def speak_tts_async(text, after_done=None):
+_tts_proc = None   # running espeak/say, so a turn can be cut off
+_tts_lock = threading.Lock()
+
+
+def speak_tts_blocking(text):
     """
     Say `text` using espeak (or 'say' on macOS fallback).
-    Non-blocking.
-    after_done: optional fn() to call on mainthread after speaking
+    Blocks until speech is done or stop_tts() is called.
     """
-    def _worker():
-        # Try espeak (Linux / Pi)
+    global _tts_proc
+    for cmd in (['espeak', '-v', TTS_VOICE, '-s', TTS_WPM, text], ['say', text]):
         try:
-            subprocess.run(
-                ['espeak', '-v', TTS_VOICE, '-s', TTS_WPM, text],
-                stderr=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL
-            )
+            proc = subprocess.Popen(cmd, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
         except FileNotFoundError:
-            # Try 'say' (macOS)
-            try:
-                subprocess.run(
-                    ['say', text],
-                    stderr=subprocess.DEVNULL,
-                    stdout=subprocess.DEVNULL
-                )
-            except Exception:
-                pass
+            # no espeak: try 'say' (macOS)
+            continue
+        except Exception:
+            return
+        with _tts_lock:
+            _tts_proc = proc
+        trace.mark(trace.PLAYBACK_START)
+        try:
+            proc.wait()
         finally:
-            if after_done:
-                after_done()
+            trace.mark(trace.PLAYBACK_END)
+            with _tts_lock:
+                _tts_proc = None
+        return
+
 
-    threading.Thread(target=_worker, daemon=True).start()
+def stop_tts():
+    """Cut off whatever speak_tts_blocking() is saying (any thread)."""
+    with _tts_lock:
+        proc = _tts_proc
+    if proc is not None and proc.poll() is None:
+        try:
+            proc.terminate()
+        except Exception:
+            pass
 
 
 #####################################
@@ -83,9 +125,9 @@ class EQ2MacintoshAI:
         print("[BOOT] EQ2MacintoshAI init start")
 
         # --- state ---
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_client()
+        warm_up()  # open pooled connections while the UI boots
         self.shutting_down = False
-        self.is_listening_loop_running = False
         self.is_speaking = False
 
         # emotion / face state
@@ -100,16 +142,22 @@ class EQ2MacintoshAI:
         self.target_mouth_open = 0.0
 
         # conversation memory we'll send to OpenAI
-        self.chat_history = [
-            {"role": "system", "content": SYSTEM_PERSONA}
-        ]
+        # (persona + summary of older turns + recent turns, capped in tokens)
+        self.chat_history = ChatContext(
+            SYSTEM_PERSONA,
+            summarize=openai_summarizer(self.client),
+            budget_tokens=CONTEXT_BUDGET_TOKENS
+        )
 
         # speech recognizer
-        self.recognizer = sr.Recognizer()
-        # more tolerant to quiet rooms
-        self.recognizer.dynamic_energy_threshold = True
+        self.stt = make_backend(STT_BACKEND, client=self.client, language=STT_LANG,
+                                fallback='google')
         # you can tune this if it mis-detects silence
-        self.recognizer.pause_threshold = 0.6
+        self.pause_threshold = 0.6
+
+        # mic is opened once and kept open; utterances come out of its
+        # ring buffer with a bit of pre-roll
+        self.mic = MicStream(device=MIC_DEVICE_INDEX)
 
         # --- tkinter setup ---
         self.root = tk.Tk()
@@ -150,6 +198,8 @@ class EQ2MacintoshAI:
         self.canvas.pack()
         self.canvas_w = canvas_w
         self.canvas_h = canvas_h
+        self.face_view = SpriteFace(self.canvas, "eq2", canvas_w, canvas_h, bg='#1a1a1a',
+                                    sprites=FACE_SPRITES)
 
         # status label (what user said / what Mac says)
         self.status_label = tk.Label(
@@ -179,11 +229,20 @@ class EQ2MacintoshAI:
         # start animation loop
         self.root.after(50, self.animation_loop)
 
-        # greet user with intro animation + voice
-        self.root.after(500, self.start_intro_sequence)
+        # one asyncio loop drives mic -> STT -> OpenAI -> voice and pumps Tk
+        self.orchestrator = TurnOrchestrator(
+            capture=self.capture_utterance,
+            transcribe=self.transcribe,
+            reply=self.reply_sentences,
+            speak=speak_tts_blocking,
+            stop_speaking=stop_tts,
+            on_event=self.on_turn_event,
+            root=self.root,
+        )
+        self.reply_so_far = ""
 
-        # start mic listener after short delay
-        self.root.after(2000, self.start_listening_loop_once)
+        # talking over Macintosh cuts the reply short and starts a new turn
+        self.barge_in = BargeIn(self.mic, self.orchestrator.barge_in)
 
         print("[BOOT] init complete")
 
@@ -199,31 +258,19 @@ class EQ2MacintoshAI:
     # INTRO SEQUENCE
     ##################################################
 
+    GREETING = (
+        "Hej. Jag heter Macintosh. "
+        "Jag är en emotionell stöddator från EQ2. "
+        "Hur mår du idag?"
+    )
+
     def start_intro_sequence(self):
-        # Big smile, maybe wink once, then speak greeting.
+        # Big smile, maybe wink once; the orchestrator speaks the greeting.
         print("[INTRO] intro sequence")
         self.mood = "happy"
         self.expression_smile = 1.0
         self.wink_now()  # quick friendly wink
 
-        greeting_text = (
-            "Hej. Jag heter Macintosh. "
-            "Jag är en emotionell stöddator från EQ2. "
-            "Hur mår du idag?"
-        )
-
-        self.set_status("Macintosh: " + greeting_text)
-
-        def after_voice():
-            # After talking we go to listening mode
-            self.is_speaking = False
-            self.mood = "listening"
-            self.expression_smile = 0.4  # keep gentle smile
-
-        # mark speaking (so mouth anim moves)
-        self.is_speaking = True
-        speak_tts_async(greeting_text, after_done=lambda: self.root.after(0, after_voice))
-
     ##################################################
     # MOUSE TRACK + FACE DRAW
     ##################################################
@@ -242,194 +289,8 @@ class EQ2MacintoshAI:
         self.head_tilt = max(-4, min(4, dx * 20))
 
     def draw_macintosh_face(self):
-        self.canvas.delete("all")
-
-        # scale against 1000x700 base
-        scale = min(self.canvas_w / 1000.0, self.canvas_h / 700.0)
-        base_x = self.canvas_w / 2
-        base_y = self.canvas_h / 2
-
-        tilt = self.head_tilt * scale
-        w = 150 * scale
-        h = 220 * scale
-
-        # shadow under Mac
-        shadow = [
-            base_x - w, base_y + h * 0.6,
-            base_x + w, base_y + h * 0.6,
-            base_x + w * 0.85, base_y + h * 0.75,
-            base_x - w * 0.85, base_y + h * 0.75
-        ]
-        self.canvas.create_polygon(
-            shadow,
-            fill='#0a0a0a',
-            outline='',
-            smooth=True
-        )
-
-        body_front = '#e8dcc8'
-        body_side  = '#c4b8a0'
-        outline_col = '#8b7355'
-
-        # angled back panel
-        back_poly = [
-            base_x - w * 0.75 + tilt, base_y - h,
-            base_x + w * 0.75 + tilt, base_y - h,
-            base_x + w + tilt,        base_y + h * 0.4,
-            base_x - w + tilt,        base_y + h * 0.4
-        ]
-        self.canvas.create_polygon(
-            back_poly,
-            fill=body_side,
-            outline=outline_col,
-            width=int(2 * scale)
-        )
-
-        # front block
-        self.canvas.create_rectangle(
-            base_x - w, base_y - h,
-            base_x + w, base_y + h * 0.4,
-            fill=body_front,
-            outline=outline_col,
-            width=int(3 * scale)
-        )
-
-        # screen bezel (Classic Mac 512x342 ratio)
-        screen_w = w * 0.65
-        screen_h = screen_w * (342.0 / 512.0)
-
-        self.canvas.create_rectangle(
-            base_x - screen_w, base_y - h * 0.75,
-            base_x + screen_w, base_y - h * 0.75 + screen_h,
-            fill='#1a1a1a',
-            outline='#000000',
-            width=int(3 * scale)
-        )
-
-        # "CRT glow" color depends on mood
-        if self.mood == "listening":
-            screen_color = '#d0ffd0'  # soft green
-        elif self.mood == "thinking":
-            screen_color = '#fff5a8'  # yellow-ish when thinking
-        elif self.mood == "speaking":
-            screen_color = '#ccddff'  # soft blue when talking
-        elif self.mood == "happy":
-            screen_color = '#ccffcc'  # bright green
-        else:
-            screen_color = '#bbffbb'  # default gentle green
-
-        self.canvas.create_rectangle(
-            base_x - screen_w * 0.88, base_y - h * 0.68,
-            base_x + screen_w * 0.88, base_y - h * 0.75 + screen_h * 0.88,
-            fill=screen_color,
-            outline='#888888',
-            width=int(2 * scale)
-        )
-
-        # face coordinates
-        eye_y = base_y - h * 0.45
-        eye_size = max(10, int(12 * scale))
-
-        # mouth baseline
-        mouth_y = base_y - h * 0.25
-        mouth_w = screen_w * 0.45
-
-        # draw eyes
-        # logic: if blink_active -> eyes closed (thin line)
-        # if wink_active -> close right eye only
-        # else: normal round eyes that track mouse
-
-        # left eye center
-        left_eye_x = base_x - screen_w * 0.35 + self.eye_offset_x * scale
-        left_eye_y = eye_y + self.eye_offset_y * scale
-
-        # right eye center
-        right_eye_x = base_x + screen_w * 0.35 + self.eye_offset_x * scale
-        right_eye_y = eye_y + self.eye_offset_y * scale
-
-        eye_fill = '#000000'
-
-        def draw_closed_eye(x, y):
-            self.canvas.create_line(
-                x - eye_size, y,
-                x + eye_size, y,
-                fill=eye_fill,
-                width=int(4 * scale),
-                capstyle='round'
-            )
-
-        def draw_open_eye(x, y):
-            self.canvas.create_oval(
-                x - eye_size, y - eye_size,
-                x + eye_size, y + eye_size,
-                fill=eye_fill,
-                outline=''
-            )
-
-        if self.blink_active:
-            # both closed
-            draw_closed_eye(left_eye_x, left_eye_y)
-            draw_closed_eye(right_eye_x, right_eye_y)
-        else:
-            # maybe wink?
-            # wink_active = close RIGHT only
-            draw_open_eye(left_eye_x, left_eye_y)
-            if self.wink_active:
-                draw_closed_eye(right_eye_x, right_eye_y)
-            else:
-                draw_open_eye(right_eye_x, right_eye_y)
-
-        # mouth:
-        # - If speaking: animate mouth_open_amount (0..1)
-        # - Else: smile curve based on expression_smile (0..1)
-
-        if self.is_speaking:
-            # talking mouth -> more "open"
-            openness = 0.2 + 0.6 * self.mouth_open_amount
-            mouth_height = 25 * scale + openness * 30 * scale
-        else:
-            # smile shape
-            smile = self.expression_smile  # 0..1
-            mouth_height = 20 * scale + smile * 40 * scale
-
-        # arc for mouth
-        self.canvas.create_arc(
-            base_x - mouth_w, mouth_y,
-            base_x + mouth_w, mouth_y + mouth_height,
-            start=0,
-            extent=-180,
-            style="arc",
-            outline='#000000',
-            width=int(4 * scale)
-        )
-
-        # floppy slot
-        self.canvas.create_rectangle(
-            base_x - w * 0.45, base_y + h * 0.1,
-            base_x + w * 0.45, base_y + h * 0.2,
-            fill='#000000',
-            outline='#000000',
-            width=int(2 * scale)
-        )
-
-        # vents
-        for i in range(6):
-            y = base_y + h * 0.23 + i * 5 * scale
-            self.canvas.create_line(
-                base_x - w * 0.45, y,
-                base_x + w * 0.45, y,
-                fill=outline_col,
-                width=int(2 * scale)
-            )
-
-        # base block/foot
-        self.canvas.create_rectangle(
-            base_x - w * 0.8, base_y + h * 0.4,
-            base_x + w * 0.8, base_y + h * 0.5,
-            fill=body_side,
-            outline=outline_col,
-            width=int(2 * scale)
-        )
+        # one pre-rendered frame per state (scrlk/face_atlas.py)
+        self.face_view.draw(self)
 
     ##################################################
     # ANIMATION LOOP
@@ -496,159 +357,131 @@ class EQ2MacintoshAI:
             self.root.after(50, self.animation_loop)
 
     ##################################################
-    # LISTEN LOOP (MIC + STT)
+    # TURN STAGES (run on worker threads)
     ##################################################
 
-    def start_listening_loop_once(self):
-        if not self.is_listening_loop_running:
-            self.is_listening_loop_running = True
-            threading.Thread(target=self.listen_forever_thread, daemon=True).start()
-            print("[MIC] started background listen thread")
-
-    def listen_forever_thread(self):
+    def capture_utterance(self):
         """
-        Loop:
-         1. listen for up to timeout seconds
-         2. run STT
-         3. send to OpenAI
-         4. speak response
+        Wait for one utterance from the always-open mic.
+        The mic is opened and calibrated once, then stays open.
+        Returns int16 audio or None if nobody spoke within the timeout.
         """
-        while not self.shutting_down:
-            try:
-                with sr.Microphone(device_index=MIC_DEVICE_INDEX) as source:
-                    # calibrate to noise quickly
-                    self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
-
-                    # update mood to listening
-                    def _listening_ui():
-                        if not self.shutting_down:
-                            self.mood = "listening"
-                            self.set_status("Macintosh lyssnar...")
-                    self.root.after(0, _listening_ui)
-
-                    print("[MIC] Lyssnar (timeout 5s)...")
-                    audio = self.recognizer.listen(
-                        source,
-                        timeout=5,
-                        phrase_time_limit=8
-                    )
-                    print("[MIC] Har ljud. Kör STT...")
-
-                try:
-                    text = self.recognizer.recognize_google(audio, language=STT_LANG)
-                    print("[STT] Du sa:", text)
-
-                    def _ui_heard():
-                        if not self.shutting_down:
-                            self.set_status(f"Du: {text}\nMacintosh tänker...")
-                            self.mood = "thinking"
-                            self.expression_smile = 0.4
-                    self.root.after(0, _ui_heard)
-
-                    # now ask OpenAI and speak
-                    self.answer_with_openai(text)
-
-                except sr.UnknownValueError:
-                    print("[STT] Otydligt. Ingen text.")
-                    def _ui_no_hear():
-                        if not self.shutting_down:
-                            self.set_status("Jag hörde dig, men jag kunde inte förstå orden. Kan du säga igen?")
-                            # show empathy
-                            self.mood = "happy"
-                            self.expression_smile = 1.0
-                    self.root.after(0, _ui_no_hear)
-
-                except Exception as e:
-                    print("[STT] Fel i STT:", e)
-                    def _ui_err():
-                        if not self.shutting_down:
-                            self.set_status("Jag hade lite problem att höra just nu.")
-                            self.mood = "neutral"
-                    self.root.after(0, _ui_err)
-
-            except sr.WaitTimeoutError:
-                # no speech in timeout
-                # just idle, blink, keep listening
-                pass
-            except Exception as e:
-                print("[MIC] Mic runtime error:", e)
-                def _ui_mic_err():
-                    if not self.shutting_down:
-                        self.set_status("Mikrofon fel... försöker igen...")
-                        self.mood = "neutral"
-                self.root.after(0, _ui_mic_err)
-                time.sleep(1)
+        if self.mic.noise_floor is None:
+            self.mic.start()
+            self.mic.calibrate(duration=0.3)
+        print("[MIC] Lyssnar (timeout 5s)...")
+        return self.mic.listen(
+            timeout=5,
+            phrase_limit=8,
+            pause_s=self.pause_threshold,
+            start=self.barge_in.take_start()
+        )
 
-    ##################################################
-    # OPENAI CALL
-    ##################################################
+    def transcribe(self, pcm):
+        print(f"[MIC] Har ljud. Kör STT ({self.stt.name})...")
+        text = self.stt.transcribe(pcm, self.mic.samplerate)
+        print("[STT] Du sa:", text)
+        return text
 
-    def answer_with_openai(self, user_text):
+    def reply_sentences(self, user_text):
         """
-        Send user_text to OpenAI chat completion,
-        then speak and display the answer.
+        Ask OpenAI and yield the reply one sentence at a time.
+        With STREAM_REPLIES the first sentence comes out as soon as the
+        token stream has finished it, while the rest is still generated.
         """
-
         # append user message to chat history
-        self.chat_history.append({"role": "user", "content": user_text})
-
-        def _worker():
-            print("[OPENAI] sending:", repr(user_text))
+        self.chat_history.add("user", user_text)
+        print("[OPENAI] sending:", repr(user_text))
 
-            reply_text = None
-            try:
-                # NOTE: you can change the model here to whatever is available for you.
-                # If you get "insufficient_quota", that's billing. Code is fine.
-                completion = self.client.responses.create(
+        produced = False
+        try:
+            # NOTE: you can change the model here to whatever is available for you.
+            # If you get "insufficient_quota", that's billing. Code is fine.
+            trace.mark(trace.LLM_REQUEST)
+            if STREAM_REPLIES:
+                stream = self.client.responses.create(
                     model="gpt-4o-mini",
-                    input=self.chat_history,
+                    input=self.chat_history.messages(),
                     max_output_tokens=120,
+                    stream=True,
                 )
-                # new Responses API returns structured output
-                # We'll try to grab text chunks from "output"
-                chunks = []
-                for item in completion.output:
-                    if "content" in item:
-                        for c in item["content"]:
-                            if c["type"] == "output_text":
-                                chunks.append(c["text"])
-                reply_text = " ".join(chunks).strip()
-
-            except Exception as e:
-                print("[OPENAI ERROR]", e)
-                reply_text = (
-                    "Jag kunde inte kontakta mitt språkcenter just nu. "
-                    "Men jag finns här med dig."
+                deltas = (event.delta for event in stream
+                          if event.type == "response.output_text.delta")
+                for sentence in iter_sentences(trace.tokens(deltas)):
+                    produced = True
+                    yield sentence
+            else:
+                completion = self.client.responses.create(
+                    model="gpt-4o-mini",
+                    input=self.chat_history.messages(),
+                    max_output_tokens=120,
                 )
+                trace.mark(trace.LLM_FIRST_TOKEN)
+                trace.mark(trace.LLM_LAST_TOKEN)
+                sentences, rest = split_sentences((completion.output_text or "") + " ")
+                for sentence in sentences + ([rest.strip()] if rest.strip() else []):
+                    produced = True
+                    yield sentence
+        except Exception as e:
+            print("[OPENAI ERROR]", e)
+            if not produced:
+                produced = True
+                yield ("Jag kunde inte kontakta mitt språkcenter just nu. "
+                       "Men jag finns här med dig.")
+
+        if not produced:
+            yield "Jag är här med dig."
 
-            if not reply_text:
-                reply_text = "Jag är här med dig."
-
-            # store assistant answer in conversation memory
-            self.chat_history.append({"role": "assistant", "content": reply_text})
-
-            # now update UI & speak on main thread
-            def _after_llm():
-                if not self.shutting_down:
-                    self.set_status("Macintosh: " + reply_text)
-                    # put face in speaking mode
-                    self.mood = "speaking"
-                    self.is_speaking = True
-                    self.expression_smile = 1.0
-
-                    def done_talking():
-                        # called AFTER tts finishes (see speak_tts_async)
-                        if not self.shutting_down:
-                            self.is_speaking = False
-                            self.mood = "happy"
-                            self.expression_smile = 0.8
-                            self.set_status("Macintosh: " + reply_text + "\n(Jag lyssnar...)")
-
-                    speak_tts_async(reply_text, after_done=lambda: self.root.after(0, done_talking))
-
-            self.root.after(0, _after_llm)
+    ##################################################
+    # TURN EVENTS (run on the Tk thread)
+    ##################################################
 
-        threading.Thread(target=_worker, daemon=True).start()
+    def on_turn_event(self, kind, text):
+        if self.shutting_down:
+            return
+        if kind == "listening":
+            self.mood = "listening"
+            self.set_status("Macintosh lyssnar...")
+        elif kind == "mic_error":
+            self.set_status("Mikrofon fel... försöker igen...")
+            self.mood = "neutral"
+        elif kind == "stt_error":
+            self.set_status("Jag hade lite problem att höra just nu.")
+            self.mood = "neutral"
+        elif kind == "no_speech":
+            self.set_status("Jag hörde dig, men jag kunde inte förstå orden. Kan du säga igen?")
+            # show empathy
+            self.mood = "happy"
+            self.expression_smile = 1.0
+        elif kind == "heard":
+            self.set_status(f"Du: {text}\nMacintosh tänker...")
+            self.mood = "thinking"
+            self.expression_smile = 0.4
+        elif kind == "speaking":
+            # keep listening while we talk, for barge-in
+            if BARGE_IN and self.mic.noise_floor is not None:
+                self.barge_in.arm()
+            # put face in speaking mode
+            self.mood = "speaking"
+            self.is_speaking = True
+            self.expression_smile = 1.0
+        elif kind == "say":
+            self.reply_so_far = text
+            self.set_status("Macintosh: " + text)
+        elif kind in ("done", "cancelled", "llm_error"):
+            self.barge_in.disarm()
+            if kind == "llm_error":
+                print("[OPENAI ERROR]", text)
+            if self.is_speaking and self.reply_so_far:
+                # store what was actually said in conversation memory
+                # (the greeting is not part of the conversation)
+                if self.reply_so_far != self.GREETING:
+                    self.chat_history.add("assistant", self.reply_so_far)
+                self.set_status("Macintosh: " + self.reply_so_far + "\n(Jag lyssnar...)")
+            self.reply_so_far = ""
+            self.is_speaking = False
+            self.mood = "happy"
+            self.expression_smile = 0.8
 
     ##################################################
     # SHUTDOWN
@@ -657,36 +490,36 @@ class EQ2MacintoshAI:
     def quit_app(self):
         print("[QUIT] shutting down")
         self.shutting_down = True
-        self.is_listening_loop_running = False
-
-        def _final_exit():
-            try:
-                self.root.destroy()
-            except:
-                pass
-            sys.exit(0)
+        # runs inside root.update(), i.e. on the orchestrator's loop
+        asyncio.get_running_loop().create_task(self._goodbye())
 
+    async def _goodbye(self):
+        self.orchestrator.cancel_turn()
         # gentle goodbye voice
-        def _bye_worker():
-            try:
-                subprocess.run(
-                    ['espeak', '-v', TTS_VOICE, '-s', TTS_WPM,
-                     "Tack. Jag finns här när du behöver mig. Hej då."],
-                    stderr=subprocess.DEVNULL,
-                    stdout=subprocess.DEVNULL
-                )
-            except Exception:
-                pass
-            self.root.after(0, _final_exit)
-
-        threading.Thread(target=_bye_worker, daemon=True).start()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(
+                speak_tts_blocking, "Tack. Jag finns här när du behöver mig. Hej då."), 5)
+        except Exception:
+            pass
+        self.orchestrator.stop()
 
     ##################################################
     # MAIN LOOP
     ##################################################
 
+    async def main(self):
+        self.start_intro_sequence()
+        await self.orchestrator.run(intro=self.GREETING)
+
     def run(self):
-        self.root.mainloop()
+        try:
+            asyncio.run(self.main())
+        finally:
+            self.mic.stop()
+            try:
+                self.root.destroy()
+            except Exception:
+                pass
 
 
 #####################################
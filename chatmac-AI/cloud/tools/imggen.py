@@ -1,19 +1,15 @@
 # ------------------ Image generation & caching ------------------
-import os, io, base64, hashlib, time
+import os, io, sys, base64, hashlib, time
 from pathlib import Path
 from PIL import Image
-from openai import OpenAI
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk.clients import get_client
 
 OPENAI_IMAGE_MODEL = "gpt-image-1"   # current image model
 CRT_W, CRT_H = 512, 342              # your target
 
-_client = None
-def get_client():
-    global _client
-    if _client is None:
-        _client = OpenAI()  # requires OPENAI_API_KEY in env
-    return _client
-
 def _prompt_key(prompt: str, style: str = "pixel-art") -> str:
     h = hashlib.sha1((prompt + "|" + style).encode("utf-8")).hexdigest()[:16]
     return h
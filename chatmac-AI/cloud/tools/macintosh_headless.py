@@ -1,293 +1,392 @@
 #!/usr/bin/env python3
-import os, time, math, random, tempfile, subprocess, threading, traceback, sys
-import tkinter as tk
-from tkinter import Canvas
-import speech_recognition as sr
-from openai import OpenAI
-
-# ------------- CONFIG -------------
+"""
+Macintosh persona without a screen: same conversation as
+macintosh_live_eq2.py (mic -> STT -> chat -> TTS, barge-in, echo
+cancellation, speculation, reply cache), but no Tk. The face is a
+stream of events instead:
+
+    {"t": 1718000000.12, "event": "state", "state": "listening",
+     "face": {"listening": true, "speaking": false, "smile": 0.0}}
+
+events: start, state, heard, reply, barge_in, error, stop (one JSON
+object per line).
+
+    python macintosh_headless.py                        # mic + speaker
+    python macintosh_headless.py --in talk.wav --out reply.wav
+    arecord -f S16_LE -r 16000 -c 1 -t raw | python macintosh_headless.py --in -
+    python macintosh_headless.py --out - | aplay -f S16_LE -r 24000 -c 1
+
+--in:  mic (default) | a .wav file | "-" or a FIFO/file of raw s16le 16 kHz mono
+--out: device (default) | a .wav file | "-" for raw s16le 24 kHz mono on stdout
+--fb:  also show the face on a framebuffer (default $SCRLK_FB or /dev/fb0),
+       e.g. the 512x342 Macintosh CRT, without X or Tk
+Events go to stdout, or stderr when stdout carries audio (--events overrides).
+With file or pipe input it exits once the input is used up and answered.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+import types
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk.clients import get_client, warm_up
+from scrlk.mic import MicStream
+from scrlk.aec import EchoCanceller
+from scrlk.tts_stream import StreamPlayer
+from scrlk.audio_io import SinkPlayer, WavSource, PipeSource
+from scrlk.bargein import BargeIn
+from scrlk.stt import make_backend
+from scrlk.tts_cache import get_cache
+from scrlk.speculate import Speculator
+from scrlk.reply_cache import get_reply_cache
+from scrlk import trace
+from scrlk.fb import Framebuffer, FbCanvas, DEVICE as FB_DEVICE
+from scrlk.face_atlas import SpriteFace
+
+# ------------- CONFIG (as macintosh_live_eq2.py) -------------
 MIC_DEVICE_INDEX = 1          # your Sandberg mic index
+MIC_SR = 16000
 LANG = "sv-SE"                # speech recognition language
+STT_BACKEND = "google"        # google | whisper-api | local | stub ($SCRLK_STT overrides)
 LLM_MODEL = "gpt-4o-mini"
 TTS_MODEL = "gpt-4o-mini-tts"
-TTS_VOICE = "alloy"           # try: alloy, verse, etc.
+TTS_VOICE = "alloy"
+ENERGY_THRESHOLD = 300
+PAUSE_S = 0.8                 # silence that ends an utterance
+LISTEN_TIMEOUT_S = 6
+PHRASE_LIMIT_S = 8
+REPLY_TTL_S = 6 * 3600
+REPLY_VARIANTS = 3
+SPECULATE = os.getenv("SCRLK_SPECULATE", "0") == "1"   # extra STT call per pause, tokens per miss
+SPEC_STABLE_MS = 150
 INTRO = ("Hej. Jag heter Macintosh. Jag jobbar för E Q två. "
          "Jag finns här med dig och lyssnar. Hur mår du just nu?")
 SYSTEM_PROMPT = (
     "Du är Macintosh, en empatisk stöddator för EQ2. "
     "Svara kort, varmt och naturligt på svenska, 1–2 meningar."
 )
+FALLBACK_REPLY = "Jag hade lite svårt att tänka nyss. Kan du säga det igen?"
 
-# ------------- OPENAI + STT -------------
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-rec = sr.Recognizer()
-rec.energy_threshold = 300
-rec.dynamic_energy_threshold = True
+IDLE, LISTENING, THINKING, SPEAKING = "idle", "listening", "thinking", "speaking"
 
-def debug(msg): print(msg, flush=True)
 
-def listen_once(timeout=5, phrase_limit=8):
-    try:
-        with sr.Microphone(device_index=MIC_DEVICE_INDEX) as source:
-            rec.adjust_for_ambient_noise(source, duration=0.2)
-            debug("[MIC] Lyssnar...")
-            audio = rec.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
-        debug("[STT] tolkar...")
-        text = rec.recognize_google(audio, language=LANG)
-        debug(f"[STT] Du sa: {text}")
-        return text
-    except sr.WaitTimeoutError:
-        return None
-    except sr.UnknownValueError:
-        return None
-    except Exception as e:
-        debug(f"[STT FEL] {e}")
-        return None
+def debug(msg): print(msg, file=sys.stderr, flush=True)
 
-def ask_gpt(user_text):
-    try:
-        r = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role":"system", "content": SYSTEM_PROMPT},
-                {"role":"user", "content": user_text}
-            ],
-            temperature=0.7, max_tokens=120
-        )
-        ans = r.choices[0].message.content.strip()
-        debug(f"[GPT] {ans}")
-        return ans
-    except Exception as e:
-        debug(f"[GPT FEL] {e}")
-        traceback.print_exc()
-        return "Jag hade lite svårt att tänka nyss. Kan du säga det igen?"
-
-def play_mp3(path):
-    try:
-        subprocess.run(["mpg123","-q",path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except Exception as e:
-        debug(f"[PLAY FEL] {e}")
-
-def speak(text):
-    # Try OpenAI TTS -> mp3 -> play; else fall back to espeak
-    debug(f"[TTS] {text}")
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-        mp3_path = tmp.name
-    try:
-        speech = client.audio.speech.create(model=TTS_MODEL, voice=TTS_VOICE, input=text)
-        # support different client payload shapes
-        if hasattr(speech, "read"):
-            audio_bytes = speech.read()
-        elif hasattr(speech, "content"):
-            audio_bytes = speech.content
-        else:
-            audio_bytes = bytes(speech)
-        with open(mp3_path, "wb") as f:
-            f.write(audio_bytes)
-        play_mp3(mp3_path)
-    except Exception as e:
-        debug(f"[TTS FEL] {e}")
-        subprocess.run(["espeak","-v","sv","-s","160",text],
-                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-# ------------- TK: MAC FACE -------------
-class MacFace:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("Macintosh EQ2")
-        self.root.attributes("-fullscreen", True)
-        self.root.configure(bg="#111")
-        self.root.bind("<Escape>", lambda e: self.quit())
-
-        self.w = self.root.winfo_screenwidth()
-        self.h = self.root.winfo_screenheight()
-
-        self.canvas = Canvas(self.root, width=self.w, height=self.h, bg="#111", highlightthickness=0)
-        self.canvas.pack(fill="both", expand=True)
-
-        # animation state
-        self.eye_offset_x = 0
-        self.eye_offset_y = 0
-        self.head_tilt = 0
-        self.mouth_open = 0.0
-        self.target_mouth = 0.0
-        self.is_speaking = False
-        self.is_listening = False
-        self.is_smiling = 0.0     # 0..1
-        self.blink_progress = 0.0 # 0..1 (1 = eyes closed)
-        self.wink_left = False
-        self.next_blink_t = time.time() + random.uniform(2.0, 6.0)
-        self.next_wink_t  = time.time() + random.uniform(8.0, 16.0)
-
-        # mouse look
-        self.root.bind("<Motion>", self.track_mouse)
-
-        self._run = True
-        self.animate()
-
-    def quit(self):
-        self._run = False
-        try: self.root.destroy()
-        except: pass
-        sys.exit(0)
-
-    def track_mouse(self, ev):
-        cx, cy = self.w/2, self.h*0.42
-        dx = (ev.x - cx)/self.w
-        dy = (ev.y - cy)/self.h
-        self.eye_offset_x = max(-12, min(12, dx*500))
-        self.eye_offset_y = max(-8,  min(8,  dy*300))
-        self.head_tilt    = max(-4,  min(4,  dx*20))
-
-    def draw(self):
-        self.canvas.delete("all")
-        scale = min(self.w/1000, self.h/700) * 1.35  # bigger
-        base_x, base_y = self.w/2, self.h/2
-        tilt = self.head_tilt * scale
-        w, h = 170*scale, 250*scale
-
-        # shadow
-        self.canvas.create_polygon(
-            [base_x - w, base_y + h*0.65,
-             base_x + w, base_y + h*0.65,
-             base_x + w*0.85, base_y + h*0.8,
-             base_x - w*0.85, base_y + h*0.8],
-            fill="#0a0a0a", outline="", smooth=True)
-
-        # body
-        front="#e8dcc8"; side="#cdbb9b"; line="#8b7355"
-        back = [base_x - w*0.75 + tilt, base_y - h,
-                base_x + w*0.75 + tilt, base_y - h,
-                base_x + w + tilt,      base_y + h*0.45,
-                base_x - w + tilt,      base_y + h*0.45]
-        self.canvas.create_polygon(back, fill=side, outline=line, width=int(2*scale))
-
-        self.canvas.create_rectangle(base_x-w, base_y-h, base_x+w, base_y+h*0.45,
-                                     fill=front, outline=line, width=int(3*scale))
-
-        # bezel
-        screen_w = w*0.68
-        screen_h = screen_w*(342/512)
-        self.canvas.create_rectangle(base_x-screen_w, base_y-h*0.78,
-                                     base_x+screen_w, base_y-h*0.78+screen_h,
-                                     fill="#111", outline="#000", width=int(3*scale))
-
-        # inner screen tint: green when listening, warm when idle, teal when speaking
-        tint = "#ccffcc" if self.is_listening else ("#ffd9b3" if not self.is_speaking else "#b3ffec")
-        self.canvas.create_rectangle(base_x-screen_w*0.88, base_y-h*0.71,
-                                     base_x+screen_w*0.88, base_y-h*0.78+screen_h*0.88,
-                                     fill=tint, outline="#666", width=int(2*scale))
-
-        # face (eyes/mouth)
-        eye_y = base_y - h*0.48
-        eye_size = max(10, int(14*scale))
-        left_x  = base_x - screen_w*0.36 + self.eye_offset_x*scale
-        right_x = base_x + screen_w*0.36 + self.eye_offset_x*scale
-        eofy    = self.eye_offset_y*scale
-
-        # blink/wink scales
-        blink = self.blink_progress
-        def eye_rect(cx, cy, wink=False):
-            if blink > 0.0 or wink:
-                # draw a slit (line) when closed
-                self.canvas.create_line(cx - eye_size, cy+eofy,
-                                        cx + eye_size, cy+eofy,
-                                        fill="#000", width=int(3*scale))
-            else:
-                self.canvas.create_oval(cx-eye_size, cy+eofy-eye_size,
-                                        cx+eye_size, cy+eofy+eye_size,
-                                        fill="#000", outline="")
-
-        # left eye (wink_left overrides)
-        eye_rect(left_x, eye_y, wink=self.wink_left)
-        # right eye winks only when wink_left is False
-        eye_rect(right_x, eye_y, wink=False if self.wink_left else False)
-
-        # mouth (smile curve + open)
-        mouth_y = base_y - h*0.26
-        mouth_w = screen_w*0.48
-        mouth_h = 26*scale + self.mouth_open*22*scale
-        # smile factor arcs higher when smiling
-        smile = self.is_smiling
-        arc_extent = -180 + smile*30  # -180(flat) to -150(smiley)
-        self.canvas.create_arc(base_x - mouth_w, mouth_y,
-                               base_x + mouth_w, mouth_y + mouth_h,
-                               start=0, extent=arc_extent,
-                               style="arc", outline="#000", width=int(4*scale))
-
-        # base
-        self.canvas.create_rectangle(base_x - w*0.85, base_y + h*0.45,
-                                     base_x + w*0.85, base_y + h*0.56,
-                                     fill=side, outline=line, width=int(2*scale))
-
-    def animate(self):
-        # mouth easing
-        if abs(self.mouth_open - self.target_mouth) > 0.01:
-            self.mouth_open += (self.target_mouth - self.mouth_open) * 0.3
-        self.target_mouth = (0.5 + 0.5*math.sin(time.time()*9)) if self.is_speaking else 0.0
-
-        # idle smile relax
-        if not self.is_speaking and not self.is_listening:
-            self.is_smiling = max(0.0, self.is_smiling - 0.02)
-
-        # blinks
+
+def json_lines(stream):
+    """emit() that writes one JSON object per line to `stream`."""
+    lock = threading.Lock()
+    def emit(event):
+        line = json.dumps(event, ensure_ascii=False)
+        with lock:
+            stream.write(line + "\n")
+            stream.flush()
+    return emit
+
+
+def open_source(spec, samplerate=MIC_SR, speed=1.0):
+    """None (live mic), or a scrlk.audio_io source for a WAV file / raw pipe."""
+    if spec in (None, "", "mic"):
+        return None
+    if spec == "-":
+        return PipeSource(sys.stdin.buffer, samplerate=samplerate)
+    if spec.lower().endswith(".wav"):
+        return WavSource(spec, samplerate=samplerate, speed=speed)
+    return PipeSource(open(spec, "rb"), samplerate=samplerate, speed=speed)
+
+
+def open_player(spec, speed=1.0):
+    """StreamPlayer for the sound card, or a SinkPlayer for a WAV file / stdout."""
+    if spec in (None, "", "device"):
+        return StreamPlayer()
+    if spec == "-":
+        return SinkPlayer(sys.stdout.buffer, speed=speed)
+    return SinkPlayer(spec, speed=speed)
+
+
+class FramebufferFace:
+    """
+    The macintosh_live_eq2.py face on a framebuffer (scrlk.fb), animated
+    from HeadlessMacintosh.face the way MacFace.animate() does it.
+    """
+    FRAME_S = 0.05
+
+    def __init__(self, app, fb, bg="#111"):
+        self.app, self.fb = app, fb
+        self.canvas = FbCanvas(fb.width, fb.height, bg=bg)
+        self.view = SpriteFace(self.canvas, "live", fb.width, fb.height, bg=bg,
+                               photo=lambda image: image)
+        self.state = types.SimpleNamespace(
+            eye_offset_x=0, eye_offset_y=0, head_tilt=0, mouth_open=0.0,
+            is_speaking=False, is_listening=False, is_smiling=0.0,
+            blink_progress=0.0, wink_left=False)
         now = time.time()
-        if now >= self.next_blink_t and self.blink_progress <= 0.0:
-            self.blink_progress = 1.0
+        self.next_blink_t = now + random.uniform(2.0, 6.0)
+        self.next_wink_t = now + random.uniform(8.0, 16.0)
+        self.wink_until = 0.0
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="fb-face")
+        self._thread.start()
+
+    def stop(self):
+        """Stop animating; returns once the thread is out of tick()."""
+        self.running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while self.running:
+            t0 = time.monotonic()
+            try:
+                self.tick(time.time())
+            except Exception as e:
+                debug(f"[FB FEL] {e}")
+            time.sleep(max(0.0, self.FRAME_S - (time.monotonic() - t0)))
+
+    def tick(self, now):
+        s, face = self.state, self.app.face
+        s.is_speaking, s.is_listening = face["speaking"], face["listening"]
+        s.is_smiling = face["smile"]
+        target = (0.5 + 0.5 * math.sin(now * 9)) if s.is_speaking else 0.0
+        s.mouth_open += (target - s.mouth_open) * 0.3
+        if now >= self.next_blink_t and s.blink_progress <= 0.0:
+            s.blink_progress = 1.0
             self.next_blink_t = now + random.uniform(3.0, 7.0)
-        if self.blink_progress > 0.0:
-            self.blink_progress -= 0.15
-            if self.blink_progress < 0: self.blink_progress = 0.0
-
-        # random wink (left eye)
-        if now >= self.next_wink_t and not self.is_speaking and not self.is_listening:
-            self.wink_left = True
-            self.root.after(160, lambda: setattr(self, "wink_left", False))
+        if s.blink_progress > 0.0:
+            s.blink_progress = max(0.0, s.blink_progress - 0.15)
+        if now >= self.next_wink_t and not s.is_speaking and not s.is_listening:
+            self.wink_until = now + 0.16
             self.next_wink_t = now + random.uniform(8.0, 16.0)
-
-        self.draw()
-        if self._run:
-            self.root.after(50, self.animate)
-
-# ------------- ORCHESTRATION -------------
-class App:
-    def __init__(self):
-        self.face = MacFace()
-        # start conversation in background
-        threading.Thread(target=self.convo_loop, daemon=True).start()
-        # intro speak (animate mouth while speaking)
-        threading.Thread(target=self.say_with_anim, args=(INTRO, True), daemon=True).start()
-
-    def say_with_anim(self, text, smile=False):
-        self.face.is_listening = False
-        self.face.is_speaking = True
-        if smile: self.face.is_smiling = 1.0
-        speak(text)
-        self.face.is_speaking = False
-        if smile: self.face.is_smiling = 0.5
-
-    def convo_loop(self):
-        while True:
-            # 1) listen
-            self.face.is_listening = True
-            user_text = listen_once(timeout=6, phrase_limit=8)
-            self.face.is_listening = False
-
+        s.wink_left = now < self.wink_until
+        self.view.draw(s)
+        self.canvas.flush(self.fb)
+
+
+class HeadlessMacintosh:
+    """
+    One conversation. source/player: see open_source()/open_player().
+    emit(event_dict) receives the state changes; the client, TTS cache
+    and reply cache default to the process-wide ones. With a `context`
+    (scrlk.context.ChatContext) the model sees the conversation so far,
+    otherwise every reply is to the last utterance alone, as in
+    macintosh_live_eq2.py.
+    """
+
+    def __init__(self, source=None, player=None, emit=None, device=MIC_DEVICE_INDEX,
+                 client=None, tts_cache=None, reply_cache=None, intro=INTRO, context=None):
+        self.client = client or get_client()
+        self.context = context
+        self.emit = emit or (lambda event: None)
+        self.intro = intro
+        self.source = source
+        self.aec = EchoCanceller(MIC_SR)
+        self.player = player or StreamPlayer()
+        self.player.reference = self.aec
+        # opened once in run(), never closed between turns
+        self.mic = MicStream(samplerate=MIC_SR, device=device, energy_threshold=ENERGY_THRESHOLD,
+                             echo_canceller=self.aec, source=source)
+        self.stt = make_backend(STT_BACKEND, client=self.client, language=LANG,
+                                fallback="whisper-api")
+        self.tts_cache = tts_cache or get_cache()
+        self.reply_cache = reply_cache or get_reply_cache(
+            ttl_s=REPLY_TTL_S, variants=REPLY_VARIANTS, tts_cache=self.tts_cache,
+            tts_model=TTS_MODEL, tts_voice=TTS_VOICE)
+        self.speculator = Speculator(self.ask_gpt, transcribe=self.stt.transcribe,
+                                     stable_ms=SPEC_STABLE_MS,
+                                     samplerate=MIC_SR) if SPECULATE else None
+        self.barge_in = BargeIn(self.mic, self._on_barge_in)
+
+        self.state = IDLE
+        self.face = {"listening": False, "speaking": False, "smile": 0.0}
+        self.turns = 0
+        self.running = False
+        self._hush = threading.Event()   # set on barge-in, cleared per reply
+
+    # ------------- events -------------
+    def event(self, name, **fields):
+        try:
+            self.emit({"t": round(time.time(), 3), "event": name, **fields})
+        except Exception as e:
+            debug(f"[EVENT FEL] {e}")
+
+    def set_state(self, state, smile=None):
+        if smile is not None:
+            self.face["smile"] = smile
+        self.face["listening"] = state == LISTENING
+        self.face["speaking"] = state == SPEAKING
+        self.state = state
+        self.event("state", state=state, face=dict(self.face))
+
+    # ------------- pipeline -------------
+    def listen_once(self, timeout=LISTEN_TIMEOUT_S, phrase_limit=PHRASE_LIMIT_S, start=None):
+        try:
+            if self.speculator is not None:
+                self.speculator.reset()
+            pcm = self.mic.listen(timeout=timeout, phrase_limit=phrase_limit, pause_s=PAUSE_S,
+                                  start=start,
+                                  on_partial=self.speculator.hear if self.speculator else None)
+            if pcm is None:
+                return None
+            return self.stt.transcribe(pcm, MIC_SR)
+        except Exception as e:
+            self.event("error", where="stt", message=str(e))
+            return None
+
+    def ask_gpt(self, user_text):
+        return self.answer(user_text)[0]
+
+    def answer(self, user_text):
+        """(reply, "cache" | "llm")"""
+        # the reply cache is shared by every session, so it only serves and
+        # stores replies to an opening line; once the session has history
+        # the reply depends on it
+        fresh = self.context is None or not (self.context.turns or self.context.summary)
+        cached = self.reply_cache.get(user_text, SYSTEM_PROMPT) if fresh else None
+        if cached is not None:
+            return " ".join(cached.sentences), "cache"
+        try:
+            trace.mark(trace.LLM_REQUEST)
+            if self.context is not None:
+                history = self.context.messages()
+            else:
+                history = [{"role": "system", "content": SYSTEM_PROMPT}]
+            r = self.client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=history + [{"role": "user", "content": user_text}],
+                temperature=0.7, max_tokens=120
+            )
+            trace.mark(trace.LLM_FIRST_TOKEN)
+            trace.mark(trace.LLM_LAST_TOKEN)
+            ans = r.choices[0].message.content.strip()
+            if fresh:
+                self.reply_cache.put(user_text, SYSTEM_PROMPT, ans)
+            return ans, "llm"
+        except Exception as e:
+            self.event("error", where="llm", message=str(e))
+            traceback.print_exc()
+            return FALLBACK_REPLY, "llm"
+
+    def reply_to(self, user_text):
+        reply = self.speculator.take(user_text) if self.speculator is not None else None
+        how = "speculated"
+        if reply is None:
+            reply, how = self.answer(user_text)
+        # only the answer actually given goes into the history, never a
+        # discarded speculative one
+        if self.context is not None:
+            self.context.add("user", user_text)
+            self.context.add("assistant", reply)
+        return reply, how
+
+    def say(self, text, smile=None):
+        self._hush.clear()
+        self.player.reset()
+        self.set_state(SPEAKING, smile)
+        self.barge_in.arm()
+        try:
+            self.player.speak(self.client, text, model=TTS_MODEL, voice=TTS_VOICE,
+                              cache=self.tts_cache)
+        except Exception as e:
+            self.event("error", where="tts", message=str(e))
+        finally:
+            self.barge_in.disarm()
+
+    def _on_barge_in(self):
+        self._hush.set()
+        self.player.stop()
+        self.event("barge_in")
+
+    # ------------- loop -------------
+    def input_done(self):
+        return self.source is not None and self.source.done
+
+    def run(self, max_turns=None):
+        self.running = True
+        self.mic.start()
+        self.mic.calibrate(duration=0.2)
+        if self.intro:
+            self.say(self.intro, smile=1.0)
+        while self.running and (max_turns is None or self.turns < max_turns):
+            # after a barge-in, from where the user started talking
+            self.set_state(LISTENING)
+            user_text = self.listen_once(start=self.barge_in.take_start())
             if not user_text:
+                if self.input_done():
+                    break
                 continue
+            self.event("heard", text=user_text)
+            self.set_state(THINKING, smile=0.3)
+            reply, how = self.reply_to(user_text)
+            self.event("reply", text=reply, source=how)
+            self.say(reply, smile=1.0)
+            self.turns += 1
+            self.face["smile"] = 0.5
+        self.set_state(IDLE)
+
+    def stop(self):
+        self.running = False
+        self.player.stop()
+        self.mic.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Macintosh persona without a screen")
+    ap.add_argument("--in", dest="source", default="mic",
+                    help='mic | file.wav | "-" (raw s16le 16 kHz on stdin) | FIFO path')
+    ap.add_argument("--out", default="device", help='device | file.wav | "-" (raw s16le 24 kHz on stdout)')
+    ap.add_argument("--events", help="events file (default stdout, or stderr with --out -)")
+    ap.add_argument("--device", type=int, default=MIC_DEVICE_INDEX, help="mic device index")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="pace of .wav input and file output vs real time (0 = no pacing)")
+    ap.add_argument("--turns", type=int, help="stop after this many replies")
+    ap.add_argument("--no-intro", action="store_true")
+    ap.add_argument("--fb", nargs="?", const=FB_DEVICE, metavar="DEVICE",
+                    help="show the face on this framebuffer (default %(const)s)")
+    args = ap.parse_args(argv)
+
+    if args.events:
+        events = open(args.events, "a", encoding="utf-8")
+    else:
+        events = sys.stderr if args.out == "-" else sys.stdout
+    emit = json_lines(events)
+
+    warm_up()
+    app = HeadlessMacintosh(source=open_source(args.source, speed=args.speed),
+                            player=open_player(args.out, speed=args.speed),
+                            emit=emit, device=args.device,
+                            intro=None if args.no_intro else INTRO)
+    app.event("start", input=args.source, output=args.out, stt=app.stt.name)
+    fb = screen = None
+    if args.fb:
+        fb = Framebuffer(args.fb)
+        screen = FramebufferFace(app, fb)
+        screen.start()
+    try:
+        app.run(max_turns=args.turns)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.stop()
+        if screen is not None:
+            screen.stop()
+            screen.tick(time.time())          # the last state, then let go of the mapping
+            fb.close()
+        if isinstance(app.player, SinkPlayer):
+            app.player.close()
+        app.event("stop", turns=app.turns)
 
-            # 2) think
-            self.face.is_smiling = 0.3
-            reply = ask_gpt(user_text)
-
-            # 3) speak with mouth anim
-            self.say_with_anim(reply, smile=True)
-
-            # small gap so it doesn't self-hear
-            time.sleep(0.8)
-
-    def run(self):
-        self.face.root.mainloop()
 
 if __name__ == "__main__":
-    App().run()
+    main()
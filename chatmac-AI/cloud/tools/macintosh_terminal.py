@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Thin kiosk terminal for macintosh_server.py: mic up, reply audio and
+face events down.
+
+    python macintosh_terminal.py ws://server:8770/session
+    python macintosh_terminal.py ws://server:8770/session --in talk.wav --out reply.wav
+    python macintosh_terminal.py ws://server:8770/session --in talk.wav --sessions 32
+
+--in:  mic (default) | a .wav file | "-" (raw s16le 16 kHz mono on stdin)
+--out: device (default) | a .wav file | "-" (raw s16le 24 kHz on stdout) | none
+Face events are printed as JSON lines (stderr when stdout carries audio).
+With file input the terminal says goodbye once the file is used up and
+the server has answered.
+
+--sessions N is a load test: N terminals at once, all saying --in,
+audio discarded. It reports per session the replies, the time from
+"heard" to the first reply audio, and gaps in the reply audio stream
+(frames arriving late for real-time playback, i.e. the server is not
+keeping up).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import wave
+
+try:
+    import sounddevice as sd
+except Exception:  # only needed for --in mic / --out device
+    sd = None
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk.audio_io import WavSource, PipeSource, BLOCK_MS
+from scrlk.ws import connect, BINARY, TEXT, CLOSE
+from scrlk.trace import percentile
+
+URL = "ws://127.0.0.1:8770/session"
+MIC_SR = 16000
+TTS_SR = 24000
+IDLE_S = 2.0          # file input: server quiet this long after the file ended = done
+GAP_MS = 60           # reply audio frames further apart than this would underrun playback
+
+
+class DeviceSource:
+    """The sound card mic, as an audio_io-style source."""
+
+    def __init__(self, samplerate=MIC_SR, block_ms=BLOCK_MS, device=None):
+        if sd is None:
+            raise RuntimeError("sounddevice saknas (use --in file.wav)")
+        self.samplerate = samplerate
+        self.block = int(samplerate * block_ms / 1000)
+        self.device = device
+        self.done = False
+        self._stream = None
+
+    def start(self, callback):
+        self._stream = sd.InputStream(samplerate=self.samplerate, channels=1, dtype="int16",
+                                      blocksize=self.block, device=self.device,
+                                      callback=lambda indata, *a: callback(indata[:, 0].copy()))
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+def open_source(spec, device=None):
+    if spec in (None, "", "mic"):
+        return DeviceSource(device=device)
+    if spec == "-":
+        return PipeSource(sys.stdin.buffer, samplerate=MIC_SR)
+    return WavSource(spec, samplerate=MIC_SR)
+
+
+def open_output(spec):
+    """write(bytes) for the reply audio, and close()."""
+    if spec == "none":
+        return (lambda data: None), (lambda: None)
+    if spec == "-":
+        out = sys.stdout.buffer
+        return (lambda data: (out.write(data), out.flush())), (lambda: None)
+    if spec in (None, "", "device"):
+        if sd is None:
+            raise RuntimeError("sounddevice saknas (use --out file.wav)")
+        stream = sd.RawOutputStream(samplerate=TTS_SR, channels=1, dtype="int16")
+        stream.start()
+        return stream.write, stream.close
+    wf = wave.open(spec, "wb")
+    wf.setnchannels(1)
+    wf.setsampwidth(2)
+    wf.setframerate(TTS_SR)
+    return wf.writeframes, wf.close
+
+
+class Stats:
+    def __init__(self):
+        self.replies = 0
+        self.latency_ms = []      # "heard" -> first reply audio
+        self.gaps = 0
+        self.audio_s = 0.0
+        self.errors = []
+        self.state = None
+        self.last_rx = time.monotonic()
+        self._heard = None
+        self._last_audio = None
+
+    def audio(self, data):
+        now = time.monotonic()
+        if self._heard is not None:
+            self.latency_ms.append((now - self._heard) * 1000.0)
+            self._heard = None
+        elif self._last_audio is not None and self.state == "speaking" and \
+                now - self._last_audio > GAP_MS / 1000.0:
+            self.gaps += 1
+        self._last_audio = now
+        self.audio_s += len(data) / 2 / TTS_SR
+
+    def event(self, ev):
+        name = ev.get("event")
+        if name == "heard":
+            self._heard = time.monotonic()
+        elif name == "reply":
+            self.replies += 1
+        elif name == "state":
+            self.state = ev.get("state")
+            if self.state != "speaking":
+                self._last_audio = None
+        elif name == "error":
+            self.errors.append(ev.get("message"))
+
+
+async def terminal(url, source, write=None, on_event=None, stats=None):
+    stats = stats or Stats()
+    ws = await connect(url)
+    loop = asyncio.get_running_loop()
+    mic = asyncio.Queue()
+    source.start(lambda block: loop.call_soon_threadsafe(mic.put_nowait, block.tobytes()))
+
+    async def upload():
+        while True:
+            await ws.send(await mic.get())
+
+    async def download():
+        while True:
+            kind, data = await ws.recv()
+            stats.last_rx = time.monotonic()
+            if kind == BINARY:
+                stats.audio(data)
+                if write is not None:
+                    write(data)
+            elif kind == TEXT:
+                ev = json.loads(data)
+                stats.event(ev)
+                if on_event is not None:
+                    on_event(ev)
+            elif kind == CLOSE:
+                return
+
+    up, down = asyncio.create_task(upload()), asyncio.create_task(download())
+    try:
+        while not down.done():
+            await asyncio.sleep(0.1)
+            if source.done and stats.state == "listening" and \
+                    time.monotonic() - stats.last_rx > IDLE_S:
+                break
+    finally:
+        source.stop()
+        up.cancel()
+        if not ws.closed:
+            try:
+                await ws.send(json.dumps({"type": "bye"}))
+            except Exception:
+                pass
+        try:
+            await asyncio.wait_for(down, timeout=2.0)
+        except (asyncio.TimeoutError, Exception):
+            down.cancel()
+        await ws.close()
+    return stats
+
+
+async def load_test(url, path, sessions, stagger_s):
+    async def one(i):
+        await asyncio.sleep(i * stagger_s)
+        return await terminal(url, WavSource(path, samplerate=MIC_SR))
+
+    t0 = time.monotonic()
+    results = await asyncio.gather(*(one(i) for i in range(sessions)), return_exceptions=True)
+    elapsed = time.monotonic() - t0
+    ok = [r for r in results if isinstance(r, Stats)]
+    failed = [r for r in results if not isinstance(r, Stats)]
+    latency = [v for r in ok for v in r.latency_ms]
+    print(f"sessions         : {len(ok)}/{sessions} completed ({elapsed:.1f} s)")
+    for e in failed[:3]:
+        print(f"  failed         : {e!r}")
+    print(f"replies          : {sum(r.replies for r in ok)} "
+          f"({sum(r.replies for r in ok) / elapsed * 60:.1f}/min)")
+    if latency:
+        print(f"heard -> audio   : p50 {percentile(latency, 50):.0f} ms   "
+              f"p95 {percentile(latency, 95):.0f} ms   p99 {percentile(latency, 99):.0f} ms")
+    print(f"reply audio      : {sum(r.audio_s for r in ok):.1f} s, "
+          f"{sum(r.gaps for r in ok)} gaps > {GAP_MS} ms")
+    errors = [e for r in ok for e in r.errors]
+    if errors:
+        print(f"errors           : {len(errors)} (first: {errors[0]})")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Thin kiosk terminal for macintosh_server.py")
+    ap.add_argument("url", nargs="?", default=URL)
+    ap.add_argument("--in", dest="source", default="mic", help='mic | file.wav | "-"')
+    ap.add_argument("--out", default="device", help='device | file.wav | "-" | none')
+    ap.add_argument("--device", type=int, help="mic device index")
+    ap.add_argument("--no-intro", action="store_true")
+    ap.add_argument("--sessions", type=int, default=1, help="load test: this many terminals")
+    ap.add_argument("--stagger", type=float, default=0.2, help="load test: seconds between starts")
+    args = ap.parse_args(argv)
+    url = args.url + ("?intro=0" if args.no_intro else "")
+
+    if args.sessions > 1:
+        if not args.source.lower().endswith(".wav"):
+            ap.error("a load test needs --in file.wav")
+        asyncio.run(load_test(url, args.source, args.sessions, args.stagger))
+        return
+
+    write, close = open_output(args.out)
+    events = sys.stderr if args.out == "-" else sys.stdout
+    def on_event(ev):
+        events.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        events.flush()
+    try:
+        asyncio.run(terminal(url, open_source(args.source, args.device), write, on_event))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import os
+import sys
+
 import sounddevice as sd
-import scipy.io.wavfile as wav
 from openai import OpenAI
 
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk.audio_io import encode
+
 client = OpenAI()
 
 fs = 16000
@@ -9,11 +15,11 @@ duration = 5
 print("🎙️ Spelar in...")
 audio = sd.rec(int(duration*fs), samplerate=fs, channels=1, dtype='int16')
 sd.wait()
-wav.write("temp.wav", fs, audio)
 
+# WAV i minnet, ingen temp.wav på disken
 result = client.audio.transcriptions.create(
     model="whisper-1",
-    file=open("temp.wav", "rb"),
+    file=encode(audio[:, 0], fs),
     language="sv"
 )
 
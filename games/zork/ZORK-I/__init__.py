@@ -1 +1 @@
-__all__ = ["app", "engine", "world", "resources", "audio"]
+__all__ = ["app", "fbapp", "engine", "world", "resources", "audio"]
@@ -1,4 +1,4 @@
-import os, time, tkinter as tk
+import math, os, time, tkinter as tk
 from tkinter import Canvas, END
 try:
     from PIL import Image, ImageTk
@@ -6,15 +6,17 @@ try:
 except Exception:
     PIL_OK = False
 
-from .engine import Game
+from .engine import Game, narration_texts
 from .resources import *
 from .audio import AudioIO, AI_OK, USE_AUDIO
+from scrlk.layers import CanvasLayers
 
 class VoxZorkApp:
-    def __init__(self):
-        self.audio = AudioIO()
+    def __init__(self, audio=None):
+        # audio: färdig AudioIO (t.ex. med fil som källa/spelare), annars en ny
+        self.audio = audio or AudioIO()
         self.game = Game()
-        self._img_cache, self._tk_cache, self._sprite_refs = {}, {}, []
+        self._img_cache, self._tk_cache, self._sprite_refs = {}, {}, {}
 
         self.root = tk.Tk()
         self.root.title("Zork-like (Voice) – CRT")
@@ -32,6 +34,7 @@ class VoxZorkApp:
         top = tk.Frame(self.root, bg=CRT_BG); top.pack(expand=True, fill="both")
         self.canvas = Canvas(top, width=cw, height=ch, bg=CRT_BG, highlightthickness=0)
         self.canvas.grid(row=0, column=0, padx=12, pady=12, sticky="nsew")
+        self.layers = CanvasLayers(self.canvas, self.LAYERS)
         right = tk.Frame(top, bg=CRT_BG); right.grid(row=0, column=1, sticky="ns", pady=12, padx=(0,12))
         top.columnconfigure(0, weight=1); top.rowconfigure(0, weight=1)
 
@@ -50,11 +53,18 @@ class VoxZorkApp:
         self.status = tk.Label(right, text="Ready.", bg=CRT_BG, fg=CRT_FG); self.status.pack(anchor="w", pady=(8,0))
 
         self.draw_world()
+        # förgenerera röst för alla rum + fasta repliker, så rumsbyten spelas direkt
+        self.audio.presynthesize(narration_texts(), on_progress=self._presynth_progress)
         self.tell(self.game.look(), speak=True)
         # Starta hands-free konversation
         self.audio.start_auto_listen(self._heard_text)
         self.root.after(100, self.redraw_loop)
 
+    def _presynth_progress(self, done, total):
+        # körs från TTS-trådar – hoppa till Tk:s main thread
+        msg = f"Preparing voice… {done}/{total}" if done < total else "Voice ready."
+        self.root.after(0, lambda: self.set_status(msg))
+
     def _heard_text(self, text):
         # körs från lyssnartråd – hoppa till Tk:s main thread
         self.root.after(0, lambda: self._handle_text(text))
@@ -85,50 +95,63 @@ class VoxZorkApp:
         if pil is None: return None
         try: resized = pil.resize((max(1,w), max(1,h)), Image.LANCZOS)
         except Exception: resized = pil
-        tkimg = ImageTk.PhotoImage(resized); self._tk_cache[key] = tkimg; return tkimg
+        tkimg = self._photo(resized); self._tk_cache[key] = tkimg; return tkimg
+    def _photo(self, image): return ImageTk.PhotoImage(image)
+
+    # draw: lager (canvas-taggar) som bara byggs om när det de visar ändrats
+    LAYERS = ("location", "scanlines", "face", "inventory", "title")
 
-    # draw
     def draw_world(self):
-        c = self.canvas; c.delete("all"); self._sprite_refs.clear()
-        self.draw_location_image()
+        L = self.layers
+        L.update("scanlines", None, self.draw_scanlines)                # statiskt
+        L.update("location", self.game.room, self.draw_location_image)
+        L.update("inventory", tuple(self.game.inv), self.draw_inventory_bar)
+        L.update("title", self.game.room, self.draw_title)
+        face = self.face_state()
+        L.update("face", face, lambda tags: self.draw_face(tags, face))  # animerat
+        L.restack()
+
+    def draw_scanlines(self, tags="scanlines"):
+        c = self.canvas
         for y in range(0, LOGH, 4):
-            c.create_line(self.fx(0), self.fy(y), self.fx(LOGW), self.fy(y), fill=CRT_GRID)
-        self.draw_face()
-        self.draw_inventory_bar()
-        rname = self.game and self.game.room and self.game.room in ROOM_IMAGE and ""
-        c.create_text(self.fx(LOC_X + LOC_W//2), self.fy(LOC_Y - 20),
-                      text=self.game and self.game.room and (self.game.room.replace("_"," ").title()),
-                      fill=CRT_FG, font=("Courier", int(16*self.scale)))
-
-    def draw_location_image(self):
+            c.create_line(self.fx(0), self.fy(y), self.fx(LOGW), self.fy(y), fill=CRT_GRID, tags=tags)
+
+    def draw_title(self, tags="title"):
+        self.canvas.create_text(self.fx(LOC_X + LOC_W//2), self.fy(LOC_Y - 20),
+                                text=self.game and self.game.room and (self.game.room.replace("_"," ").title()),
+                                fill=CRT_FG, font=("Courier", int(16*self.scale)), tags=tags)
+
+    def draw_location_image(self, tags="location"):
         c = self.canvas; lw = max(1, int(2*self.scale))
+        refs = self._sprite_refs[tags] = []
         c.create_rectangle(self.fx(LOC_X-6), self.fy(LOC_Y-6),
                            self.fx(LOC_X+LOC_W+6), self.fy(LOC_Y+LOC_H+6),
-                           outline=CRT_DIM, width=lw)
+                           outline=CRT_DIM, width=lw, tags=tags)
         base = ROOM_IMAGE.get(self.game.room)
         path = os.path.join(LOC_DIR, f"{base}.png") if base else None
         if PIL_OK and path and os.path.exists(path):
             tkimg = self._get_tk_image(path, self.fx(LOC_W), self.fy(LOC_H))
             if tkimg:
-                c.create_image(self.fx(LOC_X), self.fy(LOC_Y), image=tkimg, anchor="nw")
-                self._sprite_refs.append(tkimg); return
+                c.create_image(self.fx(LOC_X), self.fy(LOC_Y), image=tkimg, anchor="nw", tags=tags)
+                refs.append(tkimg); return
         c.create_rectangle(self.fx(LOC_X), self.fy(LOC_Y),
                            self.fx(LOC_X+LOC_W), self.fy(LOC_Y+LOC_H),
-                           outline=CRT_FG, width=lw)
+                           outline=CRT_FG, width=lw, tags=tags)
         c.create_text(self.fx(LOC_X+LOC_W/2), self.fy(LOC_Y+LOC_H/2),
-                      text="No image", fill=CRT_FG, font=("Courier", int(14*self.scale)))
+                      text="No image", fill=CRT_FG, font=("Courier", int(14*self.scale)), tags=tags)
 
-    def draw_inventory_bar(self):
+    def draw_inventory_bar(self, tags="inventory"):
         c = self.canvas
+        refs = self._sprite_refs[tags] = []
         c.create_rectangle(self.fx(0), self.fy(INV_Y), self.fx(LOGW), self.fy(LOGH),
-                           outline=CRT_DIM, fill=CRT_BG, width=1)
+                           outline=CRT_DIM, fill=CRT_BG, width=1, tags=tags)
         c.create_text(self.fx(12), self.fy(INV_Y + 16),
                       text="Inventory:", anchor="w",
-                      fill=CRT_FG, font=("Courier", int(12*self.scale)))
+                      fill=CRT_FG, font=("Courier", int(12*self.scale)), tags=tags)
         if not self.game.inv:
             c.create_text(self.fx(120), self.fy(INV_Y + 18),
                           text="(empty)", anchor="w",
-                          fill=CRT_DIM, font=("Courier", int(12*self.scale)))
+                          fill=CRT_DIM, font=("Courier", int(12*self.scale)), tags=tags)
             return
         x = 120
         for item in self.game.inv:
@@ -138,54 +161,59 @@ class VoxZorkApp:
             if PIL_OK and os.path.exists(path):
                 tkimg = self._get_tk_image(path, *size)
                 if tkimg:
-                    c.create_image(self.fx(x), self.fy(INV_Y + 10), image=tkimg, anchor="nw")
-                    self._sprite_refs.append(tkimg)
+                    c.create_image(self.fx(x), self.fy(INV_Y + 10), image=tkimg, anchor="nw", tags=tags)
+                    refs.append(tkimg)
                 else:
-                    self._icon_placeholder(x, INV_Y + 10, item)
+                    self._icon_placeholder(x, INV_Y + 10, item, tags)
             else:
-                self._icon_placeholder(x, INV_Y + 10, item)
+                self._icon_placeholder(x, INV_Y + 10, item, tags)
             x += ICON_SIZE + INV_PAD
 
-    def _icon_placeholder(self, lx, ly, label):
+    def _icon_placeholder(self, lx, ly, label, tags="inventory"):
         c = self.canvas; lw = max(1, int(1*self.scale))
         c.create_rectangle(self.fx(lx), self.fy(ly),
                            self.fx(lx+ICON_SIZE), self.fy(ly+ICON_SIZE),
-                           outline=CRT_FG, width=lw)
+                           outline=CRT_FG, width=lw, tags=tags)
         c.create_text(self.fx(lx+ICON_SIZE/2), self.fy(ly+ICON_SIZE/2),
-                      text=label[:4], fill=CRT_FG, font=("Courier", int(10*self.scale)))
+                      text=label[:4], fill=CRT_FG, font=("Courier", int(10*self.scale)), tags=tags)
 
-    def draw_face(self):
+    def face_state(self):
+        """(blink, munöppning eller None) – ansiktet ritas om bara när den ändras."""
+        speaking = getattr(self.audio, "is_speaking", False)
+        blink = (int(time.time()*2) % 6 == 0) and not speaking
+        if speaking:
+            phase = (math.sin(time.time()*10) + 1)/2  # 0..1
+            return blink, 4 + int(10*phase)
+        return blink, None
+
+    def draw_face(self, tags="face", state=None):
         c = self.canvas
         x0,y0,x1,y1 = 40, 60, 240, 160
         lw = max(1, int(2*self.scale))
-        c.create_rectangle(self.fx(x0), self.fy(y0), self.fx(x1), self.fy(y1), outline=CRT_FG, width=lw)
+        c.create_rectangle(self.fx(x0), self.fy(y0), self.fx(x1), self.fy(y1), outline=CRT_FG, width=lw, tags=tags)
         cx, cy = (x0+x1)/2, (y0+y1)/2
         eye_dx, eye_h = 28, 14
+        blink, open_h = state or self.face_state()
 
         # ögon
-        blink = (int(time.time()*2) % 6 == 0) and (not self.audio.is_speaking)
         if blink:
-            c.create_line(self.fx(cx-eye_dx-6), self.fy(cy), self.fx(cx-eye_dx+6), self.fy(cy), fill=CRT_FG, width=lw)
-            c.create_line(self.fx(cx+eye_dx-6), self.fy(cy), self.fx(cx+eye_dx+6), self.fy(cy), fill=CRT_FG, width=lw)
+            c.create_line(self.fx(cx-eye_dx-6), self.fy(cy), self.fx(cx-eye_dx+6), self.fy(cy), fill=CRT_FG, width=lw, tags=tags)
+            c.create_line(self.fx(cx+eye_dx-6), self.fy(cy), self.fx(cx+eye_dx+6), self.fy(cy), fill=CRT_FG, width=lw, tags=tags)
         else:
-            c.create_rectangle(self.fx(cx-eye_dx-3), self.fy(cy-eye_h), self.fx(cx-eye_dx+3), self.fy(cy+eye_h), outline=CRT_FG, fill=CRT_FG, width=1)
-            c.create_rectangle(self.fx(cx+eye_dx-3), self.fy(cy-eye_h), self.fx(cx+eye_dx+3), self.fy(cy+eye_h), outline=CRT_FG, fill=CRT_FG, width=1)
+            c.create_rectangle(self.fx(cx-eye_dx-3), self.fy(cy-eye_h), self.fx(cx-eye_dx+3), self.fy(cy+eye_h), outline=CRT_FG, fill=CRT_FG, width=1, tags=tags)
+            c.create_rectangle(self.fx(cx+eye_dx-3), self.fy(cy-eye_h), self.fx(cx+eye_dx+3), self.fy(cy+eye_h), outline=CRT_FG, fill=CRT_FG, width=1, tags=tags)
 
         # näsa ┘
-        c.create_line(self.fx(cx), self.fy(cy-8), self.fx(cx), self.fy(cy+14), fill=CRT_FG, width=lw)
-        c.create_line(self.fx(cx), self.fy(cy+14), self.fx(cx+10), self.fy(cy+14), fill=CRT_FG, width=lw)
-
-        # mun: öppna/stäng beroende på is_speaking
-        t = time.time()
-        if getattr(self.audio, "is_speaking", False):
-            phase = (math.sin(t*10) + 1)/2  # 0..1
-            open_h = 4 + int(10*phase)
+        c.create_line(self.fx(cx), self.fy(cy-8), self.fx(cx), self.fy(cy+14), fill=CRT_FG, width=lw, tags=tags)
+        c.create_line(self.fx(cx), self.fy(cy+14), self.fx(cx+10), self.fy(cy+14), fill=CRT_FG, width=lw, tags=tags)
+
+        # mun: öppen medan den pratar, annars leende
+        if open_h is not None:
             c.create_rectangle(self.fx(cx-14), self.fy(cy+22-open_h), self.fx(cx+14), self.fy(cy+22+open_h),
-                            outline=CRT_FG, fill=CRT_FG, width=1)
+                            outline=CRT_FG, fill=CRT_FG, width=1, tags=tags)
         else:
-            # leende
-            c.create_line(self.fx(cx-24), self.fy(cy+26), self.fx(cx), self.fy(cy+34), fill=CRT_FG, width=lw)
-            c.create_line(self.fx(cx), self.fy(cy+34), self.fx(cx+24), self.fy(cy+26), fill=CRT_FG, width=lw)
+            c.create_line(self.fx(cx-24), self.fy(cy+26), self.fx(cx), self.fy(cy+34), fill=CRT_FG, width=lw, tags=tags)
+            c.create_line(self.fx(cx), self.fy(cy+34), self.fx(cx+24), self.fy(cy+26), fill=CRT_FG, width=lw, tags=tags)
 
 
     def redraw_loop(self):
@@ -209,12 +237,12 @@ class VoxZorkApp:
 
     def tell(self, text, speak=False):
         self.log_write(text)
-        if speak and not self.audio.is_speaking: self.audio.speak(text)
+        if speak: self.audio.speak(text)
         self.set_status("Ready. Press V to speak.")
 
     def push_to_talk(self):
         if not (AI_OK and USE_AUDIO): self.set_status("Voice off."); return
-        if self.audio.is_speaking: self.set_status("Speaking…"); return
+        if self.audio.is_speaking: self.audio.stop_speaking()   # V avbryter uppläsningen
         txt = self.audio.stt_once()
         if txt:
             self.entry.delete(0, END); self.entry.insert(0, txt); self.send_text()
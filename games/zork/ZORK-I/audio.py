@@ -1,6 +1,9 @@
-import os, tempfile, threading
-import collections, time, os
-import webrtcvad
+import os, sys, threading
+import queue, time, os
+from concurrent.futures import ThreadPoolExecutor
+
+# delade moduler (scrlk/) ligger i repo-roten
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
 
 VAD_AGGR = int(os.getenv("ZORK_VAD", "2"))   # 0–3
 VAD_FRAME_MS = 20                            # 10/20/30 ms
@@ -9,149 +12,149 @@ SILENCE_HANG_MS = 500                        # hur länge tystnad krävs för at
 UTTER_MAX_MS = 15000   
 AI_OK = False; USE_AUDIO = False
 try:
-    from openai import OpenAI
+    from scrlk.clients import get_client, warm_up
     AI_OK = bool(os.getenv("OPENAI_API_KEY"))
 except Exception:
-    OpenAI = None; AI_OK = False
+    get_client = warm_up = None; AI_OK = False
 
 try:
-    import numpy as np, sounddevice as sd, soundfile as sf
-    from scipy.io.wavfile import write as wav_write
+    # sounddevice behövs bara för riktiga ljudkort (scrlk öppnar det själv);
+    # utan det kan ljudet komma från fil/pipe (AudioIO.source / .player)
+    import numpy as np
+    from scrlk.tts_stream import StreamPlayer, prefetch
+    from scrlk.tts_cache import get_cache
+    from scrlk.vad import VadSegmenter, record_utterance
+    from scrlk.aec import EchoCanceller
+    from scrlk.stt import make_backend
     USE_AUDIO = True
 except Exception:
     USE_AUDIO = False
 
-MODEL_WHISPER = "whisper-1"
+STT_BACKEND   = "whisper-api"   # whisper-api | google | local | stub ($SCRLK_STT overrides)
 MODEL_TTS     = "tts-1"
 VOICE_TTS     = "onyx"
-REC_SR, REC_SEC, REC_CH = 16000, 4.0, 1
+PTT_TIMEOUT_S = 4.0    # V-knappen: max väntan på att man börjar prata
+PRESYNTH_WORKERS = 4   # samtidiga TTS-anrop vid förgenerering
 
 class AudioIO:
     def __init__(self):
-        self.client = OpenAI() if AI_OK else None
+        self.client = get_client() if AI_OK else None
+        if AI_OK: warm_up()   # varma anslutningar innan första TTS/STT
         self.is_speaking = False
         self.lock = threading.Lock()
-        self.vad = webrtcvad.Vad(VAD_AGGR)
         self.keep_listen = False
         self.on_transcript = None   # callback(text)
+        self.player = StreamPlayer() if USE_AUDIO else None
+        # ekosläckning: uppläsningen dras av från mikrofonen (barge-in hör bara spelaren)
+        self.aec = EchoCanceller(VAD_SR) if USE_AUDIO else None
+        if self.player: self.player.reference = self.aec
+        self.tts_cache = get_cache() if USE_AUDIO else None   # "Taken lamp." m.fl. bara en gång
+        self.stt = make_backend(STT_BACKEND, client=self.client,
+                                fallback="whisper-api") if USE_AUDIO else None
+        self.source = None              # scrlk.audio_io-källa i stället för mikrofonen
+        self.segmenter = None
+        self._utter_q = queue.Queue()   # färdiga yttranden (int16) → STT-tråd
+        self._speak_gen = 0             # ökas när pågående tal avbryts
 
-    def _frame_bytes(self, samples_f32):
-        # float32 [-1,1] -> int16 bytes 16k mono
-        import numpy as np
-        s = (samples_f32 * 32767.0).clip(-32768, 32767).astype(np.int16)
-        return s.tobytes()
-    
     def start_auto_listen(self, on_transcript):
         if not (AI_OK and USE_AUDIO): return
         if self.keep_listen: return
         self.on_transcript = on_transcript
         self.keep_listen = True
+        # VAD körs i en egen konsumenttråd, ljudcallbacken bara köar block
+        self.segmenter = VadSegmenter(self._utter_q.put, aggressiveness=VAD_AGGR,
+                                      samplerate=VAD_SR, frame_ms=VAD_FRAME_MS,
+                                      hang_ms=SILENCE_HANG_MS, max_ms=UTTER_MAX_MS,
+                                      on_barge_in=self.stop_speaking,
+                                      echo_canceller=self.aec)
+        self.segmenter.paused = self.is_speaking
+        try:
+            self.segmenter.start(source=self.source)
+        except Exception as e:
+            print(f"[VAD] kunde inte öppna mikrofonen: {e}", file=sys.stderr)
+            self.keep_listen = False; self.segmenter = None
+            return
         t = threading.Thread(target=self._listen_loop, daemon=True)
         t.start()
 
     def stop_auto_listen(self):
         self.keep_listen = False
+        if self.segmenter:
+            self.segmenter.stop(); self.segmenter = None
+        self._utter_q.put(None)
 
     def _listen_loop(self):
-        import numpy as np, sounddevice as sd
-        frame_len = int(VAD_SR * VAD_FRAME_MS/1000)
-        hang_frames = int(SILENCE_HANG_MS / VAD_FRAME_MS)
-        max_frames = int(UTTER_MAX_MS / VAD_FRAME_MS)
-
+        # tar emot färdiga yttranden från VadSegmenter och transkriberar dem
         while self.keep_listen:
+            pcm = self._utter_q.get()
+            if pcm is None:
+                break
             try:
-                # vänta tills vi inte pratar, för att undvika eko
-                if self.is_speaking:
-                    time.sleep(0.05); continue
-
-                # inspelningsström i 16k mono
-                q = collections.deque(maxlen=hang_frames)
-                voiced = False
-                collected = []
-                with sd.InputStream(samplerate=VAD_SR, channels=1, dtype='float32', blocksize=frame_len):
-                    start_t = time.time()
-                    while self.keep_listen and not self.is_speaking:
-                        block, _ = sd.RawInputStream  # hint för IDE
-                        data, _ = sd.rec(int(frame_len), samplerate=VAD_SR, channels=1, dtype='float32'), sd.wait()
-                        # sd.rec ovan är blockande; gör om till 1 block:
-                        x = data.reshape(-1).astype('float32')
-                        fb = self._frame_bytes(x)
-                        is_speech = self.vad.is_speech(fb, VAD_SR)
-
-                        if is_speech:
-                            voiced = True
-                            collected.append(fb)
-                            q.clear()
-                        else:
-                            if voiced:
-                                q.append(fb)
-                                if len(q) >= hang_frames:
-                                    break
-                            else:
-                                # fortfarande tyst före start
-                                pass
-
-                        if voiced and len(collected) >= max_frames:
-                            break
-
-                if not voiced:
-                    continue
-
-                # lägg till hangover-tystnad i slutet för stabilitet
-                collected.extend(list(q))
-                # skriv temporär wav
-                import wave
-                tmp = os.path.join(tempfile.gettempdir(), f"vad_{int(time.time()*1000)}.wav")
-                with wave.open(tmp, 'wb') as wf:
-                    wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(VAD_SR)
-                    wf.writeframes(b"".join(collected))
-
-                # transkribera
-                try:
-                    with open(tmp, "rb") as f:
-                        tr = self.client.audio.transcriptions.create(model="whisper-1", file=f)
-                    txt = (tr.text or "").strip()
-                    if txt and self.on_transcript:
-                        self.on_transcript(txt)
-                finally:
-                    try: os.remove(tmp)
-                    except: pass
-
+                txt = self.stt.transcribe(pcm, VAD_SR)
+                if txt and self.on_transcript:
+                    self.on_transcript(txt)
             except Exception:
                 time.sleep(0.2)
 
 
     def speak(self, text):
+        """Läs upp text. Det som redan läses upp avbryts (ny text ersätter gammal)."""
         if not text or not (AI_OK and USE_AUDIO): return
+        self.stop_speaking()
+        gen = self._speak_gen
         def _w():
-            self.is_speaking = True
-            try:
-                res = self.client.audio.speech.create(model=MODEL_TTS, voice=VOICE_TTS, input=text, response_format="wav")
-                try: audio_bytes = res.read()
-                except AttributeError:
-                    audio_bytes = getattr(res, "content", None) or bytes(res)
-                tmp = os.path.join(tempfile.gettempdir(), "tts.wav")
-                with open(tmp, "wb") as f: f.write(audio_bytes)
-                data, sr = sf.read(tmp, dtype="float32", always_2d=False)
-                sd.play(data, sr); sd.wait()
-            except Exception:
-                pass
-            finally:
-                self.is_speaking = False
+            with self.lock:   # en röst i taget; väntande avbrutna trådar hoppar över
+                self.player.reset()   # före kontrollen: ett stop() efter den gäller
+                if gen != self._speak_gen: return
+                self.is_speaking = True
+                # medan vi pratar lyssnar VAD bara efter barge-in, inte efter kommandon
+                if self.segmenter: self.segmenter.paused = True
+                try:
+                    # PCM-ström direkt till ljudkortet, ingen tts.wav
+                    self.player.speak(self.client, text, model=MODEL_TTS, voice=VOICE_TTS,
+                                      cache=self.tts_cache)
+                except Exception:
+                    pass
+                finally:
+                    self.is_speaking = False
+                    if self.segmenter: self.segmenter.paused = False
         threading.Thread(target=_w, daemon=True).start()
 
+    def stop_speaking(self):
+        """Tysta uppläsningen inom ett ljudblock (barge-in, nytt kommando)."""
+        self._speak_gen += 1
+        if self.player: self.player.stop()
+
+    def presynthesize(self, texts, on_progress=None):
+        """Lägg all berättarröst i TTS-cachen i bakgrunden.
+        on_progress(done, total) anropas från arbetstrådar."""
+        if not (AI_OK and USE_AUDIO): return
+        texts = list(texts)
+        total, done = len(texts), [0]
+        lock = threading.Lock()
+
+        def _one(text):
+            try:
+                prefetch(self.client, self.tts_cache, text, MODEL_TTS, VOICE_TTS)
+            except Exception as e:
+                print(f"[TTS] förgenerering misslyckades: {e}", file=sys.stderr)
+            with lock:
+                done[0] += 1; n = done[0]
+            if on_progress: on_progress(n, total)
+
+        def _run():
+            with ThreadPoolExecutor(max_workers=PRESYNTH_WORKERS) as pool:
+                list(pool.map(_one, texts))
+        threading.Thread(target=_run, daemon=True).start()
+
     def stt_once(self):
         if not (AI_OK and USE_AUDIO): return None
         try:
-            import numpy as np
-            frames = int(REC_SR * REC_SEC)
-            audio = sd.rec(frames, samplerate=REC_SR, channels=REC_CH, dtype="float32"); sd.wait()
-            peak = float(np.max(np.abs(audio))) if audio.size else 0.0
-            if peak > 0: audio = audio / max(1.0, peak)
-            tmp = os.path.join(tempfile.gettempdir(), "stt.wav")
-            wav_write(tmp, REC_SR, (audio * 32767).astype(np.int16))
-            with open(tmp, "rb") as f:
-                tr = self.client.audio.transcriptions.create(model=MODEL_WHISPER, file=f)
-            return (tr.text or "").strip()
+            # VAD-endpointing: klart när man slutat prata, inte efter fasta 4 s
+            pcm = record_utterance(timeout=PTT_TIMEOUT_S, hang_ms=SILENCE_HANG_MS,
+                                   max_ms=UTTER_MAX_MS, aggressiveness=VAD_AGGR, samplerate=VAD_SR,
+                                   source=self.source)
+            if pcm is None: return None
+            return self.stt.transcribe(pcm, VAD_SR)
         except Exception:
             return None
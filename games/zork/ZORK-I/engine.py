@@ -1,5 +1,13 @@
 from .world import WORLD, DIRS
 
+def describe(r, items):
+    text = f"{r['name']}\n{r['desc']}"
+    if items:
+        text += "\nYou see: " + ", ".join(items) + "."
+    exits = ", ".join(r["exits"].keys())
+    if exits: text += f"\nExits: {exits}."
+    return text
+
 class Game:
     def __init__(self):
         self.room = "west_of_house"
@@ -12,12 +20,7 @@ class Game:
 
     def look(self):
         r = WORLD[self.room]
-        text = f"{r['name']}\n{r['desc']}"
-        if r["items"]:
-            text += "\nYou see: " + ", ".join(r["items"]) + "."
-        exits = ", ".join(r["exits"].keys())
-        if exits: text += f"\nExits: {exits}."
-        return text
+        return describe(r, r["items"])
 
     def move(self, direction):
         r = WORLD[self.room]
@@ -76,3 +79,37 @@ class Game:
         if v == "read" and len(toks) >= 2: return self.read(toks[-1])
         if v == "light": return self.light()
         return self.add_msg("I don't understand that.")
+
+# Fasta repliker som inte beror på spelläget (för TTS-förgenerering).
+FIXED_MSGS = (
+    "You can't go that way.",
+    "You don't see that here.",
+    "You're not carrying that.",
+    "It won't open.",
+    "That doesn't seem to need unlocking.",
+    "How do you want to use that?",
+    "The leaflet says: 'LIGHT HELPS BELOW.'",
+    "There's nothing to read.",
+    "You switch on the brass lamp. The gloom retreats.",
+    "You don't have a lamp.",
+    "You are empty-handed.",
+    "I don't understand that.",
+    "Goodbye.",
+)
+
+def narration_texts():
+    """Alla rader spelet kan säga från startvärlden: rumsbeskrivningar
+    (med varje delmängd av rummets föremål kvar) + fasta repliker."""
+    texts, items = [], []
+    for room, r in WORLD.items():
+        start_items = list(r["items"])
+        items += start_items
+        for mask in range(1 << len(start_items)):
+            text = describe(r, [it for i, it in enumerate(start_items) if mask >> i & 1])
+            texts.append(text)
+            if room == "cellar":
+                texts.append("It's very dark. Your lamp would help. " + text)
+    texts += FIXED_MSGS
+    for it in items:
+        texts += [f"Taken {it}.", f"Dropped {it}."]
+    return list(dict.fromkeys(texts))
@@ -0,0 +1,70 @@
+import queue, sys, threading, time
+
+from .app import VoxZorkApp
+from .engine import Game, narration_texts
+from .resources import *
+from .audio import AudioIO
+from scrlk.fb import FbCanvas
+from scrlk.layers import CanvasLayers
+
+class FbZorkApp(VoxZorkApp):
+    """VoxZorkApp utan X/Tk: bilden direkt på rambufferten (scrlk.fb),
+    loggen och kommandona i terminalen, rösten som vanligt."""
+    TICK_S = 0.25
+
+    def __init__(self, fb, audio=None, out=sys.stdout):
+        self.audio = audio or AudioIO()
+        self.game = Game()
+        self._img_cache, self._tk_cache, self._sprite_refs = {}, {}, {}
+        self.fb, self.out = fb, out
+        self._inbox = queue.Queue()      # allt som ska köras i huvudloopen
+        self._status = None
+        self.running = True
+
+        self.scale = min(fb.width/LOGW, fb.height/LOGH)
+        self.canvas = FbCanvas(fb.width, fb.height, bg=CRT_BG)
+        self.layers = CanvasLayers(self.canvas, self.LAYERS)
+
+        self.draw_world()
+        self.audio.presynthesize(narration_texts(), on_progress=self._presynth_progress)
+        self.tell(self.game.look(), speak=True)
+        self.audio.start_auto_listen(self._heard_text)
+
+    # trådar lämnar över till huvudloopen i stället för till Tk
+    def _presynth_progress(self, done, total):
+        msg = f"Preparing voice… {done}/{total}" if done < total else "Voice ready."
+        self._inbox.put(lambda: self.set_status(msg))
+
+    def _heard_text(self, text):
+        self._inbox.put(lambda: self.do_cmd(text))
+
+    def _photo(self, image): return image          # FbCanvas tar PIL-bilder
+
+    def log_write(self, s): print(s + "\n", file=self.out, flush=True)
+
+    def set_status(self, s):
+        if s != self._status:
+            self._status = s; print(f"[{s}]", file=sys.stderr, flush=True)
+
+    def draw_world(self):
+        super().draw_world()
+        self.canvas.flush(self.fb)                  # bara om något ändrats
+
+    def _read_stdin(self):
+        for line in sys.stdin:
+            self._inbox.put(lambda cmd=line.strip(): cmd and self.do_cmd(cmd))
+        self._inbox.put(self.quit)                  # EOF (Ctrl-D)
+
+    def run(self):
+        threading.Thread(target=self._read_stdin, daemon=True).start()
+        next_t = time.monotonic()
+        while self.running:
+            try:
+                self._inbox.get(timeout=max(0.0, next_t - time.monotonic()))()
+            except queue.Empty:
+                self.draw_world()
+                next_t += self.TICK_S
+
+    def quit(self):
+        self.running = False
+        self.audio.stop_auto_listen()
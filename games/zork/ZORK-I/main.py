@@ -1,6 +1,18 @@
+import argparse
+
 from .app import VoxZorkApp
 
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Zork-like (Voice) – CRT")
+    ap.add_argument("--fb", nargs="?", const="", metavar="DEVICE",
+                    help="rita direkt på rambufferten ($SCRLK_FB eller /dev/fb0) i stället för Tk")
+    args = ap.parse_args(argv)
+    if args.fb is not None:
+        from scrlk.fb import Framebuffer, DEVICE
+        from .fbapp import FbZorkApp
+        with Framebuffer(args.fb or DEVICE) as fb:
+            FbZorkApp(fb).run()
+        return
     app = VoxZorkApp()
     app.root.mainloop()
 
@@ -2,17 +2,22 @@
 # -*- coding: utf-8 -*-
 
 # vox_zork.py — Zork-like mini IF with voice control + CRT UI
-import os, sys, time, math, random, threading, tempfile
+import io, os, sys, time, math, random, threading
 import tkinter as tk
 from tkinter import Canvas, END
 
 # ====== Optional audio/AI deps ======
+# delade moduler (scrlk/) ligger i repo-roten
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk import trace
+from scrlk.layers import CanvasLayers
+
 AI_OK = False
 try:
-    from openai import OpenAI
+    from scrlk.clients import get_client, warm_up
     AI_OK = bool(os.getenv("OPENAI_API_KEY"))
 except Exception:
-    OpenAI = None
+    get_client = warm_up = None
     AI_OK = False
 
 USE_AUDIO = True
@@ -20,10 +25,17 @@ try:
     import numpy as np
     import sounddevice as sd
     import soundfile as sf
-    from scipy.io.wavfile import write as wav_write
+    from scrlk.audio_io import encode
 except Exception:
     USE_AUDIO = False
 
+# VAD endpointing (webrtcvad); without it a fixed REC_SEC window is recorded
+VAD_OK = True
+try:
+    from scrlk.vad import record_utterance
+except Exception:
+    VAD_OK = False
+
 # ====== Images (Pillow) ======
 PIL_OK = True
 try:
@@ -37,8 +49,10 @@ MODEL_TTS     = "tts-1"
 VOICE_TTS     = "onyx"
 
 REC_SR        = 16000
-REC_SEC       = 4.0
-REC_CH        = 1
+REC_TIMEOUT_S = 4.0     # max wait for speech to start
+REC_HANG_MS   = 400     # trailing silence that ends a command
+REC_MAX_MS    = 8000    # longest command
+REC_SEC       = 4.0     # fixed window without webrtcvad
 
 # ====== CRT palette ======
 CRT_BG   = "#0e1a0e"
@@ -274,7 +288,8 @@ class Game:
 # ====== App (UI + Audio + AI) ======
 class VoxZorkApp:
     def __init__(self):
-        self.client = OpenAI() if AI_OK else None
+        self.client = get_client() if AI_OK else None
+        if AI_OK: warm_up()
         self.game = Game()
         self.is_speaking = False
         self.rec_lock = threading.Lock()
@@ -282,7 +297,7 @@ class VoxZorkApp:
         # image caches
         self._img_cache = {}      # path -> PIL.Image
         self._tk_cache  = {}      # (path,w,h) -> ImageTk.PhotoImage
-        self._sprite_refs = []    # keep references
+        self._sprite_refs = {}    # layer -> PhotoImages it shows (keep references)
 
         self.root = tk.Tk()
         self.root.title("Zork-like (Voice) – CRT")
@@ -301,6 +316,7 @@ class VoxZorkApp:
         top = tk.Frame(self.root, bg=CRT_BG); top.pack(expand=True, fill="both")
         self.canvas = Canvas(top, width=cw, height=ch, bg=CRT_BG, highlightthickness=0)
         self.canvas.grid(row=0, column=0, padx=12, pady=12, sticky="nsew")
+        self.layers = CanvasLayers(self.canvas, self.LAYERS)
 
         right = tk.Frame(top, bg=CRT_BG)
         right.grid(row=0, column=1, sticky="ns", pady=12, padx=(0,12))
@@ -369,39 +385,46 @@ class VoxZorkApp:
         return tkimg
 
     # ===== World drawing =====
-    def draw_world(self):
-        c = self.canvas
-        c.delete("all")
-        self._sprite_refs.clear()
+    # lager (canvas-taggar) som bara byggs om när det de visar ändrats
+    LAYERS = ("location", "scanlines", "face", "inventory", "title")
 
+    def draw_world(self):
+        L = self.layers
         # platsbild
-        self.draw_location_image()
+        L.update("location", self.game.room, self.draw_location_image)
+        # CRT-scanlines (statiska)
+        L.update("scanlines", None, self.draw_scanlines)
+        # ansikte (animerat: blinkar)
+        blink = self.face_state()
+        L.update("face", blink, lambda tags: self.draw_face(tags, blink))
+        # inventory
+        L.update("inventory", tuple(self.game.inv), self.draw_inventory_bar)
+        # rumsnamn
+        L.update("title", self.game.room, self.draw_title)
+        L.restack()
 
-        # CRT-scanlines
+    def draw_scanlines(self, tags="scanlines"):
+        c = self.canvas
         for y in range(0, LOGH, 4):
-            c.create_line(self.fx(0), self.fy(y), self.fx(LOGW), self.fy(y), fill=CRT_GRID)
+            c.create_line(self.fx(0), self.fy(y), self.fx(LOGW), self.fy(y), fill=CRT_GRID, tags=tags)
 
-        # ansikte
-        self.draw_face()
-
-        # inventory
-        self.draw_inventory_bar()
-
-        # rumsnamn
+    def draw_title(self, tags="title"):
         rname = WORLD[self.game.room]["name"]
-        c.create_text(self.fx(LOC_X + LOC_W//2), self.fy(LOC_Y - 20),
-                      text=rname, fill=CRT_FG, font=("Courier", int(16*self.scale)))
+        self.canvas.create_text(self.fx(LOC_X + LOC_W//2), self.fy(LOC_Y - 20),
+                                text=rname, fill=CRT_FG, font=("Courier", int(16*self.scale)),
+                                tags=tags)
 
-    def draw_location_image(self):
+    def draw_location_image(self, tags="location"):
         c = self.canvas
         box_w, box_h = LOC_W, LOC_H
         x0, y0 = LOC_X, LOC_Y
+        refs = self._sprite_refs[tags] = []
 
         # bakgrundsram
         lw = max(1, int(2*self.scale))
         c.create_rectangle(self.fx(x0-6), self.fy(y0-6),
                            self.fx(x0+box_w+6), self.fy(y0+box_h+6),
-                           outline=CRT_DIM, width=lw)
+                           outline=CRT_DIM, width=lw, tags=tags)
 
         # filväg
         base = ROOM_IMAGE.get(self.game.room, None)
@@ -410,32 +433,34 @@ class VoxZorkApp:
         if PIL_OK and path and os.path.exists(path):
             tkimg = self._get_tk_image(path, self.fx(box_w), self.fy(box_h))
             if tkimg:
-                img_id = c.create_image(self.fx(x0), self.fy(y0), image=tkimg, anchor="nw")
-                self._sprite_refs.append(tkimg)
+                c.create_image(self.fx(x0), self.fy(y0), image=tkimg, anchor="nw", tags=tags)
+                refs.append(tkimg)
                 return
 
         # fallback
         c.create_rectangle(self.fx(x0), self.fy(y0),
                            self.fx(x0+box_w), self.fy(y0+box_h),
-                           outline=CRT_FG, width=lw)
+                           outline=CRT_FG, width=lw, tags=tags)
         c.create_text(self.fx(x0+box_w/2), self.fy(y0+box_h/2),
-                      text="No image", fill=CRT_FG, font=("Courier", int(14*self.scale)))
+                      text="No image", fill=CRT_FG, font=("Courier", int(14*self.scale)),
+                      tags=tags)
 
-    def draw_inventory_bar(self):
+    def draw_inventory_bar(self, tags="inventory"):
         c = self.canvas
+        refs = self._sprite_refs[tags] = []
         # bakgrund
         c.create_rectangle(self.fx(0), self.fy(INV_Y), self.fx(LOGW), self.fy(LOGH),
-                           outline=CRT_DIM, fill=CRT_BG, width=1)
+                           outline=CRT_DIM, fill=CRT_BG, width=1, tags=tags)
 
         # titel
         c.create_text(self.fx(12), self.fy(INV_Y + 16),
                       text="Inventory:", anchor="w",
-                      fill=CRT_FG, font=("Courier", int(12*self.scale)))
+                      fill=CRT_FG, font=("Courier", int(12*self.scale)), tags=tags)
 
         if not self.game.inv:
             c.create_text(self.fx(120), self.fy(INV_Y + 18),
                           text="(empty)", anchor="w",
-                          fill=CRT_DIM, font=("Courier", int(12*self.scale)))
+                          fill=CRT_DIM, font=("Courier", int(12*self.scale)), tags=tags)
             return
 
         # ikoner
@@ -447,54 +472,58 @@ class VoxZorkApp:
             if PIL_OK and os.path.exists(path):
                 tkimg = self._get_tk_image(path, *size_px)
                 if tkimg:
-                    c.create_image(self.fx(x), self.fy(INV_Y + 10), image=tkimg, anchor="nw")
-                    self._sprite_refs.append(tkimg)
+                    c.create_image(self.fx(x), self.fy(INV_Y + 10), image=tkimg, anchor="nw",
+                                   tags=tags)
+                    refs.append(tkimg)
                 else:
-                    self._draw_icon_placeholder(x, INV_Y + 10, item)
+                    self._draw_icon_placeholder(x, INV_Y + 10, item, tags)
             else:
-                self._draw_icon_placeholder(x, INV_Y + 10, item)
+                self._draw_icon_placeholder(x, INV_Y + 10, item, tags)
             x += ICON_SIZE + INV_PAD
 
-    def _draw_icon_placeholder(self, lx, ly, label):
+    def _draw_icon_placeholder(self, lx, ly, label, tags="inventory"):
         c = self.canvas
         lw = max(1, int(1*self.scale))
         c.create_rectangle(self.fx(lx), self.fy(ly),
                            self.fx(lx+ICON_SIZE), self.fy(ly+ICON_SIZE),
-                           outline=CRT_FG, width=lw)
+                           outline=CRT_FG, width=lw, tags=tags)
         c.create_text(self.fx(lx+ICON_SIZE/2), self.fy(ly+ICON_SIZE/2),
-                      text=label[:4], fill=CRT_FG, font=("Courier", int(10*self.scale)))
+                      text=label[:4], fill=CRT_FG, font=("Courier", int(10*self.scale)),
+                      tags=tags)
+
+    def face_state(self):
+        """True while blinking; the face is only redrawn when this changes."""
+        return int(time.time()*2) % 6 == 0
 
-    def draw_face(self):
+    def draw_face(self, tags="face", blink=None):
         c = self.canvas
         box = (40, 60, 240, 160)
         x0,y0,x1,y1 = box
         lw = max(1, int(2*self.scale))
         c.create_rectangle(self.fx(x0), self.fy(y0), self.fx(x1), self.fy(y1),
-                           outline=CRT_FG, width=lw)
+                           outline=CRT_FG, width=lw, tags=tags)
         cx = (x0+x1)/2
         cy = (y0+y1)/2
         eye_dx = 28
         eye_h  = 14
-        blink = (int(time.time()*2) % 6 == 0)
+        if blink is None:
+            blink = self.face_state()
         if blink:
             c.create_line(self.fx(cx-eye_dx-6), self.fy(cy), self.fx(cx-eye_dx+6), self.fy(cy),
-                          fill=CRT_FG, width=lw)
+                          fill=CRT_FG, width=lw, tags=tags)
             c.create_line(self.fx(cx+eye_dx-6), self.fy(cy), self.fx(cx+eye_dx+6), self.fy(cy),
-                          fill=CRT_FG, width=lw)
+                          fill=CRT_FG, width=lw, tags=tags)
         else:
-            c.create_rectangle(self.fx(cx-eye_dx-3), self.fy(cy-eye_h), self.fy(cy+eye_h),
-                               self.fx(cx-eye_dx+3), outline=CRT_FG)  # safeguard if swapped
-            c.create_rectangle(self.fx(cx+eye_dx-3), self.fy(cy-eye_h), self.fx(cx+eye_dx+3), self.fy(cy+eye_h),
-                               outline=CRT_FG, fill=CRT_FG, width=1)
-            # fix first rectangle args (tk requires x0,y0,x1,y1); re-draw properly:
             c.create_rectangle(self.fx(cx-eye_dx-3), self.fy(cy-eye_h), self.fx(cx-eye_dx+3), self.fy(cy+eye_h),
-                               outline=CRT_FG, fill=CRT_FG, width=1)
+                               outline=CRT_FG, fill=CRT_FG, width=1, tags=tags)
+            c.create_rectangle(self.fx(cx+eye_dx-3), self.fy(cy-eye_h), self.fx(cx+eye_dx+3), self.fy(cy+eye_h),
+                               outline=CRT_FG, fill=CRT_FG, width=1, tags=tags)
         # nose ┘
-        c.create_line(self.fx(cx), self.fy(cy-8), self.fx(cx), self.fy(cy+14), fill=CRT_FG, width=lw)
-        c.create_line(self.fx(cx), self.fy(cy+14), self.fx(cx+10), self.fy(cy+14), fill=CRT_FG, width=lw)
+        c.create_line(self.fx(cx), self.fy(cy-8), self.fx(cx), self.fy(cy+14), fill=CRT_FG, width=lw, tags=tags)
+        c.create_line(self.fx(cx), self.fy(cy+14), self.fx(cx+10), self.fy(cy+14), fill=CRT_FG, width=lw, tags=tags)
         # smile
-        c.create_line(self.fx(cx-24), self.fy(cy+26), self.fx(cx), self.fy(cy+34), fill=CRT_FG, width=lw)
-        c.create_line(self.fx(cx), self.fy(cy+34), self.fx(cx+24), self.fy(cy+26), fill=CRT_FG, width=lw)
+        c.create_line(self.fx(cx-24), self.fy(cy+26), self.fx(cx), self.fy(cy+34), fill=CRT_FG, width=lw, tags=tags)
+        c.create_line(self.fx(cx), self.fy(cy+34), self.fx(cx+24), self.fy(cy+26), fill=CRT_FG, width=lw, tags=tags)
 
     def redraw_loop(self):
         self.draw_world()
@@ -507,6 +536,7 @@ class VoxZorkApp:
         def _worker():
             self.is_speaking = True
             try:
+                trace.mark(trace.TTS_REQUEST)
                 res = self.client.audio.speech.create(
                     model=MODEL_TTS, voice=VOICE_TTS, input=text, response_format="wav"
                 )
@@ -516,10 +546,11 @@ class VoxZorkApp:
                     audio_bytes = getattr(res, "content", None)
                     if audio_bytes is None:
                         audio_bytes = bytes(res)
-                tmp = os.path.join(tempfile.gettempdir(), f"tts_{int(time.time()*1000)}.wav")
-                with open(tmp,"wb") as f: f.write(audio_bytes)
-                data, sr = sf.read(tmp, dtype="float32", always_2d=False)
+                trace.mark(trace.TTS_FIRST_BYTE)
+                data, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=False)
+                trace.mark(trace.PLAYBACK_START)
                 sd.play(data, sr); sd.wait()
+                trace.mark(trace.PLAYBACK_END)
             except Exception:
                 pass
             finally:
@@ -538,20 +569,22 @@ class VoxZorkApp:
             self.rec_lock = threading.Lock()
         if not self.rec_lock.acquire(blocking=False):
             return
-        self.set_status("Listening… (~4s)")
+        self.set_status("Listening…")
         threading.Thread(target=self._record_and_transcribe, daemon=True).start()
 
     def _record_and_transcribe(self):
         try:
-            frames = int(REC_SR * REC_SEC)
-            audio = sd.rec(frames, samplerate=REC_SR, channels=REC_CH, dtype="float32")
-            sd.wait()
-            peak = float(np.max(np.abs(audio))) if audio.size else 0.0
-            if peak > 0: audio = audio / max(1.0, peak)
-            from scipy.io.wavfile import write as wav_write
-            tmp_wav = os.path.join(tempfile.gettempdir(), f"stt_{int(time.time()*1000)}.wav")
-            wav_write(tmp_wav, REC_SR, (audio * 32767).astype(np.int16))
-            text = self._transcribe(tmp_wav)
+            if VAD_OK:
+                # VAD endpointing: returns as soon as the player stops talking
+                pcm = record_utterance(timeout=REC_TIMEOUT_S, hang_ms=REC_HANG_MS,
+                                       max_ms=REC_MAX_MS, samplerate=REC_SR)
+            else:
+                pcm = sd.rec(int(REC_SR * REC_SEC), samplerate=REC_SR, channels=1, dtype="int16")
+                sd.wait()
+                pcm = pcm[:, 0]
+            text = None
+            if pcm is not None:
+                text = self._transcribe(encode(pcm, REC_SR))
             if text:
                 self.entry.delete(0, END)
                 self.entry.insert(0, text)
@@ -563,17 +596,16 @@ class VoxZorkApp:
         finally:
             self.rec_lock.release()
 
-    def _transcribe(self, path):
+    def _transcribe(self, wav):
+        # wav: in-memory file from scrlk.audio_io.encode (no tempfile)
         try:
-            with open(path, "rb") as f:
-                tr = self.client.audio.transcriptions.create(model=MODEL_WHISPER, file=f)
+            trace.mark(trace.STT_REQUEST)
+            tr = self.client.audio.transcriptions.create(model=MODEL_WHISPER, file=wav)
+            trace.mark(trace.STT_RESPONSE)
             txt = (tr.text or "").strip()
             return txt
         except Exception:
             return None
-        finally:
-            try: os.remove(path)
-            except Exception: pass
 
     # ===== Command flow =====
     def do_cmd(self, cmd):
@@ -612,5 +644,7 @@ if __name__ == "__main__":
     if not AI_OK:
         print("WARNING: OPENAI_API_KEY not set -> voice features limited to keyboard.")
     if not USE_AUDIO:
-        print("WARNING: Missing audio deps. Install: pip install openai sounddevice soundfile numpy scipy")
+        print("WARNING: Missing audio deps. Install: pip install openai sounddevice soundfile numpy")
+    elif not VAD_OK:
+        print(f"Note: webrtcvad not installed, recording fixed {REC_SEC:g} s windows. Install: pip install webrtcvad")
     VoxZorkApp().run()
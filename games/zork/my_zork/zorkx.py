@@ -1,28 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, sys, io, time, json, math, tempfile, threading, queue, hashlib
+import os, sys, io, time, json, math, threading, queue, hashlib
 import tkinter as tk
 from tkinter import Canvas
 from PIL import Image, ImageTk
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
-from scipy.io.wavfile import write as wav_write
+
+# shared modules (scrlk/) live in the repo root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scrlk.tts_stream import StreamPlayer
+from scrlk.tts_cache import get_cache
+from scrlk.stt import make_backend
+from scrlk import trace
+from scrlk.mic import MicStream
+from scrlk.aec import EchoCanceller
 
 # ================== CONFIG ==================
 GAME_RESOLUTION = (512, 342)      # Macintosh CRT
 STYLE = "pixel art, 1-bit vibe, retro macintosh, simple shapes, high contrast"
 MODEL_CHAT = "gpt-4o-mini"
-MODEL_WHISPER = "whisper-1"
+STT_BACKEND = "whisper-api"        # whisper-api | google | local | stub ($SCRLK_STT overrides)
 MODEL_TTS = "tts-1"
 VOICE_TTS = "onyx"
 MODEL_IMG = "gpt-image-1"         # DALL·E / Images API
 
 REC_SAMPLE_RATE = 16000
-REC_CHANNELS = 1
-REC_SECONDS = 4.0                  # voice window length
-LISTEN_COOLDOWN_S = 0.6            # after TTS before listening again
+REC_TIMEOUT_S = 5.0                # wait this long for speech to start
+REC_HANG_S = 0.4                   # trailing silence that ends a command
+REC_MAX_S = 8.0                    # longest command
 
 ASSET_ROOT = os.path.abspath("./assets")
 ROOM_DIR = os.path.join(ASSET_ROOT, "rooms")
@@ -35,8 +41,8 @@ if not OPENAI_KEY:
     print("ERROR: Set OPENAI_API_KEY in your environment.", file=sys.stderr)
 
 try:
-    from openai import OpenAI
-    oai = OpenAI(api_key=OPENAI_KEY)
+    from scrlk.clients import get_client, warm_up
+    oai = get_client()   # shared keep-alive pool, warmed in App.__init__
 except Exception as e:
     print("OpenAI client error:", e, file=sys.stderr)
     oai = None
@@ -116,68 +122,53 @@ def hash_text(s: str) -> str:
 class VoiceIO:
     def __init__(self):
         self.is_speaking = False
-        self.last_talk_end = 0.0
-
-    def record_wav(self, seconds=REC_SECONDS) -> str | None:
-        # block recording if we just spoke (avoid TTS feedback)
-        if time.time() - self.last_talk_end < LISTEN_COOLDOWN_S:
-            time.sleep(max(0.0, LISTEN_COOLDOWN_S - (time.time() - self.last_talk_end)))
-
+        # the narrator's own voice is subtracted from the mic (played audio
+        # as reference), so we can listen again right after speaking
+        self.aec = EchoCanceller(REC_SAMPLE_RATE)
+        self.player = StreamPlayer()
+        self.player.reference = self.aec
+        self.mic = MicStream(samplerate=REC_SAMPLE_RATE, echo_canceller=self.aec)
+        self.tts_cache = get_cache()   # repeated narrator lines play without a TTS call
+        self.stt = make_backend(STT_BACKEND, client=oai, fallback="whisper-api")
+
+    def record(self, timeout=REC_TIMEOUT_S) -> np.ndarray | None:
         try:
-            frames = int(REC_SAMPLE_RATE * seconds)
-            audio = sd.rec(frames, samplerate=REC_SAMPLE_RATE, channels=REC_CHANNELS, dtype="float32")
-            sd.wait()
+            # always-open, echo-cancelled mic; VAD ends the command
+            # as soon as the player stops talking
+            self.mic.start()
+            pcm = self.mic.listen(timeout=timeout, phrase_limit=REC_MAX_S, pause_s=REC_HANG_S)
+            if pcm is None:
+                return None
+            audio = pcm.astype(np.float32) / 32768.0
             # normalize gently
             peak = float(np.max(np.abs(audio))) if audio.size else 0.0
             if peak > 1e-6:
                 audio = audio / max(1.0, peak)
 
-            tmp = os.path.join(tempfile.gettempdir(), f"va_in_{int(time.time()*1000)}.wav")
-            wav_write(tmp, REC_SAMPLE_RATE, (audio * 32767).astype(np.int16))
-            return tmp
+            return (audio * 32767).astype(np.int16)
         except Exception as e:
             print("Record error:", e, file=sys.stderr)
             return None
 
-    def transcribe(self, wav_path: str) -> str | None:
-        if oai is None: return None
+    def transcribe(self, pcm: np.ndarray) -> str | None:
         try:
-            with open(wav_path, "rb") as f:
-                tr = oai.audio.transcriptions.create(model=MODEL_WHISPER, file=f)
-            txt = (tr.text or "").strip()
-            return txt or None
+            return self.stt.transcribe(pcm, REC_SAMPLE_RATE)
         except Exception as e:
-            print("Whisper error:", e, file=sys.stderr)
+            print(f"STT error ({self.stt.name}):", e, file=sys.stderr)
             return None
-        finally:
-            try: os.remove(wav_path)
-            except: pass
 
     def speak(self, text: str):
         if not text or oai is None: return
         def _run():
             self.is_speaking = True
             try:
-                # Request WAV (note: response_format must be "wav")
-                res = oai.audio.speech.create(model=MODEL_TTS, voice=VOICE_TTS,
-                                              input=text, response_format="wav")
-                # Get bytes
-                try:
-                    audio_bytes = res.read()
-                except AttributeError:
-                    audio_bytes = getattr(res, "content", None)
-                    if audio_bytes is None:
-                        audio_bytes = bytes(res)
-                # Play
-                with sf.SoundFile(io.BytesIO(audio_bytes)) as snd:
-                    data = snd.read(dtype="float32")
-                    sd.play(data, snd.samplerate)
-                    sd.wait()
+                # Stream PCM and start playing after the first chunk
+                self.player.speak(oai, text, model=MODEL_TTS, voice=VOICE_TTS,
+                                  cache=self.tts_cache)
             except Exception as e:
                 print("TTS error:", e, file=sys.stderr)
             finally:
                 self.is_speaking = False
-                self.last_talk_end = time.time()
         threading.Thread(target=_run, daemon=True).start()
 
 # ================== Image Generation ==================
@@ -316,12 +307,15 @@ class GameEngine:
         messages.append({"role": "user", "content": user_msg})
 
         try:
+            trace.mark(trace.LLM_REQUEST)
             resp = oai.chat.completions.create(
                 model=MODEL_CHAT,
                 messages=messages,
                 temperature=0.6,
                 max_tokens=220
             )
+            trace.mark(trace.LLM_FIRST_TOKEN)
+            trace.mark(trace.LLM_LAST_TOKEN)
             text = (resp.choices[0].message.content or "").strip()
             data = parse_json_safe(text)
             # update state
@@ -336,9 +330,11 @@ class GameEngine:
 
 # ================== Main Loop ==================
 class App:
-    def __init__(self):
+    def __init__(self, voice=None):
+        if oai is not None: warm_up()
         self.ui = CRTWindow()
-        self.voice = VoiceIO()
+        # voice: a ready VoiceIO (e.g. file source / sink player), else a new one
+        self.voice = voice or VoiceIO()
         self.img = ImageGen()
         self.game = GameEngine()
         self.running = True
@@ -390,12 +386,12 @@ class App:
                     time.sleep(0.05)
                     continue
 
-                wav = self.voice.record_wav(REC_SECONDS)
-                if not wav:
+                pcm = self.voice.record()
+                if pcm is None:
                     time.sleep(0.2)
                     continue
 
-                txt = self.voice.transcribe(wav)
+                txt = self.voice.transcribe(pcm)
                 if not txt:
                     # show soft hint, but avoid spam
                     self.ui.draw_text("…(no speech detected)")
@@ -0,0 +1,9 @@
+"""
+scrlk – shared audio/AI helpers for the Macintosh and Zork apps.
+
+The apps are plain scripts, so each one puts the repo root on sys.path
+before importing from here.
+"""
+__all__ = ["tts_stream", "tts_cache", "mic", "vad", "stt", "context", "clients",
+           "sentences", "orchestrator", "bargein", "aec", "speculate",
+           "reply_cache", "trace", "audio_io", "ws", "face", "layers", "face_atlas", "fb"]
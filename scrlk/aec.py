@@ -0,0 +1,195 @@
+"""
+Acoustic echo cancellation with the played audio as reference.
+
+Whatever the app plays is fed in with feed_reference() (the StreamPlayer
+output callback does this); every captured mic block goes through
+process(), which subtracts an adaptive estimate of how that reference
+sounds at the mic. The mic can then stay live while the app talks, so
+there is no need for "don't listen for N seconds after speaking".
+
+The filter is a partitioned-block frequency-domain NLMS (overlap-save):
+one rfft per block for the reference, one for the error, and the
+per-partition multiply/update runs as a single numpy expression over a
+(partitions, bins) array. At 16 kHz with 10 ms blocks and a 250 ms tail
+that is well under a millisecond per block.
+
+Reference and mic are paired in lockstep (like speex's echo_playback /
+echo_capture): each processed mic block consumes the same number of
+reference samples from a FIFO. The unknown output + input latency just
+shows up as delay inside the filter, so filter_ms has to cover it.
+"""
+import threading
+
+import numpy as np
+
+AEC_SR = 16000
+BLOCK = 160             # 10 ms at 16 kHz
+FILTER_MS = 250         # echo tail incl. device latency
+MU = 0.5                # NLMS step
+POWER_SMOOTH = 0.9
+REF_MAX_MS = 500        # reference backlog kept when the mic is not reading
+DT_RATIO = 4.0          # near-end this much louder than the echo estimate = double-talk
+CONVERGED_DB = 6.0
+REF_SILENCE = 1e-4      # float RMS below this: nothing playing, skip adaptation
+DIVERGED_RATIO = 4.0    # echo estimate this much louder than the mic = filter diverged
+
+
+class _Resampler:
+    """Streaming linear resampler (keeps its phase across blocks)."""
+
+    def __init__(self, src, dst):
+        self.step = src / dst
+        self.t = 0.0            # next output position, in input samples
+        self.prev = 0.0
+
+    def __call__(self, x):
+        n = len(x)
+        if self.step == 1.0 or n == 0:
+            return x
+        buf = np.concatenate(([self.prev], x))
+        count = int(np.floor((n - 1 - self.t) / self.step)) + 1 if n - 1 >= self.t else 0
+        pos = self.t + self.step * np.arange(count)
+        y = np.interp(pos + 1.0, np.arange(n + 1), buf).astype(np.float32)
+        self.t = (pos[-1] + self.step if count else self.t) - n
+        self.prev = x[-1]
+        return y
+
+
+class EchoCanceller:
+    def __init__(self, samplerate=AEC_SR, block=BLOCK, filter_ms=FILTER_MS, mu=MU,
+                 ref_max_ms=REF_MAX_MS):
+        self.samplerate = samplerate
+        self.block = block
+        self.partitions = max(1, int(np.ceil(samplerate * filter_ms / 1000 / block)))
+        self.mu = mu
+        self.ref_max = int(samplerate * ref_max_ms / 1000)
+
+        bins = block + 1
+        self.W = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self.X = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self.power = np.full(bins, 1e-6, dtype=np.float32)
+        self._x_prev = np.zeros(block, dtype=np.float32)
+
+        # stats
+        self.blocks = 0
+        self.adapted = 0
+        self.resets = 0             # divergence resets
+        self.skipped = 0            # blocks passed through, nothing playing
+        self.erle_db = 0.0          # smoothed echo return loss enhancement
+
+        self._ref = np.zeros(0, dtype=np.float32)
+        self._ref_lock = threading.Lock()
+        self._resamplers = {}
+        self._in = np.zeros(0, dtype=np.float32)
+        self._d_pow = 1e-9
+        self._e_pow = 1e-9
+        self._quiet = 0
+
+    # -------------------------
+    # reference (playback side)
+    # -------------------------
+    def feed_reference(self, samples, samplerate=None):
+        """Audio that is being played (int16 or float). Cheap; safe from an audio callback."""
+        x = np.asarray(samples)
+        x = x.astype(np.float32) / 32768.0 if x.dtype == np.int16 else x.astype(np.float32)
+        x = x.reshape(-1)
+        sr = samplerate or self.samplerate
+        if sr != self.samplerate:
+            rs = self._resamplers.get(sr)
+            if rs is None:
+                rs = self._resamplers[sr] = _Resampler(sr, self.samplerate)
+            x = rs(x)
+        with self._ref_lock:
+            ref = np.concatenate((self._ref, x))
+            self._ref = ref[-self.ref_max:]
+
+    def _take_reference(self, n):
+        with self._ref_lock:
+            x, self._ref = self._ref[:n], self._ref[n:]
+        if len(x) < n:
+            x = np.concatenate((x, np.zeros(n - len(x), dtype=np.float32)))
+        return x
+
+    def reset(self):
+        self.W[:] = 0
+        self.X[:] = 0
+        self._x_prev[:] = 0
+        with self._ref_lock:
+            self._ref = np.zeros(0, dtype=np.float32)
+
+    # -------------------------
+    # capture side
+    # -------------------------
+    def process(self, samples):
+        """
+        Echo-cancel int16 mic samples. Returns int16; output is produced
+        in whole blocks, so a call may return a few samples fewer (the
+        rest comes out with the next call).
+        """
+        d_in = np.asarray(samples, dtype=np.int16).reshape(-1).astype(np.float32) / 32768.0
+        buf = np.concatenate((self._in, d_in)) if len(self._in) else d_in
+        n = len(buf) // self.block * self.block
+        self._in = buf[n:]
+        if n == 0:
+            return np.zeros(0, dtype=np.int16)
+        out = np.empty(n, dtype=np.float32)
+        for i in range(0, n, self.block):
+            out[i:i + self.block] = self._process_block(buf[i:i + self.block])
+        return (np.clip(out, -1.0, 32767 / 32768) * 32768.0).astype(np.int16)
+
+    def _process_block(self, d):
+        N = self.block
+        x = self._take_reference(N)
+        self.blocks += 1
+        # nothing played for a whole filter length: the reference history
+        # is all zeros and so is the echo estimate, skip the FFTs (most
+        # of the time a session is listening, not talking)
+        self._quiet = 0 if x.any() else self._quiet + 1
+        if self._quiet > self.partitions + 1:
+            self.skipped += 1
+            return d
+
+        X = np.fft.rfft(np.concatenate((self._x_prev, x)))
+        self._x_prev = x
+        self.X[1:] = self.X[:-1]
+        self.X[0] = X
+
+        y = np.fft.irfft((self.X * self.W).sum(axis=0), 2 * N)[N:]
+
+        x_pow = float(np.mean(x * x))
+        d_pow = float(np.mean(d * d))
+        y_pow = float(np.mean(y * y))
+        if y_pow > DIVERGED_RATIO * d_pow + 1e-7:
+            # the echo is part of what the mic hears, so an estimate far
+            # louder than the mic is no echo: the filter adapted on the
+            # user's voice before it had converged (or there is no
+            # acoustic path at all, e.g. file input). Start over, pass
+            # the mic through unchanged.
+            self.W[:] = 0
+            self.erle_db = 0.0
+            self._d_pow = self._e_pow = 1e-9
+            self.resets += 1
+            return d
+        e = d - y
+        playing = x_pow > REF_SILENCE ** 2
+
+        # adapt only while something is playing and the user is not talking
+        # over it: once converged, a mic much louder than the echo estimate
+        # means near-end speech, which would otherwise wreck the filter
+        double_talk = self.erle_db > CONVERGED_DB and d_pow > DT_RATIO * y_pow + 1e-7
+        if playing and not double_talk:
+            e_pow = float(np.mean(e * e))
+            self._d_pow = 0.95 * self._d_pow + 0.05 * d_pow
+            self._e_pow = 0.95 * self._e_pow + 0.05 * e_pow
+            self.erle_db = 10.0 * np.log10(self._d_pow / max(self._e_pow, 1e-12))
+            self.power = POWER_SMOOTH * self.power + (1 - POWER_SMOOTH) * (X.real ** 2 + X.imag ** 2)
+            E = np.fft.rfft(np.concatenate((np.zeros(N, dtype=np.float32), e)))
+            self.W += self.mu * np.conj(self.X) * (E / (self.partitions * self.power + 1e-6))
+            # gradient constraint (each partition a causal N-tap filter),
+            # applied round-robin to one partition per block to save FFTs
+            k = self.adapted % self.partitions
+            w = np.fft.irfft(self.W[k], 2 * N)
+            w[N:] = 0
+            self.W[k] = np.fft.rfft(w)
+            self.adapted += 1
+        return e
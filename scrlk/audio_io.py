@@ -0,0 +1,341 @@
+"""
+Audio in and out without a sound card.
+
+Sources stand in for the sounddevice InputStream: MicStream(source=...)
+and VadSegmenter.start(source=...) call source.start(callback) instead
+of opening a device, and the source calls callback(int16 block) from
+its own thread, block by block, paced like a live capture:
+
+    ArraySource   int16 audio already in memory (then silence)
+    WavSource     a WAV file, mixed down and resampled to the mic rate
+    PipeSource    raw s16le mono from a binary stream (stdin, a FIFO)
+    PushSource    audio handed over with push() (a network connection)
+
+SinkPlayer is a StreamPlayer that plays to a WAV file, a raw PCM pipe
+or nowhere instead of the sound card. It takes as long as the audio
+would (speed= scales that, 0 = instantly) and feeds the echo
+canceller reference the same way, so barge-in, AEC and latency traces
+behave like with a real speaker.
+
+encode() turns int16 samples into WAV/FLAC bytes in memory, for STT
+uploads.
+"""
+import io
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from scrlk import trace
+from scrlk.tts_stream import StreamPlayer, TTS_PCM_RATE
+
+BLOCK_MS = 20
+
+
+def read_wav(path, samplerate=None):
+    """int16 mono samples of a 16-bit WAV file (resampled if samplerate is given)."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels, sr = wf.getnchannels(), wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if samplerate and samplerate != sr and len(pcm):
+        n = int(len(pcm) * samplerate / sr)
+        pcm = np.interp(np.arange(n) * sr / samplerate, np.arange(len(pcm)),
+                        pcm.astype(np.float32)).astype(np.int16)
+    return pcm
+
+
+def encode(pcm, samplerate, fmt="wav"):
+    """
+    int16 mono samples as an in-memory WAV or FLAC file, ready to upload
+    (the OpenAI client takes the extension from .name). Nothing touches
+    the filesystem. FLAC needs soundfile; about half the bytes of WAV
+    for speech, for slow uplinks.
+    """
+    pcm = np.asarray(pcm, dtype=np.int16).reshape(-1)
+    buf = io.BytesIO()
+    if fmt == "wav":
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(samplerate)
+            wf.writeframes(pcm.tobytes())
+    elif fmt == "flac":
+        import soundfile as sf  # optional dependency
+        sf.write(buf, pcm, samplerate, format="FLAC", subtype="PCM_16")
+    else:
+        raise ValueError(f"unknown audio format: {fmt!r} (wav | flac)")
+    buf.seek(0)
+    buf.name = f"utterance.{fmt}"
+    return buf
+
+
+class ArraySource:
+    """
+    Feeds `pcm` in `block_ms` blocks, then silence until stop() (like a
+    mic in a quiet room). speed > 1 feeds faster than real time, 0 as
+    fast as the consumer takes it. loop=True repeats the audio. After
+    stop(), start() carries on where it left off (push-to-talk opens and
+    closes the "device" for every command).
+    """
+
+    def __init__(self, pcm, samplerate=16000, block_ms=BLOCK_MS, speed=1.0, loop=False,
+                 silence=True):
+        self.pcm = np.asarray(pcm, dtype=np.int16).reshape(-1)
+        self.samplerate = samplerate
+        self.block = int(samplerate * block_ms / 1000)
+        self.speed = speed
+        self.loop = loop
+        self.silence = silence
+        self.fed = 0                 # samples delivered so far
+        self._stop = threading.Event()
+        self._thread = None
+        self._blocks = None
+
+    def start(self, callback):
+        if self._blocks is None:
+            self._blocks = self.blocks()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def close(self):                 # same name as the sounddevice stream
+        self.stop()
+
+    @property
+    def done(self):
+        """True once the audio itself (not the trailing silence) has been fed."""
+        return not self.loop and self.fed >= len(self.pcm)
+
+    def blocks(self):
+        """The blocks to feed; subclasses may generate them lazily."""
+        zero = np.zeros(self.block, dtype=np.int16)
+        while True:
+            for i in range(0, len(self.pcm), self.block):
+                block = self.pcm[i:i + self.block]
+                if len(block) < self.block:
+                    block = np.concatenate((block, zero[:self.block - len(block)]))
+                yield block
+            if not self.loop or not len(self.pcm):
+                break
+        while self.silence:
+            yield zero
+
+    def _run(self, callback):
+        period = self.block / self.samplerate / self.speed if self.speed else 0.0
+        t = time.perf_counter()
+        for block in self._blocks:
+            callback(block)
+            self.fed += len(block)
+            if period:
+                t += period
+                delay = t - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                elif delay < -1.0:          # fell behind (suspended?): don't burst
+                    t = time.perf_counter()
+            if self._stop.is_set():
+                break
+
+
+class WavSource(ArraySource):
+    def __init__(self, path, samplerate=16000, **kwargs):
+        super().__init__(read_wav(path, samplerate), samplerate=samplerate, **kwargs)
+        self.path = path
+
+
+class PipeSource(ArraySource):
+    """
+    Raw s16le mono at `samplerate` from a binary stream. The writer sets
+    the pace (a live pipe); speed only matters for a stream that is
+    already complete, such as a file.
+    """
+
+    def __init__(self, stream=None, samplerate=16000, block_ms=BLOCK_MS, speed=0.0):
+        super().__init__(np.zeros(0, dtype=np.int16), samplerate=samplerate,
+                         block_ms=block_ms, speed=speed, silence=False)
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.eof = False
+
+    @property
+    def done(self):
+        return self.eof
+
+    def blocks(self):
+        nbytes = 2 * self.block
+        while True:
+            data = self.stream.read(nbytes)
+            if not data:
+                self.eof = True
+                return
+            data = data[:len(data) // 2 * 2]
+            block = np.frombuffer(data, dtype=np.int16)
+            if len(block) < self.block:
+                block = np.concatenate((block, np.zeros(self.block - len(block), dtype=np.int16)))
+            yield block
+
+
+class PushSource:
+    """
+    Audio that arrives from elsewhere, e.g. frames from a network
+    terminal: push(int16 samples, any length) from any thread, and the
+    callback gets them in `block_ms` blocks from the source's own thread
+    (so echo cancellation and VAD do not run on the pusher's thread).
+    finish() marks the end of the input.
+    """
+
+    def __init__(self, samplerate=16000, block_ms=BLOCK_MS):
+        self.samplerate = samplerate
+        self.block = int(samplerate * block_ms / 1000)
+        self.fed = 0
+        self.eof = False
+        self._q = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def push(self, pcm):
+        self._q.put(np.asarray(pcm, dtype=np.int16).reshape(-1))
+
+    def finish(self):
+        self.eof = True
+        self._q.put(None)
+
+    @property
+    def done(self):
+        return self.eof and self._q.empty()
+
+    def start(self, callback):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._q.put(None)            # wake the thread
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def close(self):
+        self.stop()
+
+    def _run(self, callback):
+        pending = np.zeros(0, dtype=np.int16)
+        while not self._stop.is_set():
+            pcm = self._q.get()
+            if pcm is None:          # finish() or stop()
+                continue
+            pending = np.concatenate((pending, pcm)) if len(pending) else pcm
+            n = len(pending) // self.block * self.block
+            for i in range(0, n, self.block):
+                callback(pending[i:i + self.block])
+                self.fed += self.block
+            pending = pending[n:]
+
+
+class SinkPlayer(StreamPlayer):
+    """
+    StreamPlayer without a sound card.
+    out: None (discard), a .wav path, or a binary stream for raw s16le.
+    """
+
+    def __init__(self, out=None, samplerate=TTS_PCM_RATE, channels=1, speed=1.0,
+                 block_ms=BLOCK_MS):
+        super().__init__(samplerate=samplerate, channels=channels)
+        self.speed = speed
+        self.block_bytes = int(samplerate * block_ms / 1000) * self.frame_bytes
+        self.played_bytes = 0
+        self._out = None
+        self._wav = None
+        if isinstance(out, str):
+            self._wav = wave.open(out, "wb")
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(samplerate)
+        else:
+            self._out = out
+        self._out_lock = threading.Lock()
+
+    def play_chunks(self, chunks):
+        """Play an iterable of PCM byte chunks to the sink. Blocking."""
+        self._reset()
+        started = False
+        pending = bytearray()
+        t = time.perf_counter()
+        try:
+            for chunk in chunks:
+                if self._stop.is_set():
+                    break
+                if not chunk:
+                    continue
+                trace.mark(trace.TTS_FIRST_BYTE)
+                pending += chunk
+                if not started and len(pending) < self.jitter_bytes:
+                    continue
+                if not started:
+                    started, self.is_playing = True, True
+                    trace.mark(trace.PLAYBACK_START)
+                    t = time.perf_counter()
+                t = self._play(pending, t, whole=False)
+            if not self._stop.is_set() and pending:
+                if not started:
+                    started, self.is_playing = True, True
+                    trace.mark(trace.PLAYBACK_START)
+                    t = time.perf_counter()
+                self._play(pending, t, whole=True)
+        finally:
+            if started:
+                trace.mark(trace.PLAYBACK_END)
+            self.is_playing = False
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        return not self._stop.is_set()
+
+    def _play(self, pending, t, whole):
+        """Play whole blocks from `pending` (all of it if whole), paced. Returns the clock."""
+        n = len(pending) if whole else len(pending) // self.block_bytes * self.block_bytes
+        for i in range(0, n, self.block_bytes):
+            if self._stop.is_set():
+                break
+            block = bytes(pending[i:min(i + self.block_bytes, n)])
+            self._write(block)
+            if self.reference is not None:
+                pcm = np.frombuffer(block[:len(block) // 2 * 2], dtype=np.int16)[::self.channels]
+                self.reference.feed_reference(pcm, self.samplerate)
+            self.played_bytes += len(block)
+            if self.speed:
+                t += len(block) / self.frame_bytes / self.samplerate / self.speed
+                delay = t - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+        del pending[:n]
+        return t
+
+    def _write(self, block):
+        with self._out_lock:
+            if self._wav is not None:
+                self._wav.writeframes(block)
+            elif self._out is not None:
+                self._out.write(block)
+                flush = getattr(self._out, "flush", None)
+                if flush:
+                    flush()
+
+    def close(self):
+        with self._out_lock:
+            if self._wav is not None:
+                self._wav.close()
+                self._wav = None
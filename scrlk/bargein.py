@@ -0,0 +1,121 @@
+"""
+Barge-in: let the user talk over the app.
+
+While the app is speaking, BargeIn keeps reading the always-open
+MicStream and calls on_barge_in() as soon as the user's own speech is
+confirmed (a short run of VAD speech frames that are also clearly
+louder than the noise floor, so a stray click or the quieter echo of
+our own voice does not count). The app stops playback and cancels the
+rest of the turn from that callback; the next capture starts at
+start_pos, so the words that triggered the barge-in are not lost.
+"""
+import sys
+import threading
+
+import numpy as np
+
+try:
+    import webrtcvad
+except Exception:  # optional; energy-only detection without it
+    webrtcvad = None
+
+FRAME_MS = 20
+CONFIRM_MS = 200       # speech needed before we cut playback
+VAD_AGGR = 3           # strictest: music/echo-like audio is rarely "speech"
+LOUD_RATIO = 2.0       # x the mic threshold
+PREROLL_MS = 300
+
+
+class BargeIn:
+    def __init__(self, mic, on_barge_in, confirm_ms=CONFIRM_MS, aggressiveness=VAD_AGGR,
+                 loud_ratio=LOUD_RATIO, preroll_ms=PREROLL_MS):
+        self.mic = mic
+        self.on_barge_in = on_barge_in
+        self.frame = int(mic.samplerate * FRAME_MS / 1000)
+        self.confirm_frames = max(1, confirm_ms // FRAME_MS)
+        self.loud_ratio = loud_ratio
+        self.preroll = int(mic.samplerate * preroll_ms / 1000)
+        self.vad = None
+        if webrtcvad is not None and mic.samplerate in (8000, 16000, 32000, 48000):
+            self.vad = webrtcvad.Vad(aggressiveness)
+
+        self.start_pos = None    # ring position where the interrupting speech began
+        self.fired = 0           # barge-ins so far
+
+        self._armed = threading.Event()
+        self._lock = threading.Lock()
+        self._gen = 0            # bumped by arm()/disarm(), stale reads are dropped
+        self._pos = 0
+        self._thread = None
+
+    # -------------------------
+    # control (any thread)
+    # -------------------------
+    def arm(self):
+        """Start watching for speech (call when playback starts)."""
+        with self._lock:
+            self._gen += 1
+            self._pos = self.mic.ring.write_pos
+            self._armed.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, daemon=True)
+                self._thread.start()
+
+    def disarm(self):
+        with self._lock:
+            self._gen += 1
+            self._armed.clear()
+
+    def take_start(self):
+        """Where the next capture should begin (None = from now on)."""
+        with self._lock:
+            pos, self.start_pos = self.start_pos, None
+        return pos
+
+    # -------------------------
+    # detection
+    # -------------------------
+    def is_speech(self, frame):
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        if rms < self.mic.threshold() * self.loud_ratio:
+            return False
+        if self.vad is None:
+            return True
+        return self.vad.is_speech(frame.tobytes(), self.mic.samplerate)
+
+    def _watch(self):
+        while True:
+            self._armed.wait()
+            with self._lock:
+                gen, pos = self._gen, self._pos
+            run, onset = 0, None
+            while True:
+                end = pos + self.frame
+                if not self.mic.wait_until(end, timeout=0.2):
+                    if gen != self._gen:
+                        break
+                    continue
+                if gen != self._gen:
+                    break
+                frame = self.mic.ring.read(pos, end)
+                if len(frame) == self.frame and self.is_speech(frame):
+                    if run == 0:
+                        onset = pos
+                    run += 1
+                else:
+                    # a single quiet frame inside a word does not reset the run
+                    run = max(0, run - 1)
+                pos = end
+                if run >= self.confirm_frames:
+                    with self._lock:
+                        if gen != self._gen:
+                            break
+                        self._gen += 1
+                        self._armed.clear()
+                        self.start_pos = max(self.mic.ring.oldest_pos, onset - self.preroll)
+                        self.fired += 1
+                    try:
+                        self.on_barge_in()
+                    except Exception as e:
+                        print(f"[BARGE-IN] {e}", file=sys.stderr)
+                    break
@@ -0,0 +1 @@
+"""Benchmarks for the scrlk modules. Run as `python -m scrlk.bench.<name>`."""
@@ -0,0 +1,79 @@
+"""
+EchoCanceller convergence and cost at 16 kHz.
+
+    python -m scrlk.bench.aec_bench [--seconds 10] [--delay-ms 60]
+
+Plays synthetic speech-like audio through a simulated room (delay plus
+a decaying tail) into a noisy "mic", with a burst of near-end talk in
+the middle, and feeds both sides through the same feed_reference() /
+process() calls the StreamPlayer and MicStream use. Reports echo
+suppression per second of audio and time per 10 ms block.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from scrlk.aec import EchoCanceller, AEC_SR
+
+
+def synth(seconds, delay_ms=60.0, sr=AEC_SR, seed=0):
+    """(reference, echo, near-end talk, noise) as float arrays."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    spec = np.fft.rfft(rng.standard_normal(n))
+    spec /= 1 + np.fft.rfftfreq(n, 1 / sr) / 800.0      # speech-ish tilt
+    ref = np.fft.irfft(spec, n) * (0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2 * np.arange(n) / sr)))
+    ref *= 0.5 / np.max(np.abs(ref))
+
+    tail = int(0.08 * sr)
+    h = np.zeros(int(delay_ms * sr / 1000) + tail)
+    h[-tail:] = rng.standard_normal(tail) * np.exp(-np.arange(tail) / 300.0)
+    h *= 0.8 / np.sum(np.abs(h))
+    echo = np.convolve(ref, h)[:n]
+
+    near = np.zeros(n)
+    a, b = int(n * 0.6), int(n * 0.7)
+    t = np.arange(b - a) / sr
+    near[a:b] = 0.2 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    noise = rng.standard_normal(n) * 0.001
+    return ref, echo, near, noise
+
+
+def run(seconds=10.0, delay_ms=60.0):
+    ref, echo, near, noise = synth(seconds, delay_ms)
+    to16 = lambda x: (np.clip(x, -1, 1) * 32767).astype(np.int16)
+    ref16, mic16 = to16(ref), to16(echo + near + noise)
+
+    aec = EchoCanceller()
+    block = 320                                   # one 20 ms capture block
+    out = []
+    t0 = time.perf_counter()
+    for i in range(0, len(mic16), block):
+        aec.feed_reference(ref16[i:i + block])
+        out.append(aec.process(mic16[i:i + block]))
+    elapsed = time.perf_counter() - t0
+    out = np.concatenate(out).astype(np.float64) / 32768.0
+
+    print(f"audio            : {seconds:.1f} s @ {AEC_SR} Hz, echo delay {delay_ms:.0f} ms")
+    print(f"filter           : {aec.partitions} x {aec.block} taps "
+          f"({aec.partitions * aec.block / AEC_SR * 1000:.0f} ms)")
+    print(f"per block        : {elapsed / aec.blocks * 1e6:.0f} us "
+          f"({elapsed / seconds * 100:.1f}% of one core)")
+    print(f"adapted blocks   : {aec.adapted} / {aec.blocks}")
+    print(f"filter resets    : {aec.resets}")
+    sr = AEC_SR
+    for s in range(int(seconds)):
+        sl = slice(s * sr, (s + 1) * sr)
+        residual = out[sl] - near[sl] - noise[sl]
+        erle = 10 * np.log10(np.mean(echo[sl] ** 2) / max(np.mean(residual ** 2), 1e-12))
+        talk = "  (near-end talk)" if np.any(near[sl]) else ""
+        print(f"  {s:2d}-{s + 1:2d} s        : echo -{erle:.1f} dB{talk}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--delay-ms", type=float, default=60.0)
+    args = ap.parse_args()
+    run(args.seconds, args.delay_ms)
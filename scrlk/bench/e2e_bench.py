@@ -0,0 +1,332 @@
+"""
+End-to-end voice turns through the real apps, offline.
+
+    python -m scrlk.bench.e2e_bench [--apps scrlk-ai,live-eq2,headless,zork-i,zorkx]
+                                    [--turns 6] [--wav a.wav --wav b.wav ...]
+                                    [--latency-ms 250] [--play-speed 4]
+
+Starts scrlk.bench.fake_openai in this process and runs each app in a
+child process pointed at it (OPENAI_BASE_URL), with:
+
+  - scrlk.bench.headless_tk in place of tkinter, so the Tk apps run
+    their normal event loop without a display;
+  - a turn-gated audio source in place of the microphone: it says the
+    next utterance once the app has answered the previous one
+    (utterance k is the fake server's transcript k, see
+    fake_openai.utterance_pcm), or the --wav files in turn;
+  - scrlk.audio_io.SinkPlayer in place of the sound card, playing
+    --play-speed times faster than real time (the playback stage is
+    shortened by that factor, everything else is wall-clock);
+  - its own SCRLK_TRACE file and an empty TTS cache.
+
+Per app it reports the scrlk.trace stage latencies (p50/p95), turns
+per minute and the requests the app made to the fake server.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+APPS = ("scrlk-ai", "live-eq2", "headless", "zork-i", "zorkx")
+TURNS = 6
+PLAY_SPEED = 4.0
+GAP_S = 0.8                # app silent this long = done answering
+TURN_TIMEOUT_S = 30.0      # no answer within this: say the next one anyway
+STAGES = ("response", "stt", "llm_first_token", "llm_total", "tts_first_byte", "playback")
+RESULT = "E2E-RESULT "
+ZORK_TRANSCRIPTS = ("look", "open mailbox", "north", "take lamp", "inventory", "south")
+
+
+# -------------------------
+# child: audio in / out
+# -------------------------
+def turn_source(utterances, player, samplerate=16000, gap_s=GAP_S,
+                turn_timeout_s=TURN_TIMEOUT_S):
+    from scrlk.audio_io import ArraySource
+
+    class TurnSource(ArraySource):
+        """Says utterances[i] once the app has finished answering (or timed out)."""
+
+        def __init__(self):
+            super().__init__(np.zeros(0, dtype=np.int16), samplerate=samplerate)
+            self.said = []               # wall-clock time each utterance ended
+            self.answered = 0
+            self.finished = False
+            self._seen = 0               # player.played_bytes when the last utterance ended
+            self._bytes = 0
+            self._changed = time.monotonic()
+
+        def idle(self):
+            """The app has spoken since the last utterance and gone quiet."""
+            now = time.monotonic()
+            if player.played_bytes != self._bytes:
+                self._bytes, self._changed = player.played_bytes, now
+            quiet = not player.is_playing and now - self._changed >= gap_s
+            return quiet and player.played_bytes > self._seen
+
+        def blocks(self):
+            zero = np.zeros(self.block, dtype=np.int16)
+            for pcm in utterances:
+                waited = time.monotonic()
+                while not self.idle() and time.monotonic() - waited < turn_timeout_s:
+                    yield zero
+                if self.said and self.idle():
+                    self.answered += 1
+                for i in range(0, len(pcm), self.block):
+                    block = pcm[i:i + self.block]
+                    if len(block) < self.block:
+                        block = np.concatenate((block, zero[:self.block - len(block)]))
+                    yield block
+                self.said.append(time.time())
+                self._seen = player.played_bytes
+            self.finished = True
+            while True:
+                yield zero
+
+    return TurnSource()
+
+
+def _load(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _load_package(path, name):
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+# -------------------------
+# child: one function per app, returns stop()
+# -------------------------
+def start_scrlk_ai(source, sink):
+    mod = _load(os.path.join(ROOT, "chatmac-AI", "cloud", "scrlk-ai.py"), "scrlk_ai")
+    app = mod.MacintoshAI()
+    sink.reference = app.aec
+    app.player = sink
+    app.orchestrator.stop_speaking = sink.stop
+    app.mic.source = source
+    threading.Thread(target=lambda: asyncio.run(app.main()), daemon=True).start()
+    return app.orchestrator.stop
+
+
+def start_live_eq2(source, sink):
+    sys.path.insert(0, os.path.join(ROOT, "chatmac-AI", "cloud"))
+    mod = _load(os.path.join(ROOT, "chatmac-AI", "cloud", "macintosh_live_eq2.py"),
+                "macintosh_live_eq2")
+    sink.reference = mod.aec
+    mod.player = sink            # speak()/stop_speaking() look the global up per call
+    mod.mic.source = source
+    app = mod.App()
+    threading.Thread(target=app.run, daemon=True).start()
+    return app.face.root.destroy
+
+
+def start_headless(source, sink):
+    mod = _load(os.path.join(ROOT, "chatmac-AI", "cloud", "tools", "macintosh_headless.py"),
+                "macintosh_headless")
+    app = mod.HeadlessMacintosh(source=source, player=sink)
+    threading.Thread(target=app.run, daemon=True).start()
+    return app.stop
+
+
+def start_zork_i(source, sink):
+    _load_package(os.path.join(ROOT, "games", "zork", "ZORK-I"), "zork_i")
+    from zork_i.audio import AudioIO
+    from zork_i.app import VoxZorkApp
+    audio = AudioIO()
+    sink.reference = audio.aec
+    audio.player = sink
+    audio.source = source
+    app = VoxZorkApp(audio=audio)
+    threading.Thread(target=app.root.mainloop, daemon=True).start()
+    return app.quit
+
+
+def start_zorkx(source, sink, workdir):
+    os.chdir(workdir)            # zorkx keeps its generated art in ./assets
+    mod = _load(os.path.join(ROOT, "games", "zork", "my_zork", "zorkx.py"), "zorkx")
+    voice = mod.VoiceIO()
+    sink.reference = voice.aec
+    voice.player = sink
+    voice.mic.source = source
+    threading.Thread(target=lambda: mod.App(voice=voice), daemon=True).start()
+    return lambda: None
+
+
+def child(args):
+    sys.argv[0] = args.child     # the app name in the trace records
+    from scrlk.bench import headless_tk
+    headless_tk.install()
+    from scrlk import trace
+    from scrlk.audio_io import SinkPlayer, read_wav
+    from scrlk.bench.fake_openai import utterance_pcm
+
+    if args.wav:
+        utterances = [read_wav(p, 16000) for p in args.wav]
+        utterances = [utterances[i % len(utterances)] for i in range(args.turns)]
+    else:
+        utterances = [utterance_pcm(i) for i in range(args.turns)]
+    out = os.path.join(args.workdir, "out.wav") if args.keep_audio else None
+    sink = SinkPlayer(out, speed=args.play_speed)
+    source = turn_source(utterances, sink)
+
+    t0 = time.time()
+    if args.child == "zorkx":
+        stop = start_zorkx(source, sink, args.workdir)
+    else:
+        stop = {"scrlk-ai": start_scrlk_ai, "live-eq2": start_live_eq2,
+                "headless": start_headless, "zork-i": start_zork_i}[args.child](source, sink)
+
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        if source.finished and source.idle():
+            source.answered += 1
+            break
+        time.sleep(0.05)
+    t_end = time.time()
+    stop()
+    sink.stop()
+    sink.close()
+    trace.end()
+
+    records = trace.load([os.environ[trace.TRACE_ENV]])
+    first = source.said[0] if source.said else t_end
+    print(RESULT + json.dumps({
+        "app": args.child,
+        "turns": len(source.said),
+        "answered": source.answered,
+        "startup_s": round(first - t0, 2),
+        "elapsed_s": round(t_end - first, 2),
+        "played_s": round(sink.played_bytes / sink.frame_bytes / sink.samplerate, 2),
+        "records": records,
+    }), flush=True)
+    os._exit(0)                  # app threads (Tk loops, listeners) are daemons anyway
+
+
+# -------------------------
+# parent: fake server + report
+# -------------------------
+def run_app(app, fake, args):
+    workdir = tempfile.mkdtemp(prefix=f"scrlk-e2e-{app}-")
+    env = dict(os.environ,
+               OPENAI_BASE_URL=fake.base_url, OPENAI_API_KEY="fake",
+               SCRLK_STT="whisper-api",
+               SCRLK_TRACE=os.path.join(workdir, "turns.jsonl"),
+               SCRLK_TTS_CACHE=os.path.join(workdir, "tts"),
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    cmd = [sys.executable, "-m", "scrlk.bench.e2e_bench", "--child", app,
+           "--workdir", workdir, "--turns", str(args.turns),
+           "--play-speed", str(args.play_speed), "--timeout", str(args.timeout)]
+    for path in args.wav or ():
+        cmd += ["--wav", os.path.abspath(path)]
+    if args.keep_audio:
+        cmd.append("--keep-audio")
+
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True,
+                              timeout=args.timeout + 120)
+        output = proc.stdout
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout.decode() if isinstance(e.stdout, bytes) else (e.stdout or "")
+        proc = None
+    requests = dict(fake.requests)
+
+    result = None
+    for line in output.splitlines():
+        if line.startswith(RESULT):
+            result = json.loads(line[len(RESULT):])
+    if result is None:
+        print(f"{app}: no result", file=sys.stderr)
+        if proc is not None:
+            print(proc.stderr[-2000:], file=sys.stderr)
+    elif args.verbose and proc is not None:
+        print(proc.stdout + proc.stderr, file=sys.stderr)
+    if args.keep_audio:
+        print(f"{app}: kept {workdir}", file=sys.stderr)
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result, requests
+
+
+def report(app, result, requests):
+    from scrlk.trace import percentile
+    print(f"== {app}")
+    if result is None:
+        print("failed           : see stderr")
+        return
+    records = result["records"]
+    print(f"turns            : {result['answered']}/{result['turns']} answered, "
+          f"{len(records)} traced")
+    print(f"startup          : {result['startup_s']:.1f} s to the first utterance")
+    rate = result["answered"] / result["elapsed_s"] * 60 if result["elapsed_s"] else 0.0
+    print(f"throughput       : {rate:.1f} turns/min ({result['elapsed_s']:.1f} s, "
+          f"{result['played_s']:.1f} s of reply audio)")
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in records if stage in r.get("stages", {})]
+        if values:
+            print(f"{stage:<17}: p50 {percentile(values, 50):6.0f} ms   "
+                  f"p95 {percentile(values, 95):6.0f} ms   (n={len(values)})")
+    print("requests         : " + (", ".join(f"{k} {v}" for k, v in sorted(requests.items()))
+                                   or "none"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--apps", default=",".join(APPS), help="comma-separated: " + ", ".join(APPS))
+    ap.add_argument("--turns", type=int, default=TURNS)
+    ap.add_argument("--wav", action="append",
+                    help="16-bit WAV to say instead of synthetic utterances (repeatable, cycled)")
+    ap.add_argument("--latency-ms", type=float, default=None, help="fake server time to first byte")
+    ap.add_argument("--token-ms", type=float, default=None)
+    ap.add_argument("--tts-speed", type=float, default=None)
+    ap.add_argument("--play-speed", type=float, default=PLAY_SPEED,
+                    help="reply playback speed-up (0 = instant)")
+    ap.add_argument("--timeout", type=float, default=180.0, help="per app, seconds")
+    ap.add_argument("--keep-audio", action="store_true",
+                    help="write each app's reply audio to a WAV and keep its work dir")
+    ap.add_argument("--verbose", action="store_true", help="show the apps' own output")
+    ap.add_argument("--child", choices=APPS, help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        return child(args)
+
+    from scrlk.bench import fake_openai
+    kwargs = {k: v for k, v in (("latency_ms", args.latency_ms), ("token_ms", args.token_ms),
+                                ("tts_speed", args.tts_speed)) if v is not None}
+    for app in args.apps.split(","):
+        app = app.strip()
+        if app not in APPS:
+            ap.error(f"unknown app {app!r}")
+        # one server per app, so the Zork games get commands and the chat apps chat
+        transcripts = ZORK_TRANSCRIPTS if app.startswith("zork") else fake_openai.TRANSCRIPTS
+        fake = fake_openai.FakeOpenAI(transcripts=transcripts, **kwargs).start()
+        try:
+            result, requests = run_app(app, fake, args)
+        finally:
+            fake.stop()
+        report(app, result, requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Macintosh face redraw cost: delete("all"), retained canvas items, sprites.
+
+    python -m scrlk.bench.face_bench [--frames 400] [--size 1280x560]
+
+Animates each face style in scrlk.face for --frames frames of the apps'
+50 ms loop and times three ways of getting the frame onto a Canvas:
+
+    immediate   canvas.delete("all") and create every part again (the
+                apps' old draw functions)
+    retained    scrlk.face.CanvasFace: create once, then coords()/
+                itemconfig() for the parts that changed
+    atlas       scrlk.face_atlas.SpriteFace: one pre-rendered image,
+                swapped with itemconfig(image=) when the state changes
+                (the baking is reported separately: frames, memory, ms)
+
+Two scripts: "idle" (blinks only, the kiosk waiting) and "talk"
+(mouth moving every frame, eyes wandering). With a display the frames
+go to a real Tk canvas and are flushed with update_idletasks(), so the
+time includes Tk's own redraw; without one they go to a stand-in canvas
+that only counts calls, and the time is the Python side alone.
+"""
+import argparse
+import itertools
+import math
+import time
+import types
+
+from scrlk.face import CanvasFace, DRAW, STYLES, HAPPY_BG
+from scrlk.face_atlas import FaceAtlas, SpriteFace, PIL_OK
+
+FRAME_MS = 50
+
+
+class _CountingCanvas:
+    """Canvas stand-in: counts calls, hands out item ids, draws nothing."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+            return next(self._ids) if name.startswith("create_") else None
+        return call
+
+
+class _Immediate:
+    """The old way: every frame deletes everything and creates it again."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.calls = 0
+
+    def frame_begin(self):
+        self.canvas.delete("all")
+        self.calls += 1
+
+    def configure(self, **options):
+        self.canvas.configure(**options)
+        self.calls += 1
+
+    def _create(self, kind, coords, options):
+        getattr(self.canvas, "create_" + kind)(*coords, **options)
+        self.calls += 1
+
+    def polygon(self, key, coords, **options): self._create("polygon", coords, options)
+    def rectangle(self, key, coords, **options): self._create("rectangle", coords, options)
+    def oval(self, key, coords, **options): self._create("oval", coords, options)
+    def line(self, key, coords, **options): self._create("line", coords, options)
+    def arc(self, key, coords, **options): self._create("arc", coords, options)
+
+
+def face_state(i, script):
+    """The animation state of frame i, with the attributes of all three apps."""
+    t = i * FRAME_MS / 1000.0
+    talk = script == "talk"
+    mouth = (0.5 + 0.5 * math.sin(t * 10.0)) if talk else 0.0
+    blink = (i % 80) < 3                        # a blink every 4 s, 150 ms long
+    gaze = 8.0 * math.sin(t * 0.7) if talk else 0.0
+    return types.SimpleNamespace(
+        head_tilt=gaze / 3, eye_offset_x=gaze, eye_offset_y=gaze / 2,
+        # scrlk_gpt
+        mood="speaking" if talk else "idle", blink_active=blink, wink_active=False,
+        is_speaking=talk, mouth_open_amount=mouth, expression_smile=0.5,
+        # scrlk-ai
+        mouth_open=mouth,
+        # live_eq2
+        is_listening=not talk, blink_progress=0.85 if blink else 0.0, wink_left=False,
+        is_smiling=0.5)
+
+
+def run_one(style, painter_cls, canvas, width, height, frames, script, flush):
+    canvas.delete("all")
+    painter = painter_cls(canvas)
+    draw = DRAW[style]
+    t0 = time.perf_counter()
+    for i in range(frames):
+        state = face_state(i, script)
+        if isinstance(painter, CanvasFace):
+            painter.begin()
+        else:
+            painter.frame_begin()
+        if style == "happy":
+            painter.configure(bg=HAPPY_BG)
+        draw(painter, width, height, state)
+        if isinstance(painter, CanvasFace):
+            painter.end()
+        flush()
+    elapsed = time.perf_counter() - t0
+    return elapsed / frames * 1000.0, painter.calls / frames
+
+
+def _bg(style):
+    return HAPPY_BG if style == "happy" else "#1a1a1a"
+
+
+def run_atlas(style, canvas, width, height, frames, script, flush, photo):
+    canvas.delete("all")
+    bg = _bg(style)
+    view = SpriteFace(canvas, style, width, height, bg, sprites=False, photo=photo)
+    view.atlas = FaceAtlas.build(style, width, height, bg)
+    t0 = time.perf_counter()
+    for i in range(frames):
+        view.draw(face_state(i, script))
+        flush()
+    elapsed = time.perf_counter() - t0
+    return elapsed / frames * 1000.0, view.calls / frames
+
+
+def open_canvas(width, height):
+    """(canvas, flush, photo, description): a real Tk canvas if there is a display."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        canvas = tk.Canvas(root, width=width, height=height, bg="#1a1a1a", highlightthickness=0)
+        canvas.pack()
+        root.update()
+        return (canvas, root.update_idletasks, None,
+                f"tk {tk.TkVersion} (Python + Tk redraw)")
+    except Exception as e:
+        reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+        return (_CountingCanvas(), (lambda: None), (lambda image: image),
+                f"none ({reason}): Python side only")
+
+
+def run(frames=400, width=1280, height=560, styles=STYLES):
+    canvas, flush, photo, desc = open_canvas(width, height)
+    print(f"canvas           : {desc}")
+    print(f"frames           : {frames} x {FRAME_MS} ms loop, {width}x{height}")
+    for style in styles:
+        if PIL_OK:
+            t0 = time.perf_counter()
+            atlas = FaceAtlas.build(style, width, height, _bg(style))
+            fw, fh = atlas.frame_size
+            print(f"{style:5s} atlas      : {len(atlas.keys)} frames of {fw}x{fh}, "
+                  f"{atlas.nbytes / 1e6:.1f} MB, baked in "
+                  f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+        for script in ("idle", "talk"):
+            old_ms, old_calls = run_one(style, _Immediate, canvas, width, height,
+                                        frames, script, flush)
+            new_ms, new_calls = run_one(style, CanvasFace, canvas, width, height,
+                                        frames, script, flush)
+            print(f"{style:5s} {script:4s}       : immediate {old_ms:6.3f} ms/frame "
+                  f"({old_calls:4.1f} calls)   retained {new_ms:6.3f} ms/frame "
+                  f"({new_calls:4.1f} calls)   x{old_ms / max(new_ms, 1e-9):.1f}", end="")
+            if PIL_OK:
+                sp_ms, sp_calls = run_atlas(style, canvas, width, height, frames, script,
+                                            flush, photo)
+                print(f"   atlas {sp_ms:6.3f} ms/frame ({sp_calls:4.1f} calls)", end="")
+            print()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=400)
+    ap.add_argument("--size", default="1280x560", help="canvas WxH")
+    ap.add_argument("--style", choices=STYLES, action="append",
+                    help="only this style (repeatable)")
+    args = ap.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    run(args.frames, w, h, tuple(args.style or STYLES))
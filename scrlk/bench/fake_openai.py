@@ -0,0 +1,335 @@
+"""
+Local stand-in for the OpenAI endpoints the apps use.
+
+    python -m scrlk.bench.fake_openai [--port 8765] [--latency-ms 300]
+
+then run an app with
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake
+
+Serves, with configurable latency and no network:
+    POST /v1/chat/completions        canned reply, streamed as SSE when asked
+    POST /v1/audio/transcriptions    scripted transcripts: utterance k made by
+                                     utterance_pcm(k) is heard as transcripts[k],
+                                     anything else gets the next one in order
+    POST /v1/audio/speech            synthetic 24 kHz PCM (or WAV), streamed
+                                     at tts_speed x real time
+    POST /v1/images/generations      a plain PNG of the requested size
+    GET  /v1/models/<id>             (connection warm-up)
+
+A chat request whose system prompt asks for JSON (the zorkx game
+master) gets a small game-state JSON object instead of prose.
+"""
+import argparse
+import base64
+import io
+import json
+import re
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
+LATENCY_MS = 250           # time to first byte, every endpoint
+TOKEN_MS = 15              # between streamed chat tokens
+STT_MS = 350               # extra transcription time
+TTS_SPEED = 4.0            # speech audio is sent this many times faster than real time
+TTS_SR = 24000
+TTS_CHAR_MS = 65           # synthetic speech length per character
+CHUNK_BYTES = 4096
+
+CHAT_REPLY = ("Jag hör dig. Det låter som en lugn stund just nu. "
+              "Berätta gärna mer om hur du har det.")
+JSON_REPLY = {
+    "scene": "You stand west of a white house with a boarded front door.",
+    "say": "A small mailbox waits here.",
+    "items": ["mailbox"],
+    "inventory": [],
+    "room_key": "white_house_exterior",
+    "notes": "fake",
+}
+TRANSCRIPTS = ("hej", "hur mår du", "tack")
+TONE_HZ = 200              # utterance k is voiced at TONE_HZ + k * TONE_STEP
+TONE_STEP = 40
+
+# 1x1 black PNG, used when PIL is missing
+_PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNgYGD4DwABBAEAwS2OUAAAAABJRU5ErkJggg==")
+
+
+def speech_pcm(text, samplerate=TTS_SR, char_ms=TTS_CHAR_MS):
+    """Voiced-sounding int16 PCM, as long as `text` would take to say."""
+    n = int(samplerate * min(12.0, max(0.3, len(text) * char_ms / 1000.0)))
+    t = np.arange(n) / samplerate
+    x = 0.25 * np.sin(2 * np.pi * 160 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    return (x * 32767).astype(np.int16).tobytes()
+
+
+def utterance_pcm(k, seconds=1.0, samplerate=16000):
+    """
+    A stand-in for the user saying transcripts[k]: a voiced burst whose
+    pitch encodes k, so a partial of it transcribes the same as the whole
+    (speculative STT sees the same text the final pass does).
+    """
+    n = int(samplerate * seconds)
+    t = np.arange(n) / samplerate
+    f0 = TONE_HZ + k * TONE_STEP
+    x = np.sin(2 * np.pi * f0 * t) + 0.3 * np.sin(4 * np.pi * f0 * t)
+    x *= 0.3 * (0.7 + 0.3 * np.sin(2 * np.pi * 4 * t)) * np.minimum(1.0, np.minimum(t, t[::-1]) / 0.03)
+    x += np.random.default_rng(k).normal(0, 0.02, n)     # breath, so the VAD calls it speech
+    return (np.clip(x, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def tone_index(wav):
+    """k for audio made by utterance_pcm(k), else None."""
+    try:
+        with wave.open(io.BytesIO(wav), "rb") as wf:
+            sr = wf.getframerate()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    except (wave.Error, EOFError):
+        return None
+    if len(pcm) < sr // 10:
+        return None
+    spectrum = np.abs(np.fft.rfft(pcm.astype(np.float32)))
+    f0 = np.argmax(spectrum[1:]) + 1
+    f0 = f0 * sr / len(pcm)
+    k = round((f0 - TONE_HZ) / TONE_STEP)
+    if k < 0 or abs(f0 - (TONE_HZ + k * TONE_STEP)) > TONE_STEP / 4:
+        return None
+    return k
+
+
+def wav_bytes(pcm, samplerate=TTS_SR):
+    hdr = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    hdr += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, samplerate, samplerate * 2, 2, 16)
+    return hdr + b"data" + struct.pack("<I", len(pcm)) + pcm
+
+
+def png_bytes(size):
+    m = re.match(r"(\d+)x(\d+)", size or "")
+    w, h = (int(m.group(1)), int(m.group(2))) if m else (256, 256)
+    if Image is None:
+        return _PNG_1X1
+    buf = io.BytesIO()
+    Image.new("RGBA", (w, h), (40, 40, 40, 255)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):   # clients hanging up is normal
+            super().handle_error(request, client_address)
+
+
+class FakeOpenAI:
+    """The server; start() runs it on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=LATENCY_MS, token_ms=TOKEN_MS,
+                 stt_ms=STT_MS, tts_speed=TTS_SPEED, chat_reply=CHAT_REPLY,
+                 json_reply=JSON_REPLY, transcripts=TRANSCRIPTS):
+        self.latency_s = latency_ms / 1000.0
+        self.token_s = token_ms / 1000.0
+        self.stt_s = stt_ms / 1000.0
+        self.tts_speed = tts_speed
+        self.chat_reply = chat_reply
+        self.json_reply = json_reply
+        self.transcripts = list(transcripts)
+
+        self.requests = {}           # endpoint -> count
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+        self._stt_calls = 0
+
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self.httpd = _Server((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, endpoint, nbytes=0):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_out += nbytes
+
+    def next_transcript(self, audio=None):
+        k = tone_index(audio) if audio else None
+        if k is not None and self.transcripts:
+            return self.transcripts[k % len(self.transcripts)]
+        with self._lock:
+            text = self.transcripts[self._stt_calls % len(self.transcripts)] \
+                if self.transcripts else ""
+            self._stt_calls += 1
+        return text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive, like the real API
+    fake = None
+
+    def log_message(self, fmt, *args):  # quiet
+        pass
+
+    # -------------------------
+    # plumbing
+    # -------------------------
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _send(self, status, body, ctype="application/json"):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _send_chunked(self, chunks, ctype):
+        """Transfer-Encoding: chunked, each item flushed as it is produced."""
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        total = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+            total += len(chunk)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        return total
+
+    def do_GET(self):
+        fake = self.fake
+        time.sleep(fake.latency_s)
+        if self.path.startswith("/v1/models"):
+            model = self.path.rsplit("/", 1)[-1]
+            fake.count("models", self._send(200, {"id": model, "object": "model",
+                                                  "created": 0, "owned_by": "fake"}))
+        else:
+            self._send(404, {"error": {"message": f"no route {self.path}"}})
+
+    def do_POST(self):
+        fake = self.fake
+        body = self._body()
+        time.sleep(fake.latency_s)
+        path = self.path.split("?")[0]
+        try:
+            if path == "/v1/chat/completions":
+                n = self._chat(json.loads(body or b"{}"))
+                fake.count("chat", n)
+            elif path == "/v1/audio/transcriptions":
+                time.sleep(fake.stt_s)
+                start = body.find(b"RIFF")
+                text = fake.next_transcript(body[start:] if start >= 0 else None)
+                fake.count("transcriptions", self._send(200, {"text": text}))
+            elif path == "/v1/audio/speech":
+                fake.count("speech", self._speech(json.loads(body or b"{}")))
+            elif path == "/v1/images/generations":
+                req = json.loads(body or b"{}")
+                b64 = base64.b64encode(png_bytes(req.get("size"))).decode()
+                fake.count("images", self._send(200, {"created": int(time.time()),
+                                                      "data": [{"b64_json": b64}]}))
+            else:
+                self._send(404, {"error": {"message": f"no route {path}"}})
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # client hung up (barge-in, cancelled stream)
+
+    # -------------------------
+    # endpoints
+    # -------------------------
+    def _chat(self, req):
+        fake = self.fake
+        model = req.get("model", "gpt-4o-mini")
+        system = " ".join(m.get("content", "") for m in req.get("messages", [])
+                          if m.get("role") == "system" and isinstance(m.get("content"), str))
+        text = json.dumps(fake.json_reply) if "JSON" in system else fake.chat_reply
+        created = int(time.time())
+        if not req.get("stream"):
+            return self._send(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created,
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        def events():
+            def chunk(delta, finish=None):
+                data = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                        "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                return f"data: {json.dumps(data)}\n\n".encode("utf-8")
+            yield chunk({"role": "assistant", "content": ""})
+            for token in re.findall(r"\S+\s*", text):
+                time.sleep(fake.token_s)
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            yield b"data: [DONE]\n\n"
+        return self._send_chunked(events(), "text/event-stream")
+
+    def _speech(self, req):
+        fake = self.fake
+        pcm = speech_pcm(req.get("input", ""))
+        if req.get("response_format") == "wav":
+            pcm = wav_bytes(pcm)
+        # bytes per second of audio, sped up
+        rate = TTS_SR * 2 * fake.tts_speed
+
+        def chunks():
+            t = time.perf_counter()
+            for i in range(0, len(pcm), CHUNK_BYTES):
+                chunk = pcm[i:i + CHUNK_BYTES]
+                yield chunk
+                if fake.tts_speed:
+                    t += len(chunk) / rate
+                    delay = t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        return self._send_chunked(chunks(), "application/octet-stream")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    ap.add_argument("--token-ms", type=float, default=TOKEN_MS)
+    ap.add_argument("--stt-ms", type=float, default=STT_MS)
+    ap.add_argument("--tts-speed", type=float, default=TTS_SPEED)
+    ap.add_argument("--transcripts", default="|".join(TRANSCRIPTS),
+                    help='scripted STT results, e.g. "hej|hur mår du|tack"')
+    args = ap.parse_args()
+    fake = FakeOpenAI(args.host, args.port, args.latency_ms, args.token_ms, args.stt_ms,
+                      args.tts_speed, transcripts=args.transcripts.split("|"))
+    print(f"export OPENAI_BASE_URL={fake.base_url} OPENAI_API_KEY=fake")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
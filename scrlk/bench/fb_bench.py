@@ -0,0 +1,173 @@
+"""
+Framebuffer backend cost: G2 packing, face and Zork frames on scrlk.fb.
+
+    python -m scrlk.bench.fb_bench [--frames 400] [--fb /dev/fb0]
+
+Runs against a file-backed fake framebuffer (Framebuffer.fake, 512x342
+at 16 bpp, the layout of the Macintosh CRT), or a real one with --fb.
+
+    pack    one 1-bit frame to G2-only RGB565 pixels in the mapping:
+            scrlk.fb.pack_g2 (numpy) vs a per-pixel loop like
+            PI4/frame-buffer/fb_mono_g2.c written in Python
+    face    the live_eq2 face (SpriteFace on an FbCanvas), idle and
+            talking in turns, every 50 ms
+    zork    ZORK-I's CRT canvas (FbZorkApp) on the 250 ms redraw tick,
+            Macintosh talking half the time, a command every 10 s
+
+The face and Zork frames are rendered once (that CPU is reported per
+tick) and then replayed into the framebuffer with each way of writing
+them: the whole frame, changed rows, changed tiles, and changed tiles
+with page flipping. Reported per frame shown: bytes written to the
+framebuffer and the CPU time of show().
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+import types
+
+import numpy as np
+
+from scrlk.fb import Framebuffer, FbCanvas, pack_g2, to_bits, G2, TILE, WIDTH, HEIGHT
+from scrlk.face_atlas import SpriteFace, FaceAtlas
+from scrlk.bench.face_bench import face_state
+
+
+def bench_pack(fb, frames):
+    rng = np.random.default_rng(0)
+    bits = rng.random((fb.height, fb.width)) < 0.5
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        pack_g2(bits, out=fb.pixels)
+    vec_ms = (time.perf_counter() - t0) / frames * 1000.0
+
+    rows = 8                                  # the loop is slow: time a strip
+    mm, stride = fb.mm, fb.stride
+    t0 = time.perf_counter()
+    for y in range(rows):
+        for x in range(fb.width):
+            pixel = G2 if bits[y, x] else 0
+            offset = y * stride + x * 2
+            mm[offset] = pixel & 0xFF
+            mm[offset + 1] = pixel >> 8
+    loop_ms = (time.perf_counter() - t0) * fb.height / rows * 1000.0
+    print(f"pack             : numpy {vec_ms:7.3f} ms/frame   per-pixel loop {loop_ms:7.1f} "
+          f"ms/frame   x{loop_ms / max(vec_ms, 1e-9):.0f}")
+
+
+class _Recorder:
+    """Stands in for the Framebuffer: keeps the frames it is shown."""
+
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.width, self.height = width, height
+        self.frames = []
+
+    def show(self, frame):
+        self.frames.append(to_bits(frame).copy())
+
+
+def record_face(ticks):
+    screen = _Recorder()
+    canvas = FbCanvas(screen.width, screen.height, bg="#111")
+    view = SpriteFace(canvas, "live", screen.width, screen.height, "#111", sprites=False,
+                      photo=lambda image: image)
+    view.atlas = FaceAtlas.build("live", screen.width, screen.height, "#111")
+    t0 = time.thread_time()
+    for i in range(ticks):
+        view.draw(face_state(i, "talk" if (i // 120) % 2 else "idle"))
+        canvas.flush(screen)
+    return screen.frames, time.thread_time() - t0
+
+
+def record_zork(ticks):
+    from scrlk.bench.e2e_bench import ROOT, _load_package
+    from scrlk.bench.zork_draw_bench import _Clock, COMMANDS, TICK_S
+    os.environ.pop("OPENAI_API_KEY", None)            # keyboard only: no voice
+    _load_package(os.path.join(ROOT, "games", "zork", "ZORK-I"), "zork_i")
+    import zork_i.app as mod
+    from zork_i.fbapp import FbZorkApp
+    from zork_i.audio import AudioIO
+    clock = _Clock()
+    mod.time = clock
+    screen = _Recorder()
+    with contextlib.redirect_stderr(io.StringIO()):         # the status line
+        vox = FbZorkApp(screen, audio=AudioIO(), out=io.StringIO())
+    vox.set_status = lambda s: None
+    screen.frames.clear()
+    cpu = 0.0
+    for i in range(ticks):
+        clock.now += TICK_S
+        vox.audio.is_speaking = int(i * TICK_S / 6.0) % 2 == 1
+        t0 = time.thread_time()
+        if i and i % int(10.0 / TICK_S) == 0:
+            vox.do_cmd(COMMANDS[(i // int(10.0 / TICK_S)) % len(COMMANDS)])
+        vox.draw_world()
+        cpu += time.thread_time() - t0
+    vox.quit()
+    return screen.frames, cpu
+
+
+def _modes():
+    tw, th = TILE
+    return (("whole frame", dict(tile=None, double=False)),
+            ("rows", dict(tile=(WIDTH, 1), double=False)),
+            (f"tiles {tw}x{th}", dict(tile=TILE, double=False)),
+            ("tiles + flip", dict(tile=TILE, double=True)))
+
+
+def replay(label, frames, open_fb):
+    full = WIDTH * HEIGHT * 2
+    for name, kwargs in _modes():
+        fb = open_fb(**kwargs)
+        try:
+            if fb.pages < kwargs["double"] + 1:
+                print(f"{label:5s} {name:12s} : no second page on this framebuffer")
+                continue
+            fb.clear()
+            t0 = time.thread_time()
+            for frame in frames:
+                fb.show(frame)
+            cpu = time.thread_time() - t0
+            shown = max(fb.frames, 1)
+            print(f"{label:5s} {name:12s} : {fb.bytes_written / shown / 1024:6.1f} KiB/frame "
+                  f"({fb.bytes_written / shown / full * 100:5.1f}% of a whole frame), "
+                  f"show {cpu / max(len(frames), 1) * 1000:6.3f} ms/frame")
+        finally:
+            fb.close()
+
+
+def run(frames=400, path=None):
+    fake = path is None
+    if fake:
+        path = os.path.join("/tmp", f"fb_bench_{os.getpid()}.raw")
+        def open_fb(**kwargs):
+            if os.path.exists(path):
+                os.remove(path)
+            return Framebuffer.fake(path, **kwargs)
+    else:
+        def open_fb(**kwargs):
+            return Framebuffer(path, **kwargs)
+    try:
+        fb = open_fb()
+        kind = "fake (file + ioctl shim)" if fake else "device"
+        print(f"framebuffer      : {path} {kind}, {fb.width}x{fb.height}, stride {fb.stride}")
+        print(f"whole frame      : {fb.width * fb.height * 2 / 1024:.1f} KiB")
+        bench_pack(fb, frames)
+        fb.close()
+        for label, record in (("face", record_face), ("zork", record_zork)):
+            shown, cpu = record(frames)
+            print(f"{label:5s} render       : {cpu / frames * 1000:6.3f} ms/tick, "
+                  f"{len(shown)} of {frames} ticks change the screen")
+            replay(label, shown, open_fb)
+    finally:
+        if fake and os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=400)
+    ap.add_argument("--fb", help="framebuffer device (default: a fake one in /tmp)")
+    args = ap.parse_args()
+    run(args.frames, args.fb)
@@ -0,0 +1,194 @@
+"""
+A display-less stand-in for tkinter, for driving the Tk apps in benchmarks.
+
+install() puts it in sys.modules as `tkinter` (and PIL.ImageTk) before an
+app is imported. Widgets accept any call and draw nothing; what matters
+for the apps' behaviour is kept: root.after()/after_idle() callbacks run
+from update()/mainloop() (the apps marshal work onto the Tk thread that
+way), canvas items get ids, and update() raises TclError once the root
+is destroyed, like the real thing.
+"""
+import heapq
+import itertools
+import sys
+import threading
+import time
+import traceback
+import types
+
+SCREEN = (1280, 800)
+END = "end"
+INSERT = "insert"
+
+
+class TclError(Exception):
+    pass
+
+
+class _Scheduler:
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.destroyed = False
+        self.callbacks = 0
+
+    def after(self, ms, fn, args):
+        due = time.monotonic() + (ms or 0) / 1000.0
+        with self._lock:
+            seq = next(self._seq)
+            heapq.heappush(self._heap, (due, seq, fn, args))
+        return f"after#{seq}"
+
+    def cancel(self, ident):
+        with self._lock:
+            self._heap = [e for e in self._heap if f"after#{e[1]}" != ident]
+            heapq.heapify(self._heap)
+
+    def run_due(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+            self.callbacks += 1
+            try:
+                fn(*args)
+            except Exception:
+                # like Tk's report_callback_exception: print and keep looping
+                traceback.print_exc()
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+
+_sched = _Scheduler()
+_ids = itertools.count(1)
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class Misc:
+    """Every widget: accepts any method call, schedules after() callbacks."""
+
+    def __init__(self, *args, **kwargs):
+        self._text = ""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name.startswith("create_"):
+            return lambda *a, **k: next(_ids)
+        if name in ("winfo_screenwidth", "winfo_width", "winfo_reqwidth"):
+            return lambda: SCREEN[0]
+        if name in ("winfo_screenheight", "winfo_height", "winfo_reqheight"):
+            return lambda: SCREEN[1]
+        if name == "winfo_exists":
+            return lambda: 0 if _sched.destroyed else 1
+        return _noop
+
+    # text-ish widgets (Entry.get/insert/delete)
+    def get(self, *args):
+        return self._text
+
+    def insert(self, index, text, *args):
+        self._text += str(text)
+
+    def delete(self, *args):
+        self._text = ""
+
+    # event loop
+    def after(self, ms, func=None, *args):
+        if func is None:
+            time.sleep((ms or 0) / 1000.0)
+            return None
+        return _sched.after(ms, func, args)
+
+    def after_idle(self, func, *args):
+        return _sched.after(0, func, args)
+
+    def after_cancel(self, ident):
+        _sched.cancel(ident)
+
+    def update(self):
+        if _sched.destroyed:
+            raise TclError("can't invoke \"update\" command: application has been destroyed")
+        _sched.run_due()
+
+    update_idletasks = update
+
+    def mainloop(self, n=0):
+        while not _sched.destroyed:
+            _sched.run_due()
+            due = _sched.next_due()
+            wait = 0.01 if due is None else min(0.01, max(0.0, due - time.monotonic()))
+            time.sleep(wait)
+
+    def destroy(self):
+        _sched.destroyed = True
+
+    def quit(self):
+        _sched.destroyed = True
+
+
+class Tk(Misc):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        _sched.destroyed = False
+
+
+class PhotoImage(Misc):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        size = kwargs.get("size") or (args[1] if len(args) > 1 else None)
+        image = args[0] if args and not isinstance(args[0], str) else kwargs.get("image")
+        self._size = getattr(image, "size", None) or size or (1, 1)
+
+    def width(self):
+        return self._size[0]
+
+    def height(self):
+        return self._size[1]
+
+
+class Canvas(Misc): pass
+class Frame(Misc): pass
+class Label(Misc): pass
+class Button(Misc): pass
+class Entry(Misc): pass
+class Text(Misc): pass
+class Scrollbar(Misc): pass
+class Toplevel(Misc): pass
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    mod.__dict__["__getattr__"] = lambda attr: attr.lower() if attr.isupper() else Misc
+    return mod
+
+
+def install():
+    """Replace tkinter (and PIL.ImageTk) for everything imported after this."""
+    names = {k: v for k, v in globals().items()
+             if isinstance(v, type) and issubclass(v, (Misc, TclError))}
+    tk = _module("tkinter", END=END, INSERT=INSERT, TkVersion=8.6, TclVersion=8.6,
+                 HEADLESS=True, **names)
+    sys.modules["tkinter"] = tk
+    sys.modules["tkinter.ttk"] = _module("tkinter.ttk", **names)
+    try:
+        import PIL
+        image_tk = _module("PIL.ImageTk", PhotoImage=PhotoImage)
+        sys.modules["PIL.ImageTk"] = image_tk
+        PIL.ImageTk = image_tk
+    except Exception:
+        pass
+    return tk
+
+
+def scheduler_stats():
+    return {"after_callbacks": _sched.callbacks}
@@ -0,0 +1,116 @@
+"""
+CPU cost of the Zork CRT canvas, VoxZorkApp.draw_world per 250 ms tick.
+
+    python -m scrlk.bench.zork_draw_bench [--apps zork-i,vox-zork] [--seconds 120]
+
+Builds each app on scrlk.bench.headless_tk (no display, no voice) and
+replays --seconds of play on a virtual clock: the 250 ms redraw_loop
+tick, Macintosh talking half the time (6 s on, 6 s off, so the mouth
+moves) and a command every 10 s that walks between rooms and picks
+things up. Reports the canvas calls per tick, the CPU time of a redraw
+tick and of a command (which includes loading a room's picture the
+first time), and both together as a share of one core. The stand-in canvas does no
+drawing, so the CPU figure is the Python side; Tk's own cost per call
+comes on top of it and scales with the call count.
+"""
+import argparse
+import os
+import sys
+import time
+import types
+
+from scrlk.bench.e2e_bench import ROOT, _load, _load_package
+
+TICK_S = 0.25
+COMMANDS = ("take lamp", "north", "east", "take note", "down", "inventory", "take key",
+            "up", "west", "south", "drop lamp", "look")
+APPS = ("zork-i", "vox-zork")
+
+
+class _CountingCanvas:
+    def __init__(self, canvas):
+        self._canvas = canvas
+        self.calls = 0
+
+    def __getattr__(self, name):
+        fn = getattr(self._canvas, name)
+        if not callable(fn):
+            return fn
+        def call(*args, **kwargs):
+            self.calls += 1
+            return fn(*args, **kwargs)
+        return call
+
+
+class _Clock:
+    """Stands in for the app module's `time`: time() is virtual, the rest real."""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def build(app):
+    """(app object, module whose `time` drives the face, speaking setter)."""
+    if app == "zork-i":
+        _load_package(os.path.join(ROOT, "games", "zork", "ZORK-I"), "zork_i")
+        import zork_i.app as mod
+        from zork_i.audio import AudioIO
+        vox = mod.VoxZorkApp(audio=AudioIO())
+        return vox, mod, lambda on: setattr(vox.audio, "is_speaking", on)
+    mod = _load(os.path.join(ROOT, "games", "zork", "my_zork", "vox_zork.py"), "vox_zork")
+    vox = mod.VoxZorkApp()
+    return vox, mod, lambda on: setattr(vox, "is_speaking", on)
+
+
+def run_one(app, seconds):
+    vox, mod, speaking = build(app)
+    clock = _Clock()
+    mod.time = clock
+    vox.tell = lambda text, speak=False: None        # the log widget is not under test
+    canvas = _CountingCanvas(vox.canvas)
+    vox.canvas = canvas
+    ticks = int(seconds / TICK_S)
+    commands = 0
+    cpu_draw = cpu_cmd = 0.0
+    for i in range(ticks):
+        clock.now += TICK_S
+        t = i * TICK_S
+        speaking(int(t / 6.0) % 2 == 1)
+        if i and i % int(10.0 / TICK_S) == 0:
+            t0 = time.thread_time()
+            vox.do_cmd(COMMANDS[commands % len(COMMANDS)])
+            cpu_cmd += time.thread_time() - t0
+            commands += 1
+        t0 = time.thread_time()
+        vox.draw_world()                              # what redraw_loop does
+        cpu_draw += time.thread_time() - t0
+    print(f"{app:16s} : {canvas.calls / ticks:6.1f} canvas calls/tick, redraw "
+          f"{cpu_draw / ticks * 1000:6.3f} ms/tick, command {cpu_cmd / max(commands, 1) * 1000:5.1f} ms, "
+          f"{(cpu_draw + cpu_cmd) / seconds * 100:5.2f}% of one core")
+    vox.quit()                                        # vox_zork's quit() exits
+
+
+def run(apps=APPS, seconds=120.0):
+    from scrlk.bench import headless_tk
+    headless_tk.install()
+    os.environ.pop("OPENAI_API_KEY", None)          # keyboard only: no client, no voice
+    print(f"play             : {seconds:.0f} s, redraw every {TICK_S * 1000:.0f} ms")
+    for app in apps:
+        try:
+            run_one(app, seconds)
+        except SystemExit:
+            pass
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--apps", default=",".join(APPS))
+    ap.add_argument("--seconds", type=float, default=120.0)
+    args = ap.parse_args()
+    run([a for a in args.apps.split(",") if a], args.seconds)
@@ -0,0 +1,89 @@
+"""
+Shared OpenAI client.
+
+Every app gets the same process-wide client with a tuned keep-alive
+connection pool. warm_up() opens a few pooled connections in the
+background at boot (TLS handshake + auth round-trip), so the first STT,
+chat, TTS and image calls reuse hot connections instead of paying for
+connection setup.
+"""
+import os
+import sys
+import threading
+import time
+
+try:
+    import httpx
+except Exception:  # older/newer openai without httpx: default transport
+    httpx = None
+
+try:
+    from openai import OpenAI, DefaultHttpxClient
+except Exception:
+    OpenAI = None
+    DefaultHttpxClient = None
+
+MAX_CONNECTIONS = 16
+MAX_KEEPALIVE = 8
+KEEPALIVE_S = 300.0      # keep idle connections around between kiosk turns
+CONNECT_TIMEOUT_S = 5.0
+READ_TIMEOUT_S = 60.0
+WARM_CONNECTIONS = 4     # STT, chat, TTS, image can each start on a hot socket
+WARM_MODEL = "gpt-4o-mini"
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_client(max_connections=MAX_CONNECTIONS, max_keepalive=MAX_KEEPALIVE):
+    """
+    Process-wide OpenAI client (created on first use; the pool limits
+    only apply then, so a server hosting many sessions sizes it first).
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            if OpenAI is None:
+                raise RuntimeError("openai ej installerat")
+            kwargs = {}
+            if httpx is not None and DefaultHttpxClient is not None:
+                kwargs["http_client"] = DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_keepalive,
+                        keepalive_expiry=KEEPALIVE_S,
+                    ),
+                    timeout=httpx.Timeout(READ_TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+                )
+            _client = OpenAI(**kwargs)
+        return _client
+
+
+def warm_up(connections=WARM_CONNECTIONS, background=True):
+    """
+    Open `connections` pooled connections with cheap parallel GETs.
+    Runs on a background thread unless background=False.
+    """
+    def _one():
+        try:
+            get_client().models.retrieve(WARM_MODEL)
+        except Exception as e:
+            print(f"[OPENAI] warm-up: {e}", file=sys.stderr)
+
+    def _run():
+        t0 = time.time()
+        threads = [threading.Thread(target=_one, daemon=True) for _ in range(connections)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"[OPENAI] {connections} connections warm in {time.time() - t0:.2f}s")
+
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    if not background:
+        _run()
+        return None
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,142 @@
+"""
+Token-budgeted chat context.
+
+Keeps the system persona and the most recent turns verbatim and folds
+older turns into a running summary, produced on a background thread.
+The prompt sent to the model stays under a fixed token budget however
+long the session runs, so per-turn latency and cost stay flat.
+"""
+import sys
+import threading
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("o200k_base")
+except Exception:  # optional; fall back to a chars/4 estimate
+    _ENC = None
+
+BUDGET_TOKENS = 1200     # whole prompt (persona + summary + turns)
+KEEP_RECENT = 6          # messages always sent verbatim (3 user/assistant pairs)
+MSG_OVERHEAD = 4         # per-message framing tokens
+
+SUMMARY_PROMPT = (
+    "Sammanfatta samtalet nedan kort på svenska (högst 5 meningar). "
+    "Behåll namn, känslor, fakta användaren berättat och vad ni pratat om. "
+    "Skriv bara sammanfattningen."
+)
+
+
+def count_tokens(text):
+    if _ENC is not None:
+        return len(_ENC.encode(text))
+    return (len(text) + 3) // 4
+
+
+def openai_summarizer(client, model="gpt-4o-mini", max_output_tokens=200):
+    """summarize(old_summary, messages) -> new summary, via the Responses API."""
+    def summarize(old_summary, messages):
+        lines = []
+        if old_summary:
+            lines.append(f"Tidigare sammanfattning: {old_summary}")
+        for m in messages:
+            who = "Användare" if m["role"] == "user" else "Macintosh"
+            lines.append(f"{who}: {m['content']}")
+        resp = client.responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n".join(lines)},
+            ],
+            max_output_tokens=max_output_tokens,
+        )
+        return (resp.output_text or "").strip()
+    return summarize
+
+
+class ChatContext:
+    """
+    add() new turns, send messages() to the model.
+
+    When the prompt goes over `budget_tokens`, everything older than the
+    last `keep_recent` messages is handed to `summarize` in the
+    background. Until that finishes, messages() leaves out the oldest
+    turns so the budget still holds.
+    """
+
+    def __init__(self, system_prompt, summarize=None, budget_tokens=BUDGET_TOKENS,
+                 keep_recent=KEEP_RECENT):
+        self.system_prompt = system_prompt
+        self.summarize = summarize
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+
+        self.summary = ""
+        self.turns = []            # [{"role", "content"}], oldest first
+        self._summarizing = False
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # public
+    # -------------------------
+    def add(self, role, content):
+        with self._lock:
+            self.turns.append({"role": role, "content": content})
+        self._maybe_compact()
+
+    def messages(self):
+        """Prompt for the next request, capped at budget_tokens."""
+        with self._lock:
+            head = [{"role": "system", "content": self.system_prompt}]
+            if self.summary:
+                head.append({"role": "system",
+                             "content": "Sammanfattning av samtalet hittills: " + self.summary})
+            turns = list(self.turns)
+        budget = self.budget_tokens - self._tokens(head)
+        # newest first until the budget is spent; always keep the last message
+        kept = []
+        for m in reversed(turns):
+            cost = self._tokens([m])
+            if kept and cost > budget:
+                break
+            kept.append(m)
+            budget -= cost
+        return head + kept[::-1]
+
+    def prompt_tokens(self):
+        return self._tokens(self.messages())
+
+    # -------------------------
+    # summarization
+    # -------------------------
+    @staticmethod
+    def _tokens(messages):
+        return sum(count_tokens(m["content"]) + MSG_OVERHEAD for m in messages)
+
+    def _maybe_compact(self):
+        if self.summarize is None:
+            return
+        with self._lock:
+            if self._summarizing or len(self.turns) <= self.keep_recent:
+                return
+            head = [{"role": "system", "content": self.system_prompt + self.summary}]
+            if self._tokens(head + self.turns) <= self.budget_tokens:
+                return
+            old = self.turns[:-self.keep_recent]
+            old_summary = self.summary
+            self._summarizing = True
+        threading.Thread(target=self._compact, args=(old_summary, old), daemon=True).start()
+
+    def _compact(self, old_summary, old):
+        try:
+            summary = self.summarize(old_summary, old)
+        except Exception as e:
+            print(f"[CONTEXT] summary failed: {e}", file=sys.stderr)
+            summary = None
+        with self._lock:
+            if summary:
+                self.summary = summary
+                # drop exactly the turns that were summarized; newer ones stay
+                self.turns = self.turns[len(old):]
+            self._summarizing = False
+        if summary:
+            self._maybe_compact()
@@ -0,0 +1,505 @@
+"""
+The Macintosh faces, drawn once and then only updated.
+
+The three apps each have their own face style:
+
+    eq2    scrlk_gpt.py             beige 3D Mac, floppy slot and vents, mood tint
+    happy  scrlk-ai.py              black-on-white line-art Happy Mac
+    live   macintosh_live_eq2.py    bigger 3D Mac with smile arc and wink
+
+draw_eq2/draw_happy/draw_live hold the geometry. They paint through a
+painter with Tk canvas semantics (polygon/rectangle/oval/line/arc, Tk
+option names) where every part has a key, so the same face can go to
+any surface:
+
+    CanvasFace   retained mode on a tkinter Canvas: the items are created
+                 on the first frame; after that only parts whose geometry
+                 or options changed get a coords()/itemconfig(), and
+                 parts not drawn this frame (an open eye during a blink)
+                 are hidden rather than deleted
+    ImagePainter renders into a PIL image (palette, grey, 1-bit or RGB),
+                 for scrlk.face_atlas and scrlk.fb
+    BoundsPainter only records the area the face covers
+
+Each draw_* takes the app object (or any object with the same
+attributes, e.g. a types.SimpleNamespace) as `face`.
+
+    self.painter = CanvasFace(self.canvas)
+    ...
+    with self.painter.frame():
+        draw_eq2(self.painter, self.canvas_w, self.canvas_h, self)
+"""
+import math
+from contextlib import contextmanager
+
+STYLES = ("eq2", "happy", "live")
+
+
+# -------------------------
+# retained-mode Tk painter
+# -------------------------
+class CanvasFace:
+    """
+    Painter for a tkinter Canvas that keeps its items between frames.
+
+    Coordinates are rounded to whole pixels before they are compared, so
+    sub-pixel easing (the mouth settling) does not cost a Tk call when
+    nothing on screen would move. Stacking follows the order parts are
+    first drawn; a part that first shows up on a later frame is slotted in
+    right above the part drawn before it.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._items = {}            # key -> [item id, coords, options, visible]
+        self._drawn = []
+        self._config = {}
+        self.calls = 0              # Tk calls issued, for benchmarks
+
+    @contextmanager
+    def frame(self):
+        self.begin()
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def begin(self):
+        self._drawn = []
+
+    def end(self):
+        """Hide the parts that were not drawn this frame."""
+        drawn = set(self._drawn)
+        for key, item in self._items.items():
+            if item[3] and key not in drawn:
+                self.canvas.itemconfig(item[0], state="hidden")
+                item[3] = False
+                self.calls += 1
+
+    def clear(self):
+        """Forget every item (the canvas was cleared or resized by someone else)."""
+        for item in self._items.values():
+            self.canvas.delete(item[0])
+        self._items.clear()
+
+    def configure(self, **options):
+        """canvas.configure(), only for options that changed."""
+        changed = {k: v for k, v in options.items() if self._config.get(k) != v}
+        if changed:
+            self.canvas.configure(**changed)
+            self._config.update(changed)
+            self.calls += 1
+
+    # painter API
+    def polygon(self, key, coords, **options):
+        self._item("polygon", key, coords, options)
+
+    def rectangle(self, key, coords, **options):
+        self._item("rectangle", key, coords, options)
+
+    def oval(self, key, coords, **options):
+        self._item("oval", key, coords, options)
+
+    def line(self, key, coords, **options):
+        self._item("line", key, coords, options)
+
+    def arc(self, key, coords, **options):
+        self._item("arc", key, coords, options)
+
+    def _item(self, kind, key, coords, options):
+        coords = tuple(int(round(v)) for v in coords)
+        item = self._items.get(key)
+        if item is None:
+            ident = getattr(self.canvas, "create_" + kind)(*coords, **options)
+            self.calls += 1
+            if len(self._items) > len(self._drawn):
+                # not the first frame: put it where it belongs in the stack
+                if self._drawn:
+                    self.canvas.tag_raise(ident, self._items[self._drawn[-1]][0])
+                else:
+                    self.canvas.tag_lower(ident)
+                self.calls += 1
+            self._items[key] = [ident, coords, dict(options), True]
+        else:
+            ident, old_coords, old_options, visible = item
+            if coords != old_coords:
+                self.canvas.coords(ident, *coords)
+                item[1] = coords
+                self.calls += 1
+            changed = {k: v for k, v in options.items() if old_options.get(k) != v}
+            if not visible:
+                changed["state"] = "normal"
+                item[3] = True
+            if changed:
+                self.canvas.itemconfig(ident, **changed)
+                old_options.update(changed)
+                old_options.pop("state", None)
+                self.calls += 1
+        self._drawn.append(key)
+
+
+# -------------------------
+# offscreen painters
+# -------------------------
+def _smooth(coords, steps=8):
+    """Tk's smooth=True polygon: quadratic B-spline through the edge midpoints."""
+    pts = list(zip(coords[0::2], coords[1::2]))
+    n = len(pts)
+    out = []
+    for i in range(n):
+        (x0, y0), (x1, y1), (x2, y2) = pts[i - 1], pts[i], pts[(i + 1) % n]
+        ax, ay = (x0 + x1) / 2, (y0 + y1) / 2
+        bx, by = (x1 + x2) / 2, (y1 + y2) / 2
+        for k in range(steps):
+            t = k / steps
+            u = 1 - t
+            out.append((u*u*ax + 2*u*t*x1 + t*t*bx, u*u*ay + 2*u*t*y1 + t*t*by))
+    return out
+
+
+def _box(coords, grow=0.0):
+    x0, y0, x1, y1 = coords
+    if x0 > x1: x0, x1 = x1, x0
+    if y0 > y1: y0, y1 = y1, y0
+    return [x0 - grow, y0 - grow, x1 + grow, y1 + grow]
+
+
+class ImagePainter:
+    """
+    Painter into a PIL image with Tk's defaults (rectangles and ovals
+    get a 1 px black outline unless told otherwise, polygons none) and
+    Tk's centred outlines. `ink(color)` maps a Tk colour to the image's
+    pixel value: a palette index for "P" images, 0/1 for "1", or the
+    colour itself for "RGB". `offset` shifts everything (drawing a crop
+    of the canvas).
+    """
+
+    def __init__(self, image, ink=None, offset=(0, 0)):
+        from PIL import ImageDraw   # optional dependency
+        self.image = image
+        self.draw = ImageDraw.Draw(image)
+        self.ink = ink or (lambda color: color)
+        self.dx, self.dy = -offset[0], -offset[1]
+
+    def configure(self, **options):
+        pass                        # the background is the image's own
+
+    def _xy(self, coords):
+        return [v + (self.dx if i % 2 == 0 else self.dy) for i, v in enumerate(coords)]
+
+    def _color(self, color):
+        return None if color in (None, "") else self.ink(color)
+
+    def polygon(self, key, coords, fill="black", outline="", width=1, smooth=False, **_):
+        coords = self._xy(coords)
+        pts = _smooth(coords) if smooth else list(zip(coords[0::2], coords[1::2]))
+        self.draw.polygon(pts, fill=self._color(fill))
+        if self._color(outline) is not None and width:
+            self.draw.line(pts + pts[:1], fill=self._color(outline), width=int(width))
+
+    def rectangle(self, key, coords, fill="", outline="black", width=1, **_):
+        w = int(width) if self._color(outline) is not None else 0
+        self.draw.rectangle(_box(self._xy(coords), w / 2), fill=self._color(fill),
+                            outline=self._color(outline) if w else None, width=max(w, 1))
+
+    def oval(self, key, coords, fill="", outline="black", width=1, **_):
+        w = int(width) if self._color(outline) is not None else 0
+        self.draw.ellipse(_box(self._xy(coords), w / 2), fill=self._color(fill),
+                          outline=self._color(outline) if w else None, width=max(w, 1))
+
+    def line(self, key, coords, fill="black", width=1, capstyle="butt", **_):
+        coords = self._xy(coords)
+        w = max(1, int(round(width)))
+        self.draw.line(coords, fill=self._color(fill), width=w)
+        if capstyle == "round" and w > 2:
+            r = w / 2
+            for x, y in ((coords[0], coords[1]), (coords[-2], coords[-1])):
+                self.draw.ellipse([x - r, y - r, x + r, y + r], fill=self._color(fill))
+
+    def arc(self, key, coords, start=0, extent=90, outline="black", width=1, **_):
+        # Tk angles run counter-clockwise, PIL's clockwise
+        a, b = -(start + extent), -start
+        if extent < 0:
+            a, b = b, a
+        w = max(1, int(width))
+        self.draw.arc(_box(self._xy(coords), w / 2), a, b, fill=self._color(outline), width=w)
+
+
+class BoundsPainter:
+    """Records the bounding box of everything drawn (outline widths included)."""
+
+    def __init__(self):
+        self.box = None
+
+    def _add(self, coords, width=0):
+        xs, ys = coords[0::2], coords[1::2]
+        g = math.ceil(width / 2) + 1
+        box = (min(xs) - g, min(ys) - g, max(xs) + g, max(ys) + g)
+        if self.box is None:
+            self.box = box
+        else:
+            self.box = (min(self.box[0], box[0]), min(self.box[1], box[1]),
+                        max(self.box[2], box[2]), max(self.box[3], box[3]))
+
+    def polygon(self, key, coords, width=1, **_): self._add(coords, width)
+    def rectangle(self, key, coords, width=1, **_): self._add(coords, width)
+    def oval(self, key, coords, width=1, **_): self._add(coords, width)
+    def line(self, key, coords, width=1, **_): self._add(coords, width)
+    def arc(self, key, coords, width=1, **_): self._add(coords, width)
+
+    def configure(self, **options):
+        pass
+
+
+# -------------------------
+# scrlk_gpt.py: EQ2MacintoshAI
+# -------------------------
+EQ2_SCREEN = {                      # CRT glow per mood
+    "listening": "#d0ffd0",         # soft green
+    "thinking": "#fff5a8",          # yellow-ish when thinking
+    "speaking": "#ccddff",          # soft blue when talking
+    "happy": "#ccffcc",             # bright green
+}
+EQ2_SCREEN_DEFAULT = "#bbffbb"      # gentle green
+
+
+def draw_eq2(p, width, height, face):
+    """
+    face: head_tilt, eye_offset_x, eye_offset_y, mood, blink_active,
+    wink_active (right eye), is_speaking, mouth_open_amount (0..1),
+    expression_smile (0..1).
+    """
+    # scale against 1000x700 base
+    scale = min(width / 1000.0, height / 700.0)
+    base_x = width / 2
+    base_y = height / 2
+
+    tilt = face.head_tilt * scale
+    w = 150 * scale
+    h = 220 * scale
+
+    # shadow under Mac
+    p.polygon("shadow", [
+        base_x - w, base_y + h * 0.6,
+        base_x + w, base_y + h * 0.6,
+        base_x + w * 0.85, base_y + h * 0.75,
+        base_x - w * 0.85, base_y + h * 0.75
+    ], fill='#0a0a0a', outline='', smooth=True)
+
+    body_front = '#e8dcc8'
+    body_side = '#c4b8a0'
+    outline_col = '#8b7355'
+
+    # angled back panel
+    p.polygon("back", [
+        base_x - w * 0.75 + tilt, base_y - h,
+        base_x + w * 0.75 + tilt, base_y - h,
+        base_x + w + tilt,        base_y + h * 0.4,
+        base_x - w + tilt,        base_y + h * 0.4
+    ], fill=body_side, outline=outline_col, width=int(2 * scale))
+
+    # front block
+    p.rectangle("front", (base_x - w, base_y - h, base_x + w, base_y + h * 0.4),
+                fill=body_front, outline=outline_col, width=int(3 * scale))
+
+    # screen bezel (Classic Mac 512x342 ratio)
+    screen_w = w * 0.65
+    screen_h = screen_w * (342.0 / 512.0)
+    p.rectangle("bezel", (base_x - screen_w, base_y - h * 0.75,
+                          base_x + screen_w, base_y - h * 0.75 + screen_h),
+                fill='#1a1a1a', outline='#000000', width=int(3 * scale))
+
+    # "CRT glow" color depends on mood
+    p.rectangle("screen", (base_x - screen_w * 0.88, base_y - h * 0.68,
+                           base_x + screen_w * 0.88, base_y - h * 0.75 + screen_h * 0.88),
+                fill=EQ2_SCREEN.get(face.mood, EQ2_SCREEN_DEFAULT), outline='#888888',
+                width=int(2 * scale))
+
+    # eyes: blink closes both, wink closes the right one, else round and tracking
+    eye_y = base_y - h * 0.45
+    eye_size = max(10, int(12 * scale))
+    eye_fill = '#000000'
+    eyes = (("left", base_x - screen_w * 0.35 + face.eye_offset_x * scale, False),
+            ("right", base_x + screen_w * 0.35 + face.eye_offset_x * scale, face.wink_active))
+    for side, x, wink in eyes:
+        y = eye_y + face.eye_offset_y * scale
+        if face.blink_active or wink:
+            p.line(f"eye_{side}_closed", (x - eye_size, y, x + eye_size, y),
+                   fill=eye_fill, width=int(4 * scale), capstyle='round')
+        else:
+            p.oval(f"eye_{side}", (x - eye_size, y - eye_size, x + eye_size, y + eye_size),
+                   fill=eye_fill, outline='')
+
+    # mouth: opens while speaking, else a smile curve from expression_smile
+    mouth_y = base_y - h * 0.25
+    mouth_w = screen_w * 0.45
+    if face.is_speaking:
+        openness = 0.2 + 0.6 * face.mouth_open_amount
+        mouth_height = 25 * scale + openness * 30 * scale
+    else:
+        mouth_height = 20 * scale + face.expression_smile * 40 * scale
+    p.arc("mouth", (base_x - mouth_w, mouth_y, base_x + mouth_w, mouth_y + mouth_height),
+          start=0, extent=-180, style="arc", outline='#000000', width=int(4 * scale))
+
+    # floppy slot
+    p.rectangle("floppy", (base_x - w * 0.45, base_y + h * 0.1,
+                           base_x + w * 0.45, base_y + h * 0.2),
+                fill='#000000', outline='#000000', width=int(2 * scale))
+
+    # vents
+    for i in range(6):
+        y = base_y + h * 0.23 + i * 5 * scale
+        p.line(f"vent{i}", (base_x - w * 0.45, y, base_x + w * 0.45, y),
+               fill=outline_col, width=int(2 * scale))
+
+    # base block/foot
+    p.rectangle("foot", (base_x - w * 0.8, base_y + h * 0.4,
+                         base_x + w * 0.8, base_y + h * 0.5),
+                fill=body_side, outline=outline_col, width=int(2 * scale))
+
+
+# -------------------------
+# scrlk-ai.py: MacintoshAI (Happy Mac)
+# -------------------------
+HAPPY_BG = "#ffffff"
+HAPPY_FG = "#000000"
+
+
+def draw_happy(p, width, height, face, rel_scale=0.62, mouth_px_h=3):
+    """
+    Line-art Happy Mac: 1x2 eyes, mirrored-L nose, smiling mouth that
+    drops with mouth_open. face: eye_offset_x, eye_offset_y, mouth_open
+    (0..1). The canvas background is white (set it with
+    painter.configure(bg=HAPPY_BG) on a Tk canvas).
+    """
+    mac_h = int(height * rel_scale)
+    mac_w = int(mac_h * 0.82)
+    x0 = (width - mac_w) // 2
+    y0 = (height - mac_h) // 2
+    x1 = x0 + mac_w
+    y1 = y0 + mac_h
+
+    px = mac_h / 200.0
+    fg = HAPPY_FG
+    lw = int(3 * px)
+
+    # body
+    p.rectangle("body", (x0, y0, x1, y1 - 30*px), outline=fg, width=lw)
+    p.rectangle("foot", (x0 + 20*px, y1 - 28*px, x1 - 20*px, y1 - 6*px), outline=fg, width=lw)
+
+    # screen
+    sx0 = x0 + 24*px; sy0 = y0 + 18*px
+    sx1 = x1 - 24*px; sy1 = y0 + 118*px
+    p.rectangle("screen", (sx0, sy0, sx1, sy1), outline=fg, width=lw)
+    p.rectangle("screen_inner", (sx0+6*px, sy0+6*px, sx1-6*px, sy1-6*px), outline=fg, width=lw)
+
+    # front slots
+    p.line("slot_left", (x0+28*px, y0+138*px, x0+40*px, y0+138*px), fill=fg, width=lw)
+    p.line("slot_right", (x0+96*px, y0+138*px, x0+138*px, y0+138*px), fill=fg, width=lw)
+
+    # face
+    sw = sx1 - sx0
+    sh = sy1 - sy0
+    ox = max(-3*px, min(3*px, face.eye_offset_x * 0.05))
+    oy = max(-2*px, min(2*px, face.eye_offset_y * 0.05))
+
+    # 1x2 "pixel" eyes
+    eye_w = 4 * px
+    eye_h = 7 * px
+    exl = sx0 + 0.32*sw + ox
+    exr = sx0 + 0.68*sw + ox
+    ey = sy0 + 0.42*sh + oy
+    p.rectangle("eye_left", (exl - eye_w/2, ey - eye_h, exl + eye_w/2, ey + eye_h), fill=fg, outline=fg)
+    p.rectangle("eye_right", (exr - eye_w/2, ey - eye_h, exr + eye_w/2, ey + eye_h), fill=fg, outline=fg)
+
+    # nose: mirrored "L" (┘), down and then a short stroke to the right
+    nx = sx0 + 0.50*sw + ox*0.2
+    n_top = sy0 + 0.36*sh
+    n_bot = sy0 + 0.52*sh
+    p.line("nose", (nx, n_top, nx, n_bot), fill=fg, width=lw)
+    p.line("nose_foot", (nx, n_bot, nx + 6*px, n_bot), fill=fg, width=lw)
+
+    # mouth: a smile by default, the bottom drops with mouth_open
+    mcy = sy0 + 0.66*sh
+    drop = 4 * px + (face.mouth_open * 6.0) * px
+    seg = 0.36*sw / 3
+    mw = mouth_px_h*px
+    p.line("mouth_left", (nx - seg, mcy, nx - seg/2, mcy + drop), fill=fg, width=mw)
+    p.line("mouth_bottom", (nx - seg/2, mcy + drop, nx + seg/2, mcy + drop), fill=fg, width=mw)
+    p.line("mouth_right", (nx + seg/2, mcy + drop, nx + seg, mcy), fill=fg, width=mw)
+
+
+# -------------------------
+# macintosh_live_eq2.py: MacFace
+# -------------------------
+def draw_live(p, width, height, face):
+    """
+    face: head_tilt, eye_offset_x, eye_offset_y, is_listening,
+    is_speaking, blink_progress (0..1, >0 = closed), wink_left,
+    mouth_open (0..1), is_smiling (0..1).
+    """
+    scale = min(width/1000, height/700) * 1.35  # bigger
+    base_x, base_y = width/2, height/2
+    tilt = face.head_tilt * scale
+    w, h = 170*scale, 250*scale
+
+    # shadow
+    p.polygon("shadow", [base_x - w, base_y + h*0.65,
+                         base_x + w, base_y + h*0.65,
+                         base_x + w*0.85, base_y + h*0.8,
+                         base_x - w*0.85, base_y + h*0.8],
+              fill="#0a0a0a", outline="", smooth=True)
+
+    # body
+    front = "#e8dcc8"; side = "#cdbb9b"; line = "#8b7355"
+    p.polygon("back", [base_x - w*0.75 + tilt, base_y - h,
+                       base_x + w*0.75 + tilt, base_y - h,
+                       base_x + w + tilt,      base_y + h*0.45,
+                       base_x - w + tilt,      base_y + h*0.45],
+              fill=side, outline=line, width=int(2*scale))
+    p.rectangle("front", (base_x-w, base_y-h, base_x+w, base_y+h*0.45),
+                fill=front, outline=line, width=int(3*scale))
+
+    # bezel
+    screen_w = w*0.68
+    screen_h = screen_w*(342/512)
+    p.rectangle("bezel", (base_x-screen_w, base_y-h*0.78,
+                          base_x+screen_w, base_y-h*0.78+screen_h),
+                fill="#111", outline="#000", width=int(3*scale))
+
+    # inner screen tint: green when listening, warm when idle, teal when speaking
+    tint = "#ccffcc" if face.is_listening else ("#ffd9b3" if not face.is_speaking else "#b3ffec")
+    p.rectangle("screen", (base_x-screen_w*0.88, base_y-h*0.71,
+                           base_x+screen_w*0.88, base_y-h*0.78+screen_h*0.88),
+                fill=tint, outline="#666", width=int(2*scale))
+
+    # eyes: a slit when blinking, the left one also when winking
+    eye_y = base_y - h*0.48
+    eye_size = max(10, int(14*scale))
+    eofy = face.eye_offset_y*scale
+    eyes = (("left", base_x - screen_w*0.36 + face.eye_offset_x*scale, face.wink_left),
+            ("right", base_x + screen_w*0.36 + face.eye_offset_x*scale, False))
+    for side_, cx, wink in eyes:
+        if face.blink_progress > 0.0 or wink:
+            p.line(f"eye_{side_}_closed", (cx - eye_size, eye_y+eofy, cx + eye_size, eye_y+eofy),
+                   fill="#000", width=int(3*scale))
+        else:
+            p.oval(f"eye_{side_}", (cx-eye_size, eye_y+eofy-eye_size,
+                                    cx+eye_size, eye_y+eofy+eye_size),
+                   fill="#000", outline="")
+
+    # mouth (smile curve + open); the arc bends up to -150 when smiling
+    mouth_y = base_y - h*0.26
+    mouth_w = screen_w*0.48
+    mouth_h = 26*scale + face.mouth_open*22*scale
+    p.arc("mouth", (base_x - mouth_w, mouth_y, base_x + mouth_w, mouth_y + mouth_h),
+          start=0, extent=-180 + face.is_smiling*30,
+          style="arc", outline="#000", width=int(4*scale))
+
+    # base
+    p.rectangle("foot", (base_x - w*0.85, base_y + h*0.45,
+                         base_x + w*0.85, base_y + h*0.56),
+                fill=side, outline=line, width=int(2*scale))
+
+
+DRAW = {"eq2": draw_eq2, "happy": draw_happy, "live": draw_live}
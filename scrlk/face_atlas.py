@@ -0,0 +1,378 @@
+"""
+Pre-rendered Macintosh faces: one image per animation state.
+
+A face in scrlk.face only ever shows a small set of states: eyes open,
+blinking or winking, a few mouth openings, the screen tint for the mood
+and a few gaze directions. FaceAtlas renders every combination once
+per style and canvas size with PIL into one palette image (a sheet of
+equal frames), each frame cropped to the area that differs between
+states (eyes, mouth, screen). What never changes is one base image.
+Both are kept in memory and, with a cache_dir, as PNGs so the next
+start skips the baking.
+
+SpriteFace puts it on a Tk canvas: the base image once and one frame
+image above it that is switched with itemconfig(image=...) when the
+state changes, instead of a dozen vector items. The atlas is baked on
+a background thread; until it is ready (or without Pillow) the face is
+drawn with the vector CanvasFace.
+
+    self.face_view = SpriteFace(self.canvas, "eq2", self.canvas_w, self.canvas_h, bg="#1a1a1a")
+    ...
+    self.face_view.draw(self)          # every animation tick
+
+Continuous values are snapped to the nearest level: TALK_LEVELS mouth
+openings, SMILE_LEVELS smiles and three gaze directions (left, ahead,
+right). The head does not tilt in the sprites: tilting moves the whole
+body, which would make every frame the size of the whole Mac.
+"""
+import collections
+import hashlib
+import math
+import os
+import sys
+import threading
+import time
+import types
+
+try:
+    from PIL import Image, ImageColor, PngImagePlugin
+    PIL_OK = True
+except Exception:
+    PIL_OK = False
+
+from scrlk.face import (CanvasFace, ImagePainter, BoundsPainter, DRAW, EQ2_SCREEN)
+
+CACHE_DIR = os.getenv("SCRLK_FACE_CACHE",
+                      os.path.join(os.path.expanduser("~"), ".cache", "scrlk", "face"))
+ATLAS_VERSION = 1                   # bump when the face geometry changes
+TALK_LEVELS = 4
+SMILE_LEVELS = 3
+GAZE = (-1, 0, 1)                   # left, ahead, right
+GAZE_SNAP = 4.0                     # eye_offset_x beyond this looks sideways
+GAZE_EYE = 12.0                     # eye_offset_x drawn for a sideways look
+PHOTOS = 48                         # Tk images kept converted (LRU)
+
+
+def _level(value, levels):
+    return max(0, min(levels - 1, int(round(value * (levels - 1)))))
+
+
+def _gaze(face):
+    x = face.eye_offset_x
+    return -1 if x < -GAZE_SNAP else (1 if x > GAZE_SNAP else 0)
+
+
+def _look(g):
+    return dict(eye_offset_x=g * GAZE_EYE, eye_offset_y=0.0, head_tilt=0.0)
+
+
+# -------------------------
+# states per style: key(face) -> hashable, state(key) -> face to draw
+# -------------------------
+EQ2_MOODS = (None,) + tuple(EQ2_SCREEN)
+
+
+def _eq2_key(face):
+    eyes = 1 if face.blink_active else (2 if face.wink_active else 0)
+    if face.is_speaking:
+        mouth = (True, _level(face.mouth_open_amount, TALK_LEVELS))
+    else:
+        mouth = (False, _level(face.expression_smile, SMILE_LEVELS))
+    mood = face.mood if face.mood in EQ2_SCREEN else None
+    return (eyes,) + mouth + (mood, _gaze(face))
+
+
+def _eq2_keys():
+    mouths = [(True, i) for i in range(TALK_LEVELS)] + [(False, i) for i in range(SMILE_LEVELS)]
+    return [(eyes,) + mouth + (mood, g)
+            for eyes in range(3) for mouth in mouths for mood in EQ2_MOODS for g in GAZE]
+
+
+def _eq2_state(key):
+    eyes, talking, level, mood, g = key
+    return types.SimpleNamespace(
+        mood=mood or "idle", blink_active=eyes == 1, wink_active=eyes == 2,
+        is_speaking=talking,
+        mouth_open_amount=level / (TALK_LEVELS - 1) if talking else 0.0,
+        expression_smile=0.0 if talking else level / (SMILE_LEVELS - 1), **_look(g))
+
+
+def _happy_key(face):
+    return _level(face.mouth_open, TALK_LEVELS), _gaze(face)
+
+
+def _happy_keys():
+    return [(m, g) for m in range(TALK_LEVELS) for g in GAZE]
+
+
+def _happy_state(key):
+    m, g = key
+    return types.SimpleNamespace(mouth_open=m / (TALK_LEVELS - 1), **_look(g))
+
+
+def _live_key(face):
+    eyes = 1 if face.blink_progress > 0.0 else (2 if face.wink_left else 0)
+    tint = 1 if face.is_listening else (2 if face.is_speaking else 0)
+    return (eyes, tint, _level(face.mouth_open, TALK_LEVELS),
+            _level(face.is_smiling, SMILE_LEVELS), _gaze(face))
+
+
+def _live_keys():
+    return [(eyes, tint, m, s, g) for eyes in range(3) for tint in range(3)
+            for m in range(TALK_LEVELS) for s in range(SMILE_LEVELS) for g in GAZE]
+
+
+def _live_state(key):
+    eyes, tint, m, s, g = key
+    return types.SimpleNamespace(
+        blink_progress=1.0 if eyes == 1 else 0.0, wink_left=eyes == 2,
+        is_listening=tint == 1, is_speaking=tint == 2,
+        mouth_open=m / (TALK_LEVELS - 1), is_smiling=s / (SMILE_LEVELS - 1), **_look(g))
+
+
+STATES = {
+    "eq2": (_eq2_key, _eq2_keys, _eq2_state),
+    "happy": (_happy_key, _happy_keys, _happy_state),
+    "live": (_live_key, _live_keys, _live_state),
+}
+
+
+# -------------------------
+# atlas
+# -------------------------
+class _Recorder:
+    """Painter that keeps what each part was drawn with."""
+
+    def __init__(self):
+        self.parts = {}
+
+    def _add(self, kind, key, coords, options):
+        self.parts[key] = (kind, tuple(coords), tuple(sorted(options.items())))
+
+    def polygon(self, key, coords, **o): self._add("polygon", key, coords, o)
+    def rectangle(self, key, coords, **o): self._add("rectangle", key, coords, o)
+    def oval(self, key, coords, **o): self._add("oval", key, coords, o)
+    def line(self, key, coords, **o): self._add("line", key, coords, o)
+    def arc(self, key, coords, **o): self._add("arc", key, coords, o)
+
+
+def _int_box(box, width, height):
+    return (max(0, math.floor(box[0])), max(0, math.floor(box[1])),
+            min(width, math.ceil(box[2])), min(height, math.ceil(box[3])))
+
+
+class FaceAtlas:
+    """
+    Every state of one face style at one canvas size.
+
+    base      palette image of the whole face at `base_box` (canvas coords)
+    frame(k)  palette image of state k at `box`, the part that changes
+    key(face) snaps an app's animation state to a key
+    """
+
+    def __init__(self, style, width, height, bg, base, base_box, sheet, box, **draw_kwargs):
+        self.style = style
+        self.width, self.height = width, height
+        self.bg = bg
+        self.base, self.base_box = base, base_box
+        self.sheet, self.box = sheet, box
+        self.draw_kwargs = draw_kwargs
+        self._key, keys, _ = STATES[style]
+        self.keys = keys()
+        self.slot = {k: i for i, k in enumerate(self.keys)}
+        self.frame_size = (box[2] - box[0], box[3] - box[1])
+        self.cols = sheet.width // self.frame_size[0]
+
+    def key(self, face):
+        return self._key(face)
+
+    def frame(self, key):
+        i = self.slot[key]
+        fw, fh = self.frame_size
+        x, y = (i % self.cols) * fw, (i // self.cols) * fh
+        return self.sheet.crop((x, y, x + fw, y + fh))
+
+    @property
+    def nbytes(self):
+        return self.sheet.width * self.sheet.height + self.base.width * self.base.height
+
+    # -------------------------
+    # baking / cache
+    # -------------------------
+    @classmethod
+    def build(cls, style, width, height, bg, **draw_kwargs):
+        if not PIL_OK:
+            raise RuntimeError("Pillow saknas")
+        draw = DRAW[style]
+        _, keys, state = STATES[style]
+        keys = keys()
+
+        # which parts differ between states, and where they are
+        records = []
+        for k in keys:
+            rec = _Recorder()
+            draw(rec, width, height, state(k), **draw_kwargs)
+            records.append(rec.parts)
+        names = set().union(*records)
+        moving = {n for n in names if len({r.get(n) for r in records}) > 1}
+        whole, changing = BoundsPainter(), BoundsPainter()
+        for parts in records:
+            for name, (kind, coords, options) in parts.items():
+                width_ = dict(options).get("width", 1)
+                whole._add(coords, width_)
+                if name in moving:
+                    changing._add(coords, width_)
+        base_box = _int_box(whole.box, width, height)
+        box = _int_box(changing.box or whole.box, width, height)
+
+        palette = {}                 # rgb -> index, background first
+        def ink(color):
+            rgb = ImageColor.getrgb(color)[:3]
+            if rgb not in palette:
+                if len(palette) >= 256:
+                    raise ValueError("more than 256 colours in a face")
+                palette[rgb] = len(palette)
+            return palette[rgb]
+        ink(bg)
+
+        base = Image.new("P", (base_box[2] - base_box[0], base_box[3] - base_box[1]), 0)
+        draw(ImagePainter(base, ink, offset=base_box[:2]), width, height, state(keys[0]),
+             **draw_kwargs)
+
+        fw, fh = box[2] - box[0], box[3] - box[1]
+        cols = max(1, int(math.ceil(math.sqrt(len(keys) * fh / fw))))
+        rows = int(math.ceil(len(keys) / cols))
+        sheet = Image.new("P", (cols * fw, rows * fh), 0)
+        frame = Image.new("P", (fw, fh), 0)
+        for i, k in enumerate(keys):
+            frame.paste(0, (0, 0, fw, fh))
+            draw(ImagePainter(frame, ink, offset=box[:2]), width, height, state(k), **draw_kwargs)
+            sheet.paste(frame, ((i % cols) * fw, (i // cols) * fh))
+        flat = [c for rgb in palette for c in rgb]
+        flat += [0] * (768 - len(flat))
+        base.putpalette(flat)
+        sheet.putpalette(flat)
+        return cls(style, width, height, bg, base, base_box, sheet, box, **draw_kwargs)
+
+    @staticmethod
+    def cache_path(cache_dir, style, width, height, bg, **draw_kwargs):
+        raw = repr((ATLAS_VERSION, style, width, height, bg, TALK_LEVELS, SMILE_LEVELS,
+                    GAZE, sorted(draw_kwargs.items()))).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()[:16]
+        return os.path.join(cache_dir, f"{style}_{width}x{height}_{digest}.png")
+
+    @classmethod
+    def load_or_build(cls, style, width, height, bg, cache_dir=CACHE_DIR, **draw_kwargs):
+        """From cache_dir if it is there, else baked (and saved there)."""
+        path = cls.cache_path(cache_dir, style, width, height, bg, **draw_kwargs) \
+            if cache_dir else None
+        base_path = path and path[:-len(".png")] + "_base.png"
+        if path and os.path.exists(path) and os.path.exists(base_path):
+            try:
+                sheet, base = Image.open(path), Image.open(base_path)
+                sheet.load(); base.load()
+                box = tuple(int(v) for v in sheet.info["box"].split(","))
+                base_box = tuple(int(v) for v in base.info["box"].split(","))
+                return cls(style, width, height, bg, base, base_box, sheet, box, **draw_kwargs)
+            except Exception as e:
+                print(f"[FACE] atlas {path} oläslig ({e}), bakar om", file=sys.stderr)
+        atlas = cls.build(style, width, height, bg, **draw_kwargs)
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                for image, box, dest in ((atlas.base, atlas.base_box, base_path),
+                                         (atlas.sheet, atlas.box, path)):
+                    info = PngImagePlugin.PngInfo()
+                    info.add_text("box", ",".join(map(str, box)))
+                    image.save(dest + ".tmp", format="PNG", pnginfo=info)
+                    os.replace(dest + ".tmp", dest)
+            except OSError as e:
+                print(f"[FACE] kunde inte spara atlas: {e}", file=sys.stderr)
+        return atlas
+
+
+# -------------------------
+# Tk view
+# -------------------------
+class SpriteFace:
+    """
+    A face on a Tk canvas from a FaceAtlas: a base image and one frame
+    image item that changes with the state.
+    draw(face) every animation tick; with sprites=False (or no Pillow)
+    it is the vector CanvasFace. `photo` turns the atlas's palette images
+    into what create_image() takes (by default an ImageTk.PhotoImage of
+    an RGB copy; scrlk.fb.FbCanvas takes them as they are).
+    """
+
+    def __init__(self, canvas, style, width, height, bg, sprites=True, cache_dir=CACHE_DIR,
+                 photo=None, **draw_kwargs):
+        self.canvas = canvas
+        self.style = style
+        self.width, self.height = width, height
+        self.bg = bg
+        self.draw_kwargs = draw_kwargs
+        self.painter = CanvasFace(canvas)
+        self.atlas = None
+        self.bake_ms = None
+        self._photo = photo
+        self._photos = collections.OrderedDict()
+        self._base = None             # PhotoImage of atlas.base (kept referenced)
+        self._item = None
+        self._key = None
+        if sprites and PIL_OK:
+            threading.Thread(target=self._bake, args=(cache_dir,), daemon=True,
+                             name="face-atlas").start()
+
+    def _bake(self, cache_dir):
+        t0 = time.perf_counter()
+        try:
+            self.atlas = FaceAtlas.load_or_build(self.style, self.width, self.height, self.bg,
+                                                 cache_dir=cache_dir, **self.draw_kwargs)
+            self.bake_ms = (time.perf_counter() - t0) * 1000.0
+        except Exception as e:
+            print(f"[FACE] atlas misslyckades ({e}), ritar vektorer", file=sys.stderr)
+
+    def draw(self, face):
+        atlas = self.atlas
+        self.painter.configure(bg=self.bg)
+        if atlas is None:
+            with self.painter.frame():
+                DRAW[self.style](self.painter, self.width, self.height, face, **self.draw_kwargs)
+            return
+        key = atlas.key(face)
+        if key == self._key:
+            return
+        image = self._image(atlas, key)
+        if self._item is None:
+            self.painter.clear()       # the vector face drawn while baking
+            self._base = self._to_photo(atlas.base)
+            self.canvas.create_image(atlas.base_box[0], atlas.base_box[1], image=self._base,
+                                     anchor="nw")
+            self._item = self.canvas.create_image(atlas.box[0], atlas.box[1], image=image,
+                                                  anchor="nw")
+            self.painter.calls += 2
+        else:
+            self.canvas.itemconfig(self._item, image=image)
+            self.painter.calls += 1
+        self._key = key
+
+    @property
+    def calls(self):
+        return self.painter.calls
+
+    def _image(self, atlas, key):
+        image = self._photos.get(key)
+        if image is not None:
+            self._photos.move_to_end(key)
+            return image
+        image = self._to_photo(atlas.frame(key))
+        self._photos[key] = image
+        while len(self._photos) > PHOTOS:
+            self._photos.popitem(last=False)
+        return image
+
+    def _to_photo(self, image):
+        if self._photo is None:
+            from PIL import ImageTk
+            return ImageTk.PhotoImage(image.convert("RGB"))
+        return self._photo(image)             # the palette image as it is
@@ -0,0 +1,522 @@
+"""
+Drawing straight to the Linux framebuffer, without X or Tk.
+
+The CRT is a 512x342 DPI mode where only green bit 2 of RGB565 is wired
+to the video signal (PI4/overlay/dpi-g2only.dts). A lit pixel is 0x0200,
+a dark one 0x0000, as in PI4/frame-buffer/fb_mono_g2.c.
+
+    Framebuffer   mmap of /dev/fb0; show(frame) packs a 1-bit frame
+                  into G2 pixels with numpy straight into the mapping,
+                  only the tiles that differ from what that page holds,
+                  and with double=True draws into a second page of the
+                  virtual screen and pans to it (page flipping)
+    FakeFb        a plain file plus an ioctl shim that answers like the
+                  fbdev driver (Framebuffer.fake()), for tests and
+                  benchmarks
+    FbCanvas      the part of the tkinter Canvas API the apps draw with
+                  (create_*, coords, itemconfig, delete, tag_raise, ...),
+                  kept as a display list and rendered with PIL; so
+                  scrlk.face (CanvasFace, SpriteFace) and the Zork CRT
+                  layers draw on it unchanged
+
+    fb = Framebuffer()                          # $SCRLK_FB or /dev/fb0
+                                                # ($SCRLK_FB_DOUBLE=1: page flipping)
+    canvas = FbCanvas(fb.width, fb.height, bg="#111")
+    face = SpriteFace(canvas, "live", fb.width, fb.height, bg="#111", photo=lambda im: im)
+    face.draw(state)
+    canvas.flush(fb)                            # only if something changed
+
+Frames are numpy arrays of shape (height, width), true = lit, or PIL
+images (thresholded at 50% grey). Colours on the canvas are lit when
+their luminance is at least 50%; pictures are ordered-dithered.
+"""
+import fcntl
+import functools
+import mmap
+import os
+import stat
+import struct
+import sys
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageFont
+    PIL_OK = True
+except Exception:
+    PIL_OK = False
+
+DEVICE = os.getenv("SCRLK_FB", "/dev/fb0")
+DOUBLE = os.getenv("SCRLK_FB_DOUBLE", "0") == "1"     # page flipping only with SCRLK_FB_DOUBLE=1
+WIDTH, HEIGHT = 512, 342              # the Macintosh CRT
+G2 = 0x0200                           # RGB565 green bit 2, the only wired pin
+THRESHOLD = 128                       # grey level from which a pixel is lit
+
+TILE = (64, 19)                       # damage tile, w x h (342 = 18 rows of 19)
+
+# linux/fb.h
+FBIOGET_VSCREENINFO = 0x4600
+FBIOPUT_VSCREENINFO = 0x4601
+FBIOGET_FSCREENINFO = 0x4602
+FBIOPAN_DISPLAY = 0x4606
+FBIO_WAITFORVSYNC = 0x40044620
+_VINFO = struct.Struct("=8I")         # xres, yres, xres_virtual, yres_virtual,
+                                      # xoffset, yoffset, bits_per_pixel, grayscale
+_FINFO = struct.Struct("@16sLIIIIHHHI")   # ... line_length last
+VINFO_SIZE, FINFO_SIZE = 160, 80      # sizeof(struct fb_{var,fix}_screeninfo), 64-bit
+
+
+# -------------------------
+# 1-bit frames
+# -------------------------
+_BAYER = np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]],
+                  dtype=np.uint16) * 16 + 8
+
+
+def to_bits(frame, threshold=THRESHOLD):
+    """numpy bool array (height, width), true = lit, from an array or a PIL image."""
+    if isinstance(frame, np.ndarray):
+        return frame if frame.dtype == np.bool_ else frame != 0
+    if frame.mode == "1":
+        return np.asarray(frame, dtype=np.bool_)
+    return np.asarray(frame.convert("L")) >= threshold
+
+
+def dither(image):
+    """A picture as an "L" image of only 0 and 255 (4x4 ordered dither).
+    Unlike error diffusion a pixel depends only on its own grey level, so
+    a change stays local and a still picture never shimmers."""
+    grey = np.asarray(image.convert("L"), dtype=np.uint16)
+    h, w = grey.shape
+    tile = np.tile(_BAYER, (h // 4 + 1, w // 4 + 1))[:h, :w]
+    return Image.fromarray(((grey >= tile) * 255).astype(np.uint8), "L")
+
+
+def pack_g2(bits, out=None):
+    """RGB565 pixels (little-endian uint16) with only G2 set where `bits` is true."""
+    if out is None:
+        out = np.empty(bits.shape, dtype="<u2")
+    np.multiply(bits, G2, out=out, casting="unsafe")
+    return out
+
+
+# -------------------------
+# framebuffer
+# -------------------------
+def _spans(row):
+    """(start, end) of the runs of true in a 1-d bool array."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], row.view(np.int8), [0]))))
+    return zip(edges[0::2], edges[1::2])
+
+
+class Framebuffer:
+    """
+    The mapped framebuffer, geometry from the driver.
+
+    tile     (w, h) of the damage tiles: show() compares the frame with
+             what the target page holds and writes only the tiles that
+             differ, merged into runs per tile row. (width, 1) writes
+             changed rows; None rewrites every frame whole.
+    double   page flipping: the virtual screen is made two screens high
+             (FBIOPUT_VSCREENINFO), frames are drawn into the hidden page
+             and shown with FBIOPAN_DISPLAY. Drivers that refuse a taller
+             virtual screen get a single page and a note on stderr.
+    vsync    wait for the vertical blank after a pan (FBIO_WAITFORVSYNC),
+             so the page just hidden is no longer being scanned out
+    ioctl    fcntl.ioctl, or a stand-in such as FakeFb
+    """
+
+    def __init__(self, path=DEVICE, tile=TILE, double=DOUBLE, vsync=True, ioctl=None):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR)
+        try:
+            if ioctl is None:
+                if not stat.S_ISCHR(os.fstat(self.fd).st_mode):
+                    raise ValueError(f"{path} is not a framebuffer device "
+                                     "(Framebuffer.fake() for a file)")
+                ioctl = fcntl.ioctl
+            self.ioctl = ioctl
+            self.vinfo = self._get_vinfo()
+            xres, yres, _, yres_virtual, _, _, bpp, _ = _VINFO.unpack_from(self.vinfo)
+            if bpp != 16:
+                raise ValueError(f"{path}: {bpp} bpp, the G2 packing needs 16 (fbset -depth 16)")
+            self.pages = 1
+            if double:
+                if yres_virtual < 2 * yres:
+                    yres_virtual = self._grow(xres, yres)
+                if yres_virtual >= 2 * yres:
+                    self.pages = 2
+                else:
+                    print(f"[FB] {path}: ingen plats för en andra sida, enkelbuffrat",
+                          file=sys.stderr)
+            finfo = bytearray(FINFO_SIZE)
+            self.ioctl(self.fd, FBIOGET_FSCREENINFO, finfo)
+            stride = _FINFO.unpack_from(finfo)[-1] or xres * 2
+            self.width, self.height, self.stride = xres, yres, stride
+            self.size = stride * yres * self.pages
+            self.mm = mmap.mmap(self.fd, self.size, mmap.MAP_SHARED,
+                                mmap.PROT_READ | mmap.PROT_WRITE)
+        except Exception:
+            os.close(self.fd)
+            raise
+        # each page's visible pixels, rows `stride` bytes apart
+        self._pixels = [np.ndarray((yres, xres), dtype="<u2", buffer=self.mm,
+                                   offset=page * stride * yres, strides=(stride, 2))
+                        for page in range(self.pages)]
+        self._last = [None] * self.pages      # the bits each page holds (None = unknown)
+        self.page = _VINFO.unpack_from(self.vinfo)[5] // yres if self.pages > 1 else 0
+        self.vsync = vsync
+        self.tile = tile
+        if tile is not None:
+            self._ty = np.arange(0, yres, tile[1])
+            self._tx = np.arange(0, xres, tile[0])
+        self.frames = 0                        # show() calls that changed the screen
+        self.bytes_written = 0
+
+    @classmethod
+    def fake(cls, path, width=WIDTH, height=HEIGHT, stride=None, **kwargs):
+        """A Framebuffer on a file, through a FakeFb ioctl shim."""
+        return cls(path, ioctl=FakeFb(path, width, height, stride), **kwargs)
+
+    def _get_vinfo(self):
+        vinfo = bytearray(VINFO_SIZE)
+        self.ioctl(self.fd, FBIOGET_VSCREENINFO, vinfo)
+        return vinfo
+
+    def _grow(self, xres, yres):
+        vinfo = bytearray(self.vinfo)
+        struct.pack_into("=2I", vinfo, 8, xres, 2 * yres)    # xres/yres_virtual
+        try:
+            self.ioctl(self.fd, FBIOPUT_VSCREENINFO, vinfo)
+        except OSError:
+            pass
+        self.vinfo = self._get_vinfo()
+        return _VINFO.unpack_from(self.vinfo)[3]
+
+    @property
+    def pixels(self):
+        """The page on screen."""
+        return self._pixels[self.page]
+
+    def show(self, frame):
+        """
+        Put a 1-bit frame (array or PIL image of the screen size) on the
+        screen. Returns the bytes written to the framebuffer.
+        """
+        bits = to_bits(frame)
+        if bits.shape != (self.height, self.width):
+            raise ValueError(f"frame is {bits.shape[1]}x{bits.shape[0]}, "
+                             f"screen {self.width}x{self.height}")
+        shown = self._last[self.page]
+        if shown is not None and np.array_equal(bits, shown):
+            return 0
+        target = 1 - self.page if self.pages > 1 else self.page
+        written = self._write(target, bits)
+        if target != self.page:
+            self._pan(target)
+        self.frames += 1
+        self.bytes_written += written
+        return written
+
+    def _write(self, page, bits):
+        pixels, last = self._pixels[page], self._last[page]
+        self._last[page] = bits.copy()
+        if last is None or self.tile is None:
+            pack_g2(bits, out=pixels)
+            return bits.size * 2
+        # a tile is dirty if any pixel in it differs from what the page holds;
+        # rows first (cheap), columns only within the tile rows that changed
+        diff = bits != last
+        tile_rows = np.logical_or.reduceat(diff.any(axis=1), self._ty)
+        tw, th = self.tile
+        if tw >= self.width:
+            # whole rows: one gather/scatter for all of them
+            ys = (np.flatnonzero(tile_rows)[:, None] * th + np.arange(th)).ravel()
+            ys = ys[ys < self.height]
+            pixels[ys] = pack_g2(bits[ys])
+            return ys.size * self.width * 2
+        written = 0
+        for ty in np.flatnonzero(tile_rows):
+            y0, y1 = ty * th, min((ty + 1) * th, self.height)
+            tiles = np.logical_or.reduceat(diff[y0:y1].any(axis=0), self._tx)
+            for a, b in _spans(tiles):
+                x0, x1 = a * tw, min(b * tw, self.width)
+                pack_g2(bits[y0:y1, x0:x1], out=pixels[y0:y1, x0:x1])
+                written += (y1 - y0) * (x1 - x0) * 2
+        return written
+
+    def _pan(self, page):
+        struct.pack_into("=2I", self.vinfo, 16, 0, page * self.height)   # x/yoffset
+        self.ioctl(self.fd, FBIOPAN_DISPLAY, self.vinfo)
+        self.page = page
+        if self.vsync:
+            try:
+                self.ioctl(self.fd, FBIO_WAITFORVSYNC, struct.pack("I", 0))
+            except OSError:
+                self.vsync = False            # not every driver has it
+
+    def read(self):
+        """What is on the screen, as a bool array."""
+        return (self.pixels & G2) != 0
+
+    def clear(self):
+        for page, pixels in enumerate(self._pixels):
+            pixels[:] = 0
+            self._last[page] = np.zeros((self.height, self.width), dtype=np.bool_)
+
+    def close(self):
+        if self.mm is not None:
+            del self._pixels
+            self.mm.close()
+            self.mm = None
+            os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeFb:
+    """
+    ioctl stand-in for a file posing as /dev/fb0: answers the screen-info
+    ioctls for a width x height 16 bpp screen, grows the file when the
+    virtual screen is made taller, and records pans and vsync waits.
+    """
+
+    def __init__(self, path, width=WIDTH, height=HEIGHT, stride=None, max_pages=2):
+        self.path = path
+        self.stride = stride or width * 2
+        self.max_pages = max_pages
+        self.vinfo = bytearray(VINFO_SIZE)
+        _VINFO.pack_into(self.vinfo, 0, width, height, width, height, 0, 0, 16, 0)
+        self.pans = []                # yoffset of every FBIOPAN_DISPLAY
+        self.vsyncs = 0
+        self._fit()
+
+    def _fit(self):
+        size = self.stride * _VINFO.unpack_from(self.vinfo)[3]
+        with open(self.path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+
+    def __call__(self, fd, request, arg, mutate=True):
+        xres, yres, _, yres_virtual, _, _, _, _ = _VINFO.unpack_from(self.vinfo)
+        if request == FBIOGET_VSCREENINFO:
+            arg[:VINFO_SIZE] = self.vinfo
+        elif request == FBIOPUT_VSCREENINFO:
+            want = _VINFO.unpack_from(arg)[3]
+            if want > yres * self.max_pages:
+                raise OSError(22, "Invalid argument")
+            struct.pack_into("=I", self.vinfo, 12, max(want, yres))
+            self._fit()
+        elif request == FBIOGET_FSCREENINFO:
+            _FINFO.pack_into(arg, 0, b"fake-g2", 0, self.stride * yres_virtual,
+                             0, 0, 2, 0, 1, 0, self.stride)
+        elif request == FBIOPAN_DISPLAY:
+            xoffset, yoffset = struct.unpack_from("=2I", arg, 16)
+            if yoffset + yres > yres_virtual:
+                raise OSError(22, "Invalid argument")
+            struct.pack_into("=2I", self.vinfo, 16, xoffset, yoffset)
+            self.pans.append(yoffset)
+        elif request == FBIO_WAITFORVSYNC:
+            self.vsyncs += 1
+        else:
+            raise OSError(25, "Inappropriate ioctl for device")
+        return 0
+
+    def visible(self):
+        """The bits of the page the fake display shows (read from the file)."""
+        xres, yres, _, yres_virtual, _, yoffset, _, _ = _VINFO.unpack_from(self.vinfo)
+        raw = np.fromfile(self.path, dtype="<u2", count=self.stride // 2 * yres_virtual)
+        rows = raw.reshape(yres_virtual, self.stride // 2)
+        return (rows[yoffset:yoffset + yres, :xres] & G2) != 0
+
+
+# -------------------------
+# Tk Canvas stand-in
+# -------------------------
+_ANCHOR = {"n": "mt", "s": "mb", "e": "rm", "w": "lm", "ne": "rt", "nw": "lt",
+           "se": "rb", "sw": "lb", "center": "mm"}
+_FONTS = {}
+
+
+def _font(spec):
+    size = 12
+    if isinstance(spec, (tuple, list)) and len(spec) > 1:
+        size = abs(int(spec[1])) or 12
+    if size not in _FONTS:
+        try:
+            _FONTS[size] = ImageFont.truetype("DejaVuSansMono.ttf", size)
+        except OSError:
+            _FONTS[size] = ImageFont.load_default(size)
+    return _FONTS[size]
+
+
+@functools.lru_cache(maxsize=256)
+def _grey(color):
+    """A Tk colour as a grey level (ITU-R 601 luma), None for transparent."""
+    if color in (None, ""):
+        return None
+    return Image.new("RGB", (1, 1), color).convert("L").getpixel((0, 0))
+
+
+class FbCanvas:
+    """
+    Enough of tkinter.Canvas for the apps' drawing code, rendered with PIL
+    into a grey image and thresholded to 1 bit. Items keep Tk's stacking
+    and tags; image items take PIL images (pass photo=lambda im: im to
+    SpriteFace, return the PIL image where an app makes a PhotoImage).
+    """
+
+    def __init__(self, width=WIDTH, height=HEIGHT, bg="black"):
+        if not PIL_OK:
+            raise RuntimeError("Pillow saknas")
+        self.width, self.height = width, height
+        self.bg = bg
+        self._items = {}              # id -> [kind, coords, options, tags]
+        self._order = []              # bottom to top
+        self._next = 1
+        self.dirty = True
+        self.renders = 0
+
+    # items
+    def _create(self, kind, coords, options):
+        if len(coords) == 1:
+            coords = coords[0]
+        tags = options.pop("tags", ())
+        tags = (tags,) if isinstance(tags, str) else tuple(tags)
+        ident = self._next
+        self._next += 1
+        self._items[ident] = [kind, [float(v) for v in coords], self._options(kind, options), tags]
+        self._order.append(ident)
+        self.dirty = True
+        return ident
+
+    def _options(self, kind, options):
+        if kind == "image" and "image" in options:
+            options["image"] = self._mono(options["image"])
+        return options
+
+    @staticmethod
+    def _mono(image):
+        # flat-colour images (palette sprites) keep their greys for the
+        # threshold, pictures are dithered; the alpha channel is the mask
+        mask = image.getchannel("A") if image.mode in ("RGBA", "LA", "PA") else None
+        grey = image.convert("L") if image.mode in ("P", "1", "L") else dither(image)
+        return grey, mask
+
+    def create_line(self, *coords, **options): return self._create("line", coords, options)
+    def create_rectangle(self, *coords, **options): return self._create("rectangle", coords, options)
+    def create_oval(self, *coords, **options): return self._create("oval", coords, options)
+    def create_polygon(self, *coords, **options): return self._create("polygon", coords, options)
+    def create_arc(self, *coords, **options): return self._create("arc", coords, options)
+    def create_text(self, *coords, **options): return self._create("text", coords, options)
+    def create_image(self, *coords, **options): return self._create("image", coords, options)
+
+    def find_withtag(self, tag):
+        if tag == "all":
+            return tuple(self._order)
+        if isinstance(tag, int):
+            return (tag,) if tag in self._items else ()
+        return tuple(i for i in self._order if tag in self._items[i][3])
+
+    def coords(self, tag, *coords):
+        ids = self.find_withtag(tag)
+        if not coords:
+            return list(self._items[ids[0]][1]) if ids else []
+        if len(coords) == 1:
+            coords = coords[0]
+        for i in ids:
+            self._items[i][1] = [float(v) for v in coords]
+        self.dirty = True
+
+    def itemconfig(self, tag, **options):
+        for i in self.find_withtag(tag):
+            item = self._items[i]
+            item[2].update(self._options(item[0], dict(options)))
+        self.dirty = True
+
+    itemconfigure = itemconfig
+
+    def delete(self, *tags):
+        for tag in tags:
+            for i in self.find_withtag(tag):
+                del self._items[i]
+                self._order.remove(i)
+        self.dirty = True
+
+    def tag_raise(self, tag, above=None):
+        self._restack(tag, above, raise_=True)
+
+    def tag_lower(self, tag, below=None):
+        self._restack(tag, below, raise_=False)
+
+    def _restack(self, tag, other, raise_):
+        moving = self.find_withtag(tag)
+        if not moving:
+            return
+        rest = [i for i in self._order if i not in moving]
+        if other is None:
+            self._order = rest + list(moving) if raise_ else list(moving) + rest
+        else:
+            ref = [j for j, i in enumerate(rest) if i in self.find_withtag(other)]
+            if not ref:
+                return
+            at = ref[-1] + 1 if raise_ else ref[0]
+            self._order = rest[:at] + list(moving) + rest[at:]
+        self.dirty = True
+
+    def configure(self, **options):
+        if "bg" in options and options["bg"] != self.bg:
+            self.bg = options["bg"]
+            self.dirty = True
+
+    config = configure
+
+    def winfo_width(self): return self.width
+    def winfo_height(self): return self.height
+
+    # rendering
+    def render(self):
+        """The scene as an "L" image."""
+        from scrlk.face import ImagePainter
+        image = Image.new("L", (self.width, self.height), _grey(self.bg))
+        painter = ImagePainter(image, _grey)
+        draw = painter.draw
+        for i in self._order:
+            kind, coords, options, _ = self._items[i]
+            if options.get("state") == "hidden":
+                continue
+            if kind == "text":
+                draw.text(coords[:2], str(options.get("text", "")), fill=_grey(options.get("fill", "black")),
+                          font=_font(options.get("font")),
+                          anchor=_ANCHOR.get(options.get("anchor", "center"), "mm"))
+            elif kind == "image":
+                if options.get("image"):
+                    self._paste(image, coords, options)
+            else:
+                getattr(painter, kind)(i, coords, **options)
+        self.renders += 1
+        return image
+
+    @staticmethod
+    def _paste(image, coords, options):
+        grey, mask = options["image"]
+        w, h = grey.size
+        anchor = _ANCHOR.get(options.get("anchor", "center"), "mm")
+        x = coords[0] - {"l": 0, "m": w / 2, "r": w}[anchor[0]]
+        y = coords[1] - {"t": 0, "m": h / 2, "b": h}[anchor[1]]
+        image.paste(grey, (int(round(x)), int(round(y))), mask)
+
+    def bits(self):
+        return to_bits(self.render())
+
+    def flush(self, fb):
+        """Render and show on `fb` if anything changed since the last flush."""
+        if not self.dirty:
+            return False
+        fb.show(self.bits())
+        self.dirty = False
+        return True
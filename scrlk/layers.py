@@ -0,0 +1,51 @@
+"""
+Layered canvas scenes: rebuild a layer only when what it shows changed.
+
+A layer is a canvas tag. update(name, key, build) calls build(name) to
+create the layer's items (tagged `name`) the first time and whenever
+`key` differs from the last call; otherwise it does nothing. After the
+updates, restack() puts the layers back in their bottom-to-top order if
+any of them was rebuilt (new items land on top of the canvas).
+
+    layers = CanvasLayers(canvas, ("location", "scanlines", "face", "title"))
+    layers.update("scanlines", None, self.draw_scanlines)      # once
+    layers.update("location", self.game.room, self.draw_location_image)
+    layers.update("face", (blink, mouth), self.draw_face)     # animated
+    layers.restack()
+"""
+
+
+class CanvasLayers:
+    def __init__(self, canvas, order):
+        self.canvas = canvas
+        self.order = tuple(order)
+        self.rebuilds = {name: 0 for name in self.order}
+        self._keys = {}
+        self._lowest = None          # lowest layer rebuilt since the last restack()
+
+    def update(self, name, key, build):
+        """Rebuild layer `name` with build(name) if `key` changed. True if rebuilt."""
+        if name in self._keys and self._keys[name] == key:
+            return False
+        self.canvas.delete(name)
+        build(name)
+        self._keys[name] = key
+        self.rebuilds[name] += 1
+        i = self.order.index(name)
+        self._lowest = i if self._lowest is None else min(self._lowest, i)
+        return True
+
+    def invalidate(self, name=None):
+        """Force a rebuild of one layer (or all) on the next update()."""
+        if name is None:
+            self._keys.clear()
+        else:
+            self._keys.pop(name, None)
+
+    def restack(self):
+        # a rebuilt layer is on top: raising the layers above the lowest
+        # rebuilt one, in order, puts everything back
+        if self._lowest is not None:
+            for name in self.order[self._lowest + 1:]:
+                self.canvas.tag_raise(name)
+            self._lowest = None
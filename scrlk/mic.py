@@ -0,0 +1,249 @@
+"""
+Always-open microphone.
+
+One sounddevice InputStream is opened at boot and its callback writes
+int16 samples into a fixed-size ring buffer. Utterances are cut out of
+the ring, so every turn gets a few hundred ms of pre-roll from before
+speech was detected and there is no device open/close or ambient-noise
+calibration per turn.
+"""
+import threading
+import time
+
+import numpy as np
+
+from scrlk import trace
+
+try:
+    import sounddevice as sd
+except Exception:  # PortAudio missing etc.
+    sd = None
+
+try:
+    import webrtcvad
+except Exception:  # optional; energy-only endpointing without it
+    webrtcvad = None
+
+MIC_SR = 16000
+BLOCK_MS = 20
+RING_SECONDS = 30.0
+PREROLL_MS = 300
+VAD_AGGR = 2
+MIN_SPEECH_MS = 100     # shorter blips (clicks, a cough) are not an utterance
+PARTIAL_MS = 160        # pause long enough to hand out the audio so far (on_partial)
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 ring buffer.
+    Positions are absolute sample counts since start, so readers can
+    hold on to a position while the writer keeps going.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+        self.write_pos = 0
+
+    @property
+    def oldest_pos(self):
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.write_pos += n - self.capacity
+            n = self.capacity
+        i = self.write_pos % self.capacity
+        first = min(n, self.capacity - i)
+        self._data[i:i + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self.write_pos += n
+
+    def read(self, start, end=None):
+        """Copy of samples [start, end). start is clamped to what is still in the ring."""
+        end = self.write_pos if end is None else min(end, self.write_pos)
+        start = max(start, self.oldest_pos)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        i, j = start % self.capacity, end % self.capacity
+        if i < j:
+            return self._data[i:j].copy()
+        return np.concatenate((self._data[i:], self._data[:j]))
+
+
+class MicStream:
+    """
+    Persistent capture stream feeding a RingBuffer.
+
+    listen() endpoints on the ring and returns the utterance (with
+    pre-roll) as int16 numpy audio. A block counts as speech when it is
+    above the energy threshold and (if webrtcvad is installed) the VAD
+    agrees, so breathing, fans and clicks neither start nor prolong an
+    utterance. The noise floor is tracked continuously on quiet blocks
+    instead of being re-measured before every turn.
+
+    With an `echo_canceller` (scrlk.aec.EchoCanceller) every block is
+    echo-cancelled before it goes into the ring, so what the app itself
+    plays does not show up as speech.
+
+    With a `source` (scrlk.audio_io: a WAV file, a pipe, ...) start()
+    takes the audio from there instead of opening a device.
+    """
+
+    def __init__(self, samplerate=MIC_SR, device=None, ring_seconds=RING_SECONDS,
+                 block_ms=BLOCK_MS, energy_threshold=300, dynamic_ratio=1.5,
+                 echo_canceller=None, vad_aggressiveness=VAD_AGGR, source=None):
+        self.samplerate = samplerate
+        self.device = device
+        self.block = int(samplerate * block_ms / 1000)
+        self.ring = RingBuffer(int(samplerate * ring_seconds))
+        self.energy_threshold = energy_threshold   # min RMS (int16) counted as speech
+        self.dynamic_ratio = dynamic_ratio
+        self.echo_canceller = echo_canceller
+        self.source = source
+        self.vad = None
+        if webrtcvad is not None and vad_aggressiveness is not None and block_ms in (10, 20, 30):
+            self.vad = webrtcvad.Vad(vad_aggressiveness)
+        self.noise_floor = None
+        self.overflows = 0
+
+        self._cond = threading.Condition()
+        self._stream = None
+
+    # -------------------------
+    # stream
+    # -------------------------
+    def start(self):
+        """Open the capture stream. Safe to call more than once."""
+        if self._stream is not None:
+            return
+        if self.source is not None:
+            self._stream = self.source
+            self.source.start(self.feed)
+            return
+        if sd is None:
+            raise RuntimeError("sounddevice saknas")
+        self._stream = sd.InputStream(
+            samplerate=self.samplerate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.block,
+            device=self.device,
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self.feed(indata[:, 0])
+
+    def feed(self, samples):
+        """Append captured samples and wake up readers."""
+        if self.echo_canceller is not None:
+            samples = self.echo_canceller.process(samples)
+        with self._cond:
+            self.ring.write(samples)
+            self._cond.notify_all()
+
+    def wait_until(self, pos, timeout=None):
+        """Block until the ring has been written up to `pos`."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.ring.write_pos >= pos, timeout)
+
+    # -------------------------
+    # endpointing
+    # -------------------------
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.energy_threshold
+        return max(self.energy_threshold, self.noise_floor * self.dynamic_ratio)
+
+    def _block_rms(self, x):
+        return float(np.sqrt(np.mean(x.astype(np.float32) ** 2))) if len(x) else 0.0
+
+    def calibrate(self, duration=0.3):
+        """One-off noise floor measurement, done once after start()."""
+        start = self.ring.write_pos
+        end = start + int(self.samplerate * duration)
+        if self.wait_until(end, timeout=duration + 1.0):
+            self.noise_floor = self._block_rms(self.ring.read(start, end))
+
+    def is_speech(self, block, rms=None):
+        rms = self._block_rms(block) if rms is None else rms
+        if rms <= self.threshold():
+            return False
+        if self.vad is None:
+            return True
+        return self.vad.is_speech(block.tobytes(), self.samplerate)
+
+    def listen(self, timeout=5.0, phrase_limit=8.0, pause_s=0.6, preroll_ms=PREROLL_MS,
+               start=None, min_speech_ms=MIN_SPEECH_MS, on_partial=None,
+               partial_ms=PARTIAL_MS):
+        """
+        Wait for speech and return the utterance as int16 numpy audio,
+        or None if nobody started talking within `timeout` seconds.
+        The utterance ends after `pause_s` of non-speech (hangover) or
+        at `phrase_limit` seconds.
+        start: ring position to scan from instead of "now" (e.g. where a
+        barge-in was detected, so its first words are kept).
+        on_partial(pcm): called (on this thread, keep it cheap) with the
+        audio so far each time the speaker pauses for `partial_ms`, before
+        the utterance is known to be over; used for speculative replies.
+        """
+        pos = self.ring.write_pos if start is None else max(start, self.ring.oldest_pos)
+        trace.begin()
+        trace.mark(trace.MIC_OPEN)
+        deadline = time.time() + timeout
+        speech_start = None
+        quiet_blocks = 0
+        speech_blocks = 0
+        min_blocks = max(1, int(min_speech_ms * self.samplerate / 1000 / self.block))
+        pause_blocks = max(1, int(pause_s * self.samplerate / self.block))
+        partial_blocks = max(1, int(partial_ms * self.samplerate / 1000 / self.block))
+        preroll = int(self.samplerate * preroll_ms / 1000)
+        max_samples = int(phrase_limit * self.samplerate)
+
+        while True:
+            if not self.wait_until(pos + self.block, timeout=0.5):
+                if self._stream is None:
+                    return None
+                if speech_start is None and time.time() > deadline:
+                    return None
+                continue
+            block = self.ring.read(pos, pos + self.block)
+            rms = self._block_rms(block)
+            loud = self.is_speech(block, rms)
+
+            if speech_start is None:
+                if loud:
+                    speech_start = pos
+                    quiet_blocks, speech_blocks = 0, 1
+                elif rms <= self.threshold():
+                    # keep the noise floor fresh while it is quiet
+                    self.noise_floor = rms if self.noise_floor is None else \
+                        0.95 * self.noise_floor + 0.05 * rms
+                if speech_start is None and time.time() > deadline:
+                    return None
+            else:
+                quiet_blocks = 0 if loud else quiet_blocks + 1
+                speech_blocks += loud
+                if quiet_blocks >= pause_blocks and speech_blocks < min_blocks:
+                    speech_start = None   # just a blip, keep waiting
+                elif quiet_blocks >= pause_blocks or pos - speech_start >= max_samples:
+                    now = time.time()
+                    lag = (self.ring.write_pos - speech_start) / self.samplerate
+                    trace.mark(trace.SPEECH_START, now - lag)
+                    trace.mark(trace.VAD_END, now)
+                    return self.ring.read(speech_start - preroll, pos + self.block)
+                elif on_partial and quiet_blocks == partial_blocks and speech_blocks >= min_blocks:
+                    on_partial(self.ring.read(speech_start - preroll, pos + self.block))
+            pos += self.block
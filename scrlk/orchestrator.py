@@ -0,0 +1,232 @@
+"""
+asyncio turn orchestrator for the Macintosh voice loop.
+
+One event loop runs mic capture, STT, LLM and TTS as tasks and pumps
+the Tk UI, so there are no daemon threads hopping back through
+root.after(0, ...) and no polling sleeps. The blocking stage functions
+(sounddevice, HTTP) run in worker threads via asyncio.to_thread; the
+orchestrator decides when they start, how long they may take and
+when their results are thrown away.
+
+Within a turn the LLM reply is consumed sentence by sentence, so TTS
+for the first sentence overlaps generation of the rest. cancel_turn()
+stops playback and abandons the LLM stream; every stage has a timeout.
+barge_in() does the same the moment the user talks over the reply.
+
+Stage functions (all blocking, called from worker threads):
+    capture()            -> int16 audio, or None if nobody spoke
+    transcribe(pcm)      -> text, or None if nothing intelligible
+    reply(text)          -> iterator of sentences to speak
+    speak(sentence)      -> plays one sentence, returns when done
+    stop_speaking()      -> makes a running speak() return ASAP
+
+on_event(kind, text) runs on the loop thread, which is also the Tk
+thread, so it may touch widgets directly. Kinds:
+    listening, heard, no_speech, stt_error, mic_error,
+    speaking, say, done, cancelled, llm_error
+"""
+import asyncio
+import sys
+import threading
+
+STT_TIMEOUT_S = 15.0
+LLM_TIMEOUT_S = 20.0     # max wait for the next sentence
+UI_FPS = 60
+
+
+class TurnOrchestrator:
+    def __init__(self, capture, transcribe, reply, speak, stop_speaking=None,
+                 on_event=None, root=None, stt_timeout=STT_TIMEOUT_S,
+                 llm_timeout=LLM_TIMEOUT_S, fps=UI_FPS):
+        self.capture = capture
+        self.transcribe = transcribe
+        self.reply = reply
+        self.speak = speak
+        self.stop_speaking = stop_speaking
+        self.on_event = on_event
+        self.root = root
+        self.stt_timeout = stt_timeout
+        self.llm_timeout = llm_timeout
+        self.fps = fps
+
+        self.loop = None
+        self.turn_task = None
+        self._stopped = None
+
+    # -------------------------
+    # thread-safe controls
+    # -------------------------
+    def stop(self):
+        """End run() (from any thread)."""
+        if self.loop is not None and self._stopped is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+
+    def cancel_turn(self):
+        """Abort the current turn (from any thread)."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._cancel_turn)
+
+    def barge_in(self):
+        """
+        The user started talking over us (from any thread): silence the
+        speaker right away and abort the rest of the turn.
+        """
+        self.cancel_turn()
+        if self.stop_speaking:
+            self.stop_speaking()
+
+    def _cancel_turn(self):
+        if self.turn_task is not None and not self.turn_task.done():
+            self.turn_task.cancel()
+
+    # -------------------------
+    # main loop
+    # -------------------------
+    async def run(self, intro=None, listen=True):
+        """Pump the UI and run turns until stop() (or the Tk window closes)."""
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        tasks = []
+        if self.root is not None:
+            tasks.append(asyncio.create_task(self._pump_ui()))
+        if listen:
+            tasks.append(asyncio.create_task(self._voice_loop(intro)))
+        elif intro:
+            tasks.append(asyncio.create_task(self.say(intro)))
+        try:
+            await self._stopped.wait()
+        finally:
+            self._cancel_turn()
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _pump_ui(self):
+        import tkinter as tk
+        period = 1.0 / self.fps
+        while True:
+            try:
+                self.root.update()
+            except tk.TclError:      # window destroyed
+                self._stopped.set()
+                return
+            await asyncio.sleep(period)
+
+    async def _voice_loop(self, intro):
+        if intro:
+            await self.say(intro)
+        while True:
+            self._emit("listening")
+            try:
+                pcm = await asyncio.to_thread(self.capture)
+            except Exception as e:
+                print(f"[ORCH] capture: {e}", file=sys.stderr)
+                self._emit("mic_error", str(e))
+                await asyncio.sleep(1.0)
+                continue
+            if pcm is None:
+                continue
+            self.turn_task = asyncio.create_task(self.turn(pcm))
+            try:
+                await self.turn_task
+            except asyncio.CancelledError:
+                # our own turn was cancelled; only re-raise if we were too
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                self.turn_task = None
+
+    # -------------------------
+    # one turn
+    # -------------------------
+    async def turn(self, pcm):
+        """STT -> streamed LLM -> sentence-by-sentence TTS. Returns the spoken reply."""
+        try:
+            text = await asyncio.wait_for(asyncio.to_thread(self.transcribe, pcm),
+                                          self.stt_timeout)
+        except Exception as e:
+            print(f"[ORCH] STT: {e!r}", file=sys.stderr)
+            self._emit("stt_error", str(e))
+            return None
+        if not text:
+            self._emit("no_speech")
+            return None
+        self._emit("heard", text)
+        return await self.respond(text)
+
+    async def respond(self, text):
+        sentences = asyncio.Queue()
+        abandon = threading.Event()
+        producer = asyncio.create_task(self._produce(text, sentences, abandon))
+        spoken = []
+        try:
+            while True:
+                sentence = await asyncio.wait_for(sentences.get(), self.llm_timeout)
+                if sentence is None:
+                    break
+                if not spoken:
+                    self._emit("speaking", sentence)
+                spoken.append(sentence)
+                self._emit("say", " ".join(spoken))
+                await self._speak(sentence)
+        except asyncio.TimeoutError:
+            print("[ORCH] LLM timeout", file=sys.stderr)
+            self._emit("llm_error", "timeout")
+        except asyncio.CancelledError:
+            self._emit("cancelled", " ".join(spoken))
+            raise
+        finally:
+            abandon.set()
+            producer.cancel()
+        if producer.done() and not producer.cancelled() and producer.exception():
+            self._emit("llm_error", str(producer.exception()))
+        reply = " ".join(spoken)
+        self._emit("done", reply)
+        return reply
+
+    async def say(self, text):
+        """Speak a fixed line (intro, goodbye) with the usual events."""
+        self._emit("speaking", text)
+        self._emit("say", text)
+        try:
+            await self._speak(text)
+        except asyncio.CancelledError:
+            self._emit("cancelled", text)
+            raise
+        self._emit("done", text)
+
+    async def _speak(self, sentence):
+        try:
+            await asyncio.to_thread(self.speak, sentence)
+        except asyncio.CancelledError:
+            # the worker thread keeps playing until told to stop
+            if self.stop_speaking:
+                self.stop_speaking()
+            raise
+
+    async def _produce(self, text, queue, abandon):
+        loop = asyncio.get_running_loop()
+
+        def _put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:   # loop already closed (shutdown)
+                pass
+
+        def _run():
+            try:
+                for sentence in self.reply(text):
+                    if abandon.is_set():
+                        break
+                    _put(sentence)
+            finally:
+                _put(None)
+
+        await asyncio.to_thread(_run)
+
+    def _emit(self, kind, text=""):
+        if self.on_event:
+            try:
+                self.on_event(kind, text)
+            except Exception as e:
+                print(f"[ORCH] on_event({kind}): {e}", file=sys.stderr)
@@ -0,0 +1,161 @@
+"""
+Cache of chat replies keyed on what the user said.
+
+Kiosk visitors say the same few things ("hej", "hur mår du", "tack")
+over and over, and each one used to cost a full chat completion. The
+key is the normalized utterance (lower case, no punctuation, Swedish
+and English filler words dropped) plus a hash of the persona prompt,
+so "Hej!", "öh, hej" and "hej." share an entry and a prompt change
+starts from scratch.
+
+Each key collects up to `variants` different replies before it starts
+answering from the cache, then rotates through them so repeat visitors
+do not hear the same canned line every time. Entries expire after
+`ttl_s`. Every cached reply remembers the TTSCache keys its sentences
+are spoken under (the app speaks them through the same TTSCache), so a
+hit normally plays without any network I/O at all; audio_hits counts
+the hits where that was true.
+"""
+import collections
+import hashlib
+import re
+import threading
+import time
+
+TTL_S = 6 * 3600
+VARIANTS = 3             # replies collected per key before answering from cache
+MAX_KEYS = 512
+TTS_FORMAT = "pcm"       # scrlk.tts_stream.TTS_PCM_FORMAT
+
+FILLERS = frozenset("""
+    eh ehm öh öhm äh ähm hm hmm mm mhm asså alltså liksom typ ba ju väl nå
+    uh uhm um umm er erm ah oh
+""".split())
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+Reply = collections.namedtuple("Reply", "sentences audio")
+
+
+def normalize(text):
+    """'Öh, hej Macintosh!' -> 'hej macintosh'"""
+    words = _NON_WORD.sub(" ", (text or "").lower()).split()
+    return " ".join(w for w in words if w not in FILLERS)
+
+
+def persona_hash(prompt):
+    return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()[:16]
+
+
+class _Entry:
+    __slots__ = ("replies", "answers", "created", "turn")
+
+    def __init__(self):
+        self.replies = []        # [Reply], distinct
+        self.answers = 0         # LLM answers seen (the LLM may repeat itself)
+        self.created = time.time()
+        self.turn = 0            # rotation position
+
+
+class ReplyCache:
+    def __init__(self, ttl_s=TTL_S, variants=VARIANTS, max_keys=MAX_KEYS, tts_cache=None,
+                 tts_model=None, tts_voice=None, tts_format=TTS_FORMAT):
+        self.ttl_s = ttl_s
+        self.variants = max(1, variants)
+        self.max_keys = max_keys
+        self.tts_cache = tts_cache
+        self.tts = (tts_model, tts_voice, tts_format)
+
+        self.hits = 0
+        self.misses = 0
+        self.audio_hits = 0      # hits whose audio was still in the TTS cache
+
+        self._entries = collections.OrderedDict()   # key -> _Entry, oldest use first
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # keys
+    # -------------------------
+    @staticmethod
+    def key(utterance, persona):
+        """None for utterances that are nothing but fillers/punctuation."""
+        norm = normalize(utterance)
+        return f"{persona_hash(persona)}:{norm}" if norm else None
+
+    def audio_keys(self, sentences):
+        """TTSCache keys the sentences will be spoken under (None without TTS settings)."""
+        model, voice, fmt = self.tts
+        if self.tts_cache is None or not model or not voice:
+            return tuple(None for _ in sentences)
+        return tuple(self.tts_cache.key(s, model, voice, fmt) for s in sentences)
+
+    def audio_cached(self, reply):
+        """True if every sentence of `reply` can be played from the TTS cache."""
+        if self.tts_cache is None or None in reply.audio:
+            return False
+        return all(self.tts_cache.has_key(k) for k in reply.audio)
+
+    # -------------------------
+    # lookup / store
+    # -------------------------
+    def get(self, utterance, persona):
+        """A cached Reply, or None (then ask the LLM and put() the answer)."""
+        key = self.key(utterance, persona)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.created > self.ttl_s:
+                del self._entries[key]
+                entry = None
+            if entry is None or entry.answers < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            reply = entry.replies[entry.turn % len(entry.replies)]
+            entry.turn += 1
+            self.hits += 1
+        if self.audio_cached(reply):
+            self.audio_hits += 1
+        return reply
+
+    def put(self, utterance, persona, sentences):
+        """Store a complete reply (a string or its sentences)."""
+        key = self.key(utterance, persona)
+        if key is None:
+            return
+        sentences = (sentences,) if isinstance(sentences, str) else tuple(sentences)
+        if not sentences:
+            return
+        reply = Reply(sentences, self.audio_keys(sentences))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.created > self.ttl_s:
+                entry = self._entries[key] = _Entry()
+            self._entries.move_to_end(key)
+            entry.answers += 1
+            if len(entry.replies) < self.variants and \
+                    all(r.sentences != sentences for r in entry.replies):
+                entry.replies.append(reply)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_reply_cache(**kwargs):
+    """Process-wide reply cache (kwargs only apply on first use)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ReplyCache(**kwargs)
+        return _default
@@ -0,0 +1,33 @@
+"""Cut streamed LLM text into sentences for sentence-by-sentence TTS."""
+import re
+
+# sentence end = . ! ? … (one or more) followed by whitespace
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+
+
+def split_sentences(buf):
+    """
+    Cut complete sentences off the front of `buf`.
+    Returns (sentences, rest) where rest is the unfinished tail.
+    A sentence only counts as finished once whitespace follows the
+    punctuation, so "3.5" or a half-streamed "..." is not cut early.
+    """
+    sentences = []
+    start = 0
+    for m in _SENTENCE_END.finditer(buf):
+        sentence = buf[start:m.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = m.end()
+    return sentences, buf[start:]
+
+
+def iter_sentences(deltas):
+    """Turn an iterable of text deltas into an iterator of sentences."""
+    buf = ""
+    for delta in deltas:
+        buf += delta
+        sentences, buf = split_sentences(buf)
+        yield from sentences
+    if buf.strip():
+        yield buf.strip()
@@ -0,0 +1,235 @@
+"""
+Speculative replies on stable partial transcripts.
+
+Normally the LLM call starts only after the final transcript is back.
+With a Speculator the app hands over partial results while the user is
+still (possibly) talking: partial(text) for a streaming recognizer, or
+hear(pcm) with the audio so far (MicStream.listen(on_partial=...)),
+which transcribes it on a worker thread. Once the same partial text
+has been around for `stable_ms` without a newer one, reply(text) is
+started in the background.
+
+When the final transcript arrives, take(final) returns that reply if
+the texts match (ignoring case, punctuation and spacing) and None
+otherwise, in which case the speculative reply is thrown away and the
+app calls the LLM as usual. Every speculative call that is not used
+costs tokens, so hits, misses and the latency saved are counted;
+summary() prints them for tuning stable_ms. The trace marks of a
+speculative reply (llm_request, llm_*_token) are held back and land on
+the turn only if take() uses it.
+
+With stream=True reply(text) is an iterator (of sentences) and take()
+returns an iterator that yields what the speculative call already
+produced and then follows it live.
+"""
+import re
+import sys
+import threading
+import time
+
+from scrlk import trace
+
+STABLE_MS = 150          # partial unchanged this long -> start the LLM
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def same_utterance(a, b):
+    """True if two transcripts differ only in case, punctuation or spacing."""
+    norm = lambda s: _NON_WORD.sub(" ", (s or "").lower()).strip()
+    return norm(a) == norm(b) != ""
+
+
+class _Job:
+    """One speculative reply running on its own thread."""
+
+    def __init__(self, text, reply, stream):
+        self.text = text
+        self.items = []
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self.abandoned = False
+        self.marks = trace.new_held()   # trace marks held back until the reply is used
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, args=(reply, stream), daemon=True)
+        self._thread.start()
+
+    def _run(self, reply, stream):
+        try:
+            # speculative work stays out of the turn trace until take() uses it
+            with trace.hold(self.marks):
+                if stream:
+                    for item in reply(self.text):
+                        with self._cond:
+                            if self.abandoned:
+                                break
+                            self.items.append(item)
+                            self._cond.notify_all()
+                else:
+                    self.result = reply(self.text)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.finished = time.time()
+                self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.finished is not None, timeout)
+        return self.finished is not None
+
+    def follow(self):
+        """Iterator over the streamed items, blocking for the ones still coming."""
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: i < len(self.items) or self.finished is not None)
+                if i >= len(self.items):
+                    break
+                item = self.items[i]
+            i += 1
+            yield item
+        if self.error is not None and not self.items:
+            raise self.error
+
+
+class Speculator:
+    def __init__(self, reply, transcribe=None, stable_ms=STABLE_MS, stream=False,
+                 samplerate=16000):
+        self.reply = reply
+        self.transcribe = transcribe
+        self.stable_s = stable_ms / 1000.0
+        self.stream = stream
+        self.samplerate = samplerate
+
+        # metrics
+        self.partials = 0        # partial transcripts seen
+        self.started = 0         # speculative LLM calls made
+        self.hits = 0            # ... whose reply was used
+        self.misses = 0          # ... thrown away (wasted tokens)
+        self.saved_s = 0.0       # LLM time already done when the final text came in
+
+        self._lock = threading.Lock()
+        self._gen = 0            # bumped by reset()/take(), stale partials are dropped
+        self._pending = None     # (text, Timer) waiting to become stable
+        self._job = None
+
+    # -------------------------
+    # partial results (any thread)
+    # -------------------------
+    def hear(self, pcm):
+        """Transcribe the audio so far in the background and feed it to partial()."""
+        if self.transcribe is None:
+            return
+        gen = self._gen
+
+        def _run():
+            try:
+                with trace.quiet():
+                    text = self.transcribe(pcm, self.samplerate)
+            except Exception as e:
+                print(f"[SPEC] partial STT: {e}", file=sys.stderr)
+                return
+            if text:
+                self.partial(text, gen)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def partial(self, text, gen=None):
+        """A partial transcript; starts the reply once it has been stable for stable_ms."""
+        with self._lock:
+            if gen is not None and gen != self._gen:
+                return
+            self.partials += 1
+            if self._job is not None and same_utterance(self._job.text, text):
+                return
+            if self._pending is not None:
+                if same_utterance(self._pending[0], text):
+                    return
+                self._pending[1].cancel()
+            timer = threading.Timer(self.stable_s, self._fire, args=(text, self._gen))
+            timer.daemon = True
+            self._pending = (text, timer)
+        timer.start()
+
+    def _fire(self, text, gen):
+        with self._lock:
+            if gen != self._gen or self._pending is None or self._pending[0] != text:
+                return
+            self._pending = None
+            self._drop_job()
+            self._job = _Job(text, self.reply, self.stream)
+            self.started += 1
+
+    # -------------------------
+    # final result
+    # -------------------------
+    def take(self, final_text):
+        """
+        The speculative reply for `final_text` (a result, or an iterator
+        with stream=True), or None if there is no matching one.
+        """
+        with self._lock:
+            self._gen += 1
+            if self._pending is not None:
+                self._pending[1].cancel()
+                self._pending = None
+            job, self._job = self._job, None
+            if job is None:
+                return None
+            if not same_utterance(job.text, final_text) or \
+                    (job.finished is not None and job.error is not None):
+                job.abandoned = True
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_s += (job.finished or time.time()) - job.started
+        trace.release(job.marks)
+        if self.stream:
+            return job.follow()
+        job.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def reset(self):
+        """Forget pending partials and any unused speculative reply (start of a new turn)."""
+        with self._lock:
+            self._gen += 1
+            if self._pending is not None:
+                self._pending[1].cancel()
+                self._pending = None
+            self._drop_job()
+
+    def _drop_job(self):
+        if self._job is not None:
+            self._job.abandoned = True
+            self.misses += 1
+            self._job = None
+
+    # -------------------------
+    # metrics
+    # -------------------------
+    @property
+    def hit_rate(self):
+        return self.hits / self.started if self.started else 0.0
+
+    def stats(self):
+        return {
+            "partials": self.partials,
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "saved_s": round(self.saved_s, 3),
+            "saved_per_hit_ms": round(self.saved_s / self.hits * 1000) if self.hits else 0,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"[SPEC] {s['hits']}/{s['started']} hits ({s['hit_rate']:.0%}), "
+                f"{s['misses']} discarded, saved {s['saved_s']:.2f}s "
+                f"(~{s['saved_per_hit_ms']} ms/hit)")
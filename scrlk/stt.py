@@ -0,0 +1,187 @@
+"""
+Speech-to-text backends.
+
+Every app hands an int16 numpy utterance to an STTBackend and gets text
+back, so the engine can be picked per app without touching the audio
+code:
+
+    whisper-api  OpenAI whisper-1 (cloud)
+    google       speech_recognition.recognize_google (cloud)
+    local        faster-whisper on the device, no network
+    stub         deterministic scripted replies, for tests/benchmarks
+
+transcribe() returns None when nothing intelligible was said and raises
+on real errors (network, quota, ...).
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+
+from scrlk import trace
+from scrlk.audio_io import encode
+
+STT_ENV = "SCRLK_STT"                 # overrides the app's default backend
+LOCAL_MODEL = os.getenv("SCRLK_STT_MODEL", "base")
+
+
+def _lang2(language):
+    """'sv-SE' -> 'sv' (whisper wants ISO 639-1)."""
+    return language.split("-")[0].lower() if language else None
+
+
+class STTBackend:
+    name = "base"
+
+    def transcribe(self, pcm, samplerate=16000):
+        """pcm: int16 numpy mono. Returns text or None."""
+        trace.mark(trace.STT_REQUEST)
+        try:
+            return self._transcribe(pcm, samplerate)
+        finally:
+            trace.mark(trace.STT_RESPONSE)
+
+    def _transcribe(self, pcm, samplerate):
+        raise NotImplementedError
+
+
+class WhisperAPIBackend(STTBackend):
+    """OpenAI transcription endpoint."""
+    name = "whisper-api"
+
+    def __init__(self, client, model="whisper-1", language=None, audio_format=None):
+        self.client = client
+        self.model = model
+        self.language = _lang2(language)
+        self.audio_format = audio_format or os.getenv("SCRLK_STT_FORMAT", "wav")
+
+    def _transcribe(self, pcm, samplerate):
+        if self.client is None:
+            raise RuntimeError("OpenAI client saknas")
+        # encoded in memory and uploaded from there, no tempfile on the SD card
+        kwargs = {"language": self.language} if self.language else {}
+        tr = self.client.audio.transcriptions.create(
+            model=self.model, file=encode(pcm, samplerate, self.audio_format), **kwargs)
+        return (getattr(tr, "text", "") or "").strip() or None
+
+
+class GoogleBackend(STTBackend):
+    """speech_recognition's free Google Web Speech endpoint."""
+    name = "google"
+
+    def __init__(self, language="sv-SE"):
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = sr.Recognizer()
+        self.language = language
+
+    def _transcribe(self, pcm, samplerate):
+        sr = self._sr
+        audio = sr.AudioData(np.asarray(pcm, dtype=np.int16).tobytes(), samplerate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).strip() or None
+        except sr.UnknownValueError:
+            return None
+
+
+class LocalWhisperBackend(STTBackend):
+    """
+    faster-whisper running on the device (CPU, int8).
+    The model is loaded on a background thread at construction so the
+    first turn does not pay for it.
+    """
+    name = "local"
+
+    def __init__(self, language=None, model=LOCAL_MODEL, device="cpu", compute_type="int8"):
+        from faster_whisper import WhisperModel  # optional dependency
+        self._WhisperModel = WhisperModel
+        self.language = _lang2(language)
+        self.model_name = model
+        self.device = device
+        self.compute_type = compute_type
+        self.model = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        try:
+            self.model = self._WhisperModel(self.model_name, device=self.device,
+                                            compute_type=self.compute_type)
+        except Exception as e:
+            print(f"[STT] local model load failed: {e}", file=sys.stderr)
+        finally:
+            self._ready.set()
+
+    def _transcribe(self, pcm, samplerate):
+        self._ready.wait()
+        if self.model is None:
+            raise RuntimeError("lokal STT-modell kunde inte laddas")
+        audio = np.asarray(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if samplerate != 16000:
+            n = int(len(audio) * 16000 / samplerate)
+            audio = np.interp(np.linspace(0, len(audio), n, endpoint=False),
+                              np.arange(len(audio)), audio).astype(np.float32)
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1,
+                                            vad_filter=False)
+        return " ".join(s.text.strip() for s in segments).strip() or None
+
+
+class StubBackend(STTBackend):
+    """
+    Deterministic backend: returns the scripted lines in order (cycling).
+    Silence (peak below `min_peak`) gives None, like a real engine would.
+    Script can also come from SCRLK_STT_SCRIPT="hej|hur mår du|tack".
+    """
+    name = "stub"
+
+    def __init__(self, script=None, min_peak=200):
+        if script is None:
+            script = os.getenv("SCRLK_STT_SCRIPT", "hej").split("|")
+        self.script = list(script)
+        self.min_peak = min_peak
+        self.calls = 0
+
+    def _transcribe(self, pcm, samplerate):
+        pcm = np.asarray(pcm, dtype=np.int16)
+        if not len(pcm) or int(np.max(np.abs(pcm.astype(np.int32)))) < self.min_peak:
+            return None
+        text = self.script[self.calls % len(self.script)] if self.script else None
+        self.calls += 1
+        return text
+
+
+BACKENDS = {
+    WhisperAPIBackend.name: WhisperAPIBackend,
+    GoogleBackend.name: GoogleBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def make_backend(default, client=None, language=None, fallback=None, **kwargs):
+    """
+    Build the backend named by $SCRLK_STT, or `default` if unset.
+    If it cannot be created (e.g. faster-whisper not installed) and a
+    `fallback` name is given, that one is used instead.
+    """
+    name = os.getenv(STT_ENV, default)
+    try:
+        return _build(name, client, language, **kwargs)
+    except Exception as e:
+        if not fallback or fallback == name:
+            raise
+        print(f"[STT] {name} ej tillgänglig ({e}), använder {fallback}", file=sys.stderr)
+        return _build(fallback, client, language)
+
+
+def _build(name, client, language, **kwargs):
+    if name == WhisperAPIBackend.name:
+        return WhisperAPIBackend(client, language=language, **kwargs)
+    if name == GoogleBackend.name:
+        return GoogleBackend(language=language or "sv-SE", **kwargs)
+    if name == LocalWhisperBackend.name:
+        return LocalWhisperBackend(language=language, **kwargs)
+    if name == StubBackend.name:
+        return StubBackend(**kwargs)
+    raise ValueError(f"okänd STT-backend: {name!r} (välj bland {', '.join(BACKENDS)})")
@@ -0,0 +1,313 @@
+"""
+Per-turn latency tracing.
+
+Each voice turn is a set of timestamped marks, set wherever the work
+happens (mic, VAD, STT backends, the LLM call, the TTS player):
+
+    mic_open, speech_start, vad_end, stt_request, stt_response,
+    llm_request, llm_first_token, llm_last_token, tts_request,
+    tts_first_byte, playback_start, playback_end
+
+A process has one current turn; begin() starts the next one and writes
+the previous one (if the user actually said something) as one JSON line
+to a size-rotated file, with the marks and the stage durations derived
+from them. Marks keep their first timestamp, except llm_last_token and
+playback_end, which keep the last one (several sentences per reply).
+
+    SCRLK_TRACE=/path/turns.jsonl   where to write (default below)
+    SCRLK_TRACE=0                   tracing off
+
+    python -m scrlk.trace [--app scrlk-ai] [files ...]
+
+prints n / p50 / p95 / p99 per stage.
+"""
+import argparse
+import atexit
+import contextlib
+import glob
+import json
+import logging
+import logging.handlers
+import math
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = "SCRLK_TRACE"
+TRACE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "scrlk", "turns.jsonl")
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS = 3
+
+MIC_OPEN = "mic_open"
+SPEECH_START = "speech_start"
+VAD_END = "vad_end"
+STT_REQUEST = "stt_request"
+STT_RESPONSE = "stt_response"
+LLM_REQUEST = "llm_request"
+LLM_FIRST_TOKEN = "llm_first_token"
+LLM_LAST_TOKEN = "llm_last_token"
+TTS_REQUEST = "tts_request"
+TTS_FIRST_BYTE = "tts_first_byte"
+PLAYBACK_START = "playback_start"
+PLAYBACK_END = "playback_end"
+
+_KEEP_LAST = {LLM_LAST_TOKEN, PLAYBACK_END}
+
+# stage -> (from mark, to mark)
+STAGES = {
+    "wait": (MIC_OPEN, SPEECH_START),
+    "utterance": (SPEECH_START, VAD_END),
+    "stt": (STT_REQUEST, STT_RESPONSE),
+    "llm_first_token": (LLM_REQUEST, LLM_FIRST_TOKEN),
+    "llm_total": (LLM_REQUEST, LLM_LAST_TOKEN),
+    "tts_first_byte": (TTS_REQUEST, TTS_FIRST_BYTE),
+    "playback": (PLAYBACK_START, PLAYBACK_END),
+    "response": (VAD_END, PLAYBACK_START),     # what the user actually waits for
+}
+
+
+def stage_durations(marks):
+    """{stage: ms} for the stages whose marks are both present and in order."""
+    out = {}
+    for stage, (a, b) in STAGES.items():
+        if a in marks and b in marks and marks[b] >= marks[a]:
+            out[stage] = round((marks[b] - marks[a]) * 1000.0, 1)
+    return out
+
+
+class _Held(list):
+    """Marks kept aside by Tracer.hold()."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.live = False
+
+
+class Tracer:
+    def __init__(self, path=TRACE_PATH, app=None, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.app = app or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        self.turns = 0
+
+        self._marks = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._log = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log = logging.getLogger(f"scrlk.trace.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            self._log.addHandler(handler)
+
+    # -------------------------
+    # turns
+    # -------------------------
+    def begin(self, reuse_idle=False):
+        """
+        Start a new turn and write out the previous one. reuse_idle: keep
+        the current turn if it has not heard any speech yet (a segmenter
+        that detects speech inside a capture someone else began).
+        """
+        with self._lock:
+            if reuse_idle and self._marks is not None and SPEECH_START not in self._marks:
+                return
+            prev, self._marks = self._marks, {}
+        self._write(prev)
+
+    def end(self):
+        """Write out the current turn now (also done at exit)."""
+        with self._lock:
+            prev, self._marks = self._marks, None
+        self._write(prev)
+
+    def mark(self, name, t=None):
+        """Timestamp `name` on the current turn (no-op without one)."""
+        if getattr(self._local, "quiet", False):
+            return
+        t = time.time() if t is None else t
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            with held.lock:
+                if not held.live:
+                    held.append((name, t))
+                    return
+        with self._lock:
+            if self._marks is None:
+                return
+            if name in _KEEP_LAST or name not in self._marks:
+                self._marks[name] = t
+
+    @contextlib.contextmanager
+    def quiet(self):
+        """Marks made by this thread inside the block are ignored (speculative work)."""
+        self._local.quiet = True
+        try:
+            yield
+        finally:
+            self._local.quiet = False
+
+    @contextlib.contextmanager
+    def hold(self, held=None):
+        """
+        Marks made by this thread inside the block are kept aside, with
+        their times, in `held` (new_held() or a fresh one, yielded);
+        release(held) puts them on the then current turn (a speculative
+        reply that got used), and from then on the thread's marks go
+        straight through.
+        """
+        held = _Held() if held is None else held
+        self._local.held = held
+        try:
+            yield held
+        finally:
+            self._local.held = None
+
+    def release(self, held):
+        with held.lock:
+            held.live = True
+            for name, t in held:
+                self.mark(name, t)
+            held.clear()
+
+    def tokens(self, deltas):
+        """Pass streamed LLM text deltas through, marking the first and last token."""
+        for delta in deltas:
+            if delta:
+                self.mark(LLM_FIRST_TOKEN)
+            yield delta
+        self.mark(LLM_LAST_TOKEN)
+
+    def _write(self, marks):
+        if not marks or SPEECH_START not in marks or self._log is None:
+            return
+        t0 = min(marks.values())
+        record = {
+            "app": self.app,
+            "turn": self.turns,
+            "t": round(t0, 3),
+            "marks": {k: round((v - t0) * 1000.0, 1)
+                      for k, v in sorted(marks.items(), key=lambda kv: kv[1])},
+            "stages": stage_durations(marks),
+        }
+        self.turns += 1
+        try:
+            self._log.info(json.dumps(record, ensure_ascii=False))
+        except Exception as e:
+            print(f"[TRACE] {e}", file=sys.stderr)
+
+
+# -------------------------
+# process-wide tracer
+# -------------------------
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer, configured from $SCRLK_TRACE on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            path = os.getenv(TRACE_ENV, TRACE_PATH)
+            if path.lower() in ("", "0", "off", "false"):
+                path = None
+            try:
+                _default = Tracer(path)
+            except OSError as e:
+                print(f"[TRACE] {path}: {e}", file=sys.stderr)
+                _default = Tracer(None)
+            atexit.register(_default.end)
+        return _default
+
+
+def begin(reuse_idle=False):
+    get_tracer().begin(reuse_idle)
+
+
+def end():
+    get_tracer().end()
+
+
+def mark(name, t=None):
+    get_tracer().mark(name, t)
+
+
+def quiet():
+    return get_tracer().quiet()
+
+
+def new_held():
+    return _Held()
+
+
+def hold(held=None):
+    return get_tracer().hold(held)
+
+
+def release(held):
+    get_tracer().release(held)
+
+
+def tokens(deltas):
+    return get_tracer().tokens(deltas)
+
+
+# -------------------------
+# report CLI
+# -------------------------
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, math.ceil(p / 100.0 * len(s)) - 1))
+    return s[k]
+
+
+def load(paths, app=None):
+    records = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if app is None or rec.get("app") == app:
+                        records.append(rec)
+        except OSError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+    return records
+
+
+def report(records, out=sys.stdout):
+    print(f"turns            : {len(records)}", file=out)
+    print(f"{'stage':<17}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}   (ms)", file=out)
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in records if stage in r.get("stages", {})]
+        if not values:
+            continue
+        print(f"{stage:<17}{len(values):>6}" + "".join(
+            f"{percentile(values, p):>10.0f}" for p in (50, 95, 99)), file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="p50/p95/p99 per turn stage from trace JSONL files")
+    ap.add_argument("files", nargs="*",
+                    help=f"trace files (default: ${TRACE_ENV} or {TRACE_PATH}, plus rotated .1 .2 ...)")
+    ap.add_argument("--app", help="only turns from this app (script name, e.g. scrlk-ai)")
+    args = ap.parse_args(argv)
+    files = args.files
+    if not files:
+        path = os.getenv(TRACE_ENV, TRACE_PATH)
+        files = sorted(glob.glob(path + ".*"), reverse=True) + [path]
+    report(load(files, args.app))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Content-addressed TTS audio cache.
+
+Audio is keyed by sha256(text, model, voice, format) and kept in an
+in-memory LRU plus an on-disk LRU directory, each with a size budget.
+Concurrent requests for the same key are deduplicated (single-flight):
+the first caller synthesizes, the others wait and then read the cache.
+
+Repeated lines (greetings, "Taken lamp.", room descriptions) play
+straight from memory or disk with no network I/O.
+"""
+import collections
+import hashlib
+import os
+import threading
+
+CACHE_DIR = os.getenv("SCRLK_TTS_CACHE",
+                      os.path.join(os.path.expanduser("~"), ".cache", "scrlk", "tts"))
+MEM_BUDGET = 16 * 1024 * 1024      # bytes kept in RAM
+DISK_BUDGET = 256 * 1024 * 1024    # bytes kept on disk
+CHUNK_BYTES = 4096
+
+
+class TTSCache:
+    def __init__(self, cache_dir=CACHE_DIR, mem_budget=MEM_BUDGET, disk_budget=DISK_BUDGET):
+        self.cache_dir = cache_dir
+        self.mem_budget = mem_budget
+        self.disk_budget = disk_budget
+
+        self.hits = 0
+        self.misses = 0
+
+        self._mem = collections.OrderedDict()   # key -> bytes, oldest first
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._inflight = {}                     # key -> Event
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    # -------------------------
+    # keys / lookup
+    # -------------------------
+    @staticmethod
+    def key(text, model, voice, fmt):
+        raw = "\x1f".join((text, model, voice, fmt)).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def get(self, key):
+        """Cached bytes or None. Disk hits are promoted to memory."""
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)   # mtime = last use, for disk LRU
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+            self._mem_put(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._mem_put(key, data)
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += len(data) - old
+            over = self._disk_bytes > self.disk_budget
+        if over:
+            self._evict_disk()
+
+    def _mem_put(self, key, data):
+        # caller holds the lock
+        if len(data) > self.mem_budget:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > self.mem_budget:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+
+    def _disk_entries(self):
+        out = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".bin"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            out.append((st.st_mtime, name, st.st_size))
+        return out
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())   # least recently used first
+        total = sum(size for _, _, size in entries)
+        for _, name, size in entries:
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    # -------------------------
+    # single-flight synthesis
+    # -------------------------
+    def chunks(self, text, model, voice, fmt, synth_stream, chunk_size=CHUNK_BYTES):
+        """
+        Yield audio for (text, model, voice, fmt).
+        Hit: cached bytes in chunks. Miss: chunks from synth_stream() as
+        they arrive, stored once the stream completed. If another thread
+        is already synthesizing the same key we wait for it instead.
+        """
+        key = self.key(text, model, voice, fmt)
+        while True:
+            data = self.get(key)
+            if data is not None:
+                for i in range(0, len(data), chunk_size):
+                    yield data[i:i + chunk_size]
+                return
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+            # someone else is synthesizing this line: wait, then re-check
+            event.wait()
+
+        self.misses += 1
+        try:
+            buf = bytearray()
+            for chunk in synth_stream():
+                buf += chunk
+                yield chunk
+            if buf:
+                self.put(key, bytes(buf))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def fetch(self, text, model, voice, fmt, synth):
+        """Whole-buffer variant: synth() returns the audio bytes."""
+        return b"".join(self.chunks(text, model, voice, fmt, lambda: [synth()]))
+
+    def contains(self, text, model, voice, fmt):
+        return self.has_key(self.key(text, model, voice, fmt))
+
+    def has_key(self, key):
+        with self._lock:
+            if key in self._mem:
+                return True
+        return bool(self.cache_dir) and os.path.exists(self._path(key))
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache shared by everything in one app."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TTSCache()
+        return _default
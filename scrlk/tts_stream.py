@@ -0,0 +1,186 @@
+"""
+Streaming TTS playback.
+
+OpenAI TTS is requested as raw "pcm" (24 kHz, 16-bit signed LE, mono)
+and the HTTP body is fed chunk by chunk into a sounddevice output
+stream. Playback starts as soon as a small jitter buffer is filled,
+instead of after the last byte has been downloaded, decoded and
+written to /tmp.
+"""
+import threading
+
+import numpy as np
+
+from scrlk import trace
+
+try:
+    import sounddevice as sd
+except Exception:  # PortAudio missing etc.
+    sd = None
+
+TTS_PCM_RATE = 24000     # OpenAI response_format="pcm"
+TTS_PCM_FORMAT = "pcm"
+JITTER_MS = 120          # audio buffered before playback starts
+BLOCK_FRAMES = 480       # 20 ms @ 24 kHz per callback
+CHUNK_BYTES = 4096       # HTTP read size
+
+
+def pcm_stream(client, text, model, voice, chunk_size=CHUNK_BYTES):
+    """Yield raw PCM chunks for `text` straight from the TTS endpoint."""
+    with client.audio.speech.with_streaming_response.create(
+        model=model, voice=voice, input=text, response_format=TTS_PCM_FORMAT
+    ) as res:
+        yield from res.iter_bytes(chunk_size)
+
+
+def prefetch(client, cache, text, model, voice, chunk_size=CHUNK_BYTES):
+    """
+    Synthesize `text` into `cache` without playing it.
+    Returns True if a TTS call was made, False if it was already cached.
+    """
+    if cache.contains(text, model, voice, TTS_PCM_FORMAT):
+        return False
+    synth = lambda: pcm_stream(client, text, model, voice, chunk_size)
+    for _ in cache.chunks(text, model, voice, TTS_PCM_FORMAT, synth, chunk_size):
+        pass
+    return True
+
+
+class StreamPlayer:
+    """
+    Plays 16-bit PCM as it arrives.
+
+    play_chunks() blocks until the audio has been played (or stop() was
+    called) and returns True if everything was played.
+    stop() can be called from any thread; the output callback notices it
+    on its next block and aborts the stream. It stays in force until
+    reset(), which the caller does once per reply, so a stop() between
+    two sentences of a reply also silences the rest of it.
+    """
+
+    def __init__(self, samplerate=TTS_PCM_RATE, channels=1, jitter_ms=JITTER_MS,
+                 blocksize=BLOCK_FRAMES, device=None):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.device = device
+        self.frame_bytes = 2 * channels
+        self.jitter_bytes = int(samplerate * jitter_ms / 1000) * self.frame_bytes
+
+        self.is_playing = False
+        self.underruns = 0
+        # gets a copy of every block that is played (EchoCanceller reference)
+        self.reference = None
+
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._eof = False
+        self._stop = threading.Event()
+        self._done = threading.Event()
+
+    # -------------------------
+    # public
+    # -------------------------
+    def speak(self, client, text, model, voice, chunk_size=CHUNK_BYTES, cache=None):
+        """
+        Stream `text` through OpenAI TTS and play it. Blocking.
+        With a TTSCache, repeated lines play from the cache and new ones
+        are stored while they stream.
+        """
+        trace.mark(trace.TTS_REQUEST)
+        _synth = lambda: pcm_stream(client, text, model, voice, chunk_size)
+        if cache is None:
+            return self.play_chunks(_synth())
+        return self.play_chunks(cache.chunks(text, model, voice, TTS_PCM_FORMAT, _synth, chunk_size))
+
+    def play_bytes(self, pcm):
+        """Play a complete PCM buffer. Blocking."""
+        return self.play_chunks([pcm])
+
+    def play_chunks(self, chunks):
+        """Play an iterable of PCM byte chunks. Blocking."""
+        if sd is None:
+            raise RuntimeError("sounddevice saknas")
+        self._reset()
+        stream = None
+        try:
+            for chunk in chunks:
+                if self._stop.is_set():
+                    break
+                if not chunk:
+                    continue
+                trace.mark(trace.TTS_FIRST_BYTE)
+                with self._lock:
+                    self._buf += chunk
+                    buffered = len(self._buf)
+                # jitter buffer: start once we have a little audio queued
+                if stream is None and buffered >= self.jitter_bytes:
+                    stream = self._open_stream()
+            with self._lock:
+                self._eof = True
+            if stream is None and not self._stop.is_set():
+                stream = self._open_stream()
+            if stream is not None:
+                self._done.wait()
+        finally:
+            if stream is not None:
+                stream.close()
+                trace.mark(trace.PLAYBACK_END)
+            self.is_playing = False
+            # stopped early: let a generator source clean up (HTTP, cache)
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        return not self._stop.is_set()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        """Forget an earlier stop(); call before the first sentence of a reply."""
+        self._stop.clear()
+
+    # -------------------------
+    # internals
+    # -------------------------
+    def _reset(self):
+        with self._lock:
+            self._buf = bytearray()
+            self._eof = False
+        self._done.clear()
+        self.underruns = 0
+
+    def _open_stream(self):
+        stream = sd.RawOutputStream(
+            samplerate=self.samplerate,
+            channels=self.channels,
+            dtype="int16",
+            blocksize=self.blocksize,
+            device=self.device,
+            callback=self._callback,
+            finished_callback=self._done.set,
+        )
+        self.is_playing = True
+        stream.start()
+        trace.mark(trace.PLAYBACK_START)
+        return stream
+
+    def _callback(self, outdata, frames, time_info, status):
+        n = len(outdata)
+        if self._stop.is_set():
+            outdata[:] = b"\x00" * n
+            raise sd.CallbackAbort
+        with self._lock:
+            chunk = bytes(self._buf[:n])
+            del self._buf[:n]
+            eof = self._eof
+        outdata[:len(chunk)] = chunk
+        if len(chunk) < n:
+            outdata[len(chunk):] = b"\x00" * (n - len(chunk))
+        if self.reference is not None:
+            pcm = np.frombuffer(outdata, dtype=np.int16)[::self.channels]
+            self.reference.feed_reference(pcm, self.samplerate)
+        if len(chunk) < n:
+            if eof:
+                raise sd.CallbackStop
+            self.underruns += 1
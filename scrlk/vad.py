@@ -0,0 +1,259 @@
+"""
+Streaming VAD segmenter.
+
+The sounddevice callback only copies each int16 block into a
+queue.SimpleQueue (C implementation, put() never blocks or takes a
+Python-level lock). A consumer thread re-chunks the audio into
+webrtcvad frames, runs the VAD and hands finished utterances to a
+callback as one contiguous int16 numpy buffer.
+"""
+import collections
+import queue
+import threading
+import time
+
+import numpy as np
+import webrtcvad
+
+from scrlk import trace
+
+try:
+    import sounddevice as sd
+except Exception:  # PortAudio missing etc.
+    sd = None
+
+VAD_SR = 16000          # webrtcvad: 8/16/32/48 kHz mono
+VAD_FRAME_MS = 20       # 10/20/30 ms
+VAD_AGGR = 2            # 0–3
+SILENCE_HANG_MS = 500   # trailing silence that ends an utterance
+UTTER_MAX_MS = 15000
+PREROLL_MS = 200
+BARGE_MS = 200          # confirmed speech needed to barge in while paused
+BARGE_RMS = 600         # ...and it must be this loud (int16 RMS), not our own echo
+
+
+class VadSegmenter:
+    """
+    on_utterance(pcm) is called from the consumer thread with an int16
+    numpy array for every finished utterance.
+
+    While `paused` is True (the app itself is talking) any utterance in
+    progress is dropped and nothing is emitted. Without `on_barge_in` the
+    audio is simply discarded. With it, the VAD keeps running: once
+    `barge_ms` of loud speech is confirmed, on_barge_in() is called (so
+    the app can stop playback), the segmenter unpauses and that speech
+    becomes the start of the next utterance.
+
+    With an `echo_canceller` the audio is echo-cancelled (on the consumer
+    thread) before the VAD sees it, also while paused.
+    """
+
+    def __init__(self, on_utterance, aggressiveness=VAD_AGGR, samplerate=VAD_SR,
+                 frame_ms=VAD_FRAME_MS, hang_ms=SILENCE_HANG_MS, max_ms=UTTER_MAX_MS,
+                 preroll_ms=PREROLL_MS, on_barge_in=None, barge_ms=BARGE_MS,
+                 barge_rms=BARGE_RMS, echo_canceller=None):
+        self.on_utterance = on_utterance
+        self.on_barge_in = on_barge_in
+        self.echo_canceller = echo_canceller
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.hang_frames = max(1, hang_ms // frame_ms)
+        self.max_frames = max(1, max_ms // frame_ms)
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.paused = False
+        self.barge_frames = max(1, barge_ms // frame_ms)
+        self.barge_rms = barge_rms
+
+        # stats
+        self.frames_in = 0          # frames pushed by the audio callback
+        self.frames_processed = 0   # frames run through the VAD
+        self.dropped = 0            # input overflows reported by PortAudio
+
+        self._q = queue.SimpleQueue()
+        self._preroll = collections.deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._frames = []
+        self._onset = None          # wall-clock time the current utterance started
+        self._silence = 0
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._barge = collections.deque(maxlen=self.barge_frames + self._preroll.maxlen)
+        self._barge_run = 0
+        self._running = False
+        self._thread = None
+        self._stream = None
+
+    # -------------------------
+    # lifecycle
+    # -------------------------
+    def start(self, device=None, open_stream=True, source=None):
+        """
+        Start the consumer thread and (optionally) the capture stream, or
+        take the audio from `source` (scrlk.audio_io) instead of a device.
+        """
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+        if source is not None:
+            self._stream = source
+            source.start(self.push)
+        elif open_stream:
+            if sd is None:
+                raise RuntimeError("sounddevice saknas")
+            self._stream = sd.InputStream(
+                samplerate=self.samplerate, channels=1, dtype="int16",
+                blocksize=self.frame_len, device=device, callback=self._callback,
+            )
+            self._stream.start()
+
+    def stop(self):
+        self._running = False
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._q.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def drain(self, timeout=None):
+        """Wait until everything pushed so far has been processed (benchmarks)."""
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    # -------------------------
+    # producer side (audio thread)
+    # -------------------------
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.dropped += 1
+        self.push(indata[:, 0].copy())
+
+    def push(self, block):
+        """Queue one block of int16 samples. Never blocks."""
+        self.frames_in += 1
+        self._q.put(block)
+
+    # -------------------------
+    # consumer side
+    # -------------------------
+    def _consume(self):
+        while self._running:
+            block = self._q.get()
+            if block is None:
+                break
+            if isinstance(block, threading.Event):
+                block.set()
+                continue
+            self._process_block(np.asarray(block, dtype=np.int16).reshape(-1))
+
+    def _process_block(self, block):
+        if self.echo_canceller is not None:
+            # keeps adapting while paused, so it is converged when we listen
+            block = self.echo_canceller.process(block)
+        if self.paused and self.on_barge_in is None:
+            self.frames_processed += 1
+            self.reset()
+            return
+        if len(self._carry):
+            block = np.concatenate((self._carry, block))
+        n = len(block) // self.frame_len * self.frame_len
+        for i in range(0, n, self.frame_len):
+            self._process_frame(block[i:i + self.frame_len])
+        self._carry = block[n:]
+        self.frames_processed += 1
+
+    def _process_frame(self, frame):
+        is_speech = self.vad.is_speech(frame.tobytes(), self.samplerate)
+        if self.paused:
+            self._watch_barge_in(frame, is_speech)
+            return
+        if self._barge:
+            self._barge.clear()
+            self._barge_run = 0
+        if not self._frames:
+            if is_speech:
+                self._frames.extend(self._preroll)
+                self._preroll.clear()
+                self._frames.append(frame)
+                self._silence = 0
+                self._onset = time.time()
+            else:
+                self._preroll.append(frame)
+            return
+
+        self._frames.append(frame)
+        self._silence = 0 if is_speech else self._silence + 1
+        if self._silence >= self.hang_frames or len(self._frames) >= self.max_frames:
+            pcm = np.concatenate(self._frames)
+            onset = self._onset
+            self.reset()
+            trace.begin(reuse_idle=True)
+            trace.mark(trace.SPEECH_START, onset)
+            trace.mark(trace.VAD_END)
+            if self.on_utterance:
+                self.on_utterance(pcm)
+
+    def _watch_barge_in(self, frame, is_speech):
+        # paused: the app is talking, only listen for the user talking over it
+        if self._frames:
+            self._frames = []
+            self._silence = 0
+        loud = is_speech and \
+            float(np.sqrt(np.mean(frame.astype(np.float32) ** 2))) >= self.barge_rms
+        self._barge.append(frame)
+        # a single quiet frame inside a word does not reset the run
+        self._barge_run = self._barge_run + 1 if loud else max(0, self._barge_run - 1)
+        if self._barge_run < self.barge_frames:
+            return
+        self.paused = False
+        self._frames = list(self._barge)
+        self._onset = time.time() - self.barge_frames * self.frame_len / self.samplerate
+        self._silence = 0
+        self._barge.clear()
+        self._barge_run = 0
+        self._preroll.clear()
+        if self.on_barge_in:
+            self.on_barge_in()
+
+    @property
+    def in_utterance(self):
+        return bool(self._frames)
+
+    def reset(self):
+        """Forget any utterance in progress."""
+        self._frames = []
+        self._silence = 0
+        self._preroll.clear()
+        self._barge.clear()
+        self._barge_run = 0
+        self._carry = np.zeros(0, dtype=np.int16)
+
+
+def record_utterance(timeout=5.0, hang_ms=SILENCE_HANG_MS, max_ms=UTTER_MAX_MS, device=None,
+                     aggressiveness=VAD_AGGR, samplerate=VAD_SR, source=None):
+    """
+    Push-to-talk: open the mic and return the first utterance (int16) as
+    soon as `hang_ms` of trailing silence is seen, or None if nobody
+    started talking within `timeout` seconds.
+    """
+    utterances = queue.SimpleQueue()
+    seg = VadSegmenter(utterances.put, aggressiveness=aggressiveness, samplerate=samplerate,
+                       hang_ms=hang_ms, max_ms=max_ms)
+    trace.begin()
+    trace.mark(trace.MIC_OPEN)
+    seg.start(device=device, source=source)
+    try:
+        try:
+            return utterances.get(timeout=timeout)
+        except queue.Empty:
+            if not seg.in_utterance:
+                return None
+        # started talking just before the timeout: let the utterance finish
+        try:
+            return utterances.get(timeout=(max_ms + hang_ms) / 1000.0)
+        except queue.Empty:
+            return None
+    finally:
+        seg.stop()
@@ -0,0 +1,190 @@
+"""
+Minimal WebSocket (RFC 6455) on asyncio streams, standard library only.
+
+Enough for the persona server and its terminals: one message at a time,
+text and binary, fragmented messages reassembled, ping answered, close
+handshake. No extensions (no permessage-deflate: the payload is PCM).
+
+    server:  ws, path = await accept(reader, writer)
+    client:  ws = await connect("ws://host:8770/session")
+
+    await ws.send(b"...")  /  await ws.send("text")
+    kind, data = await ws.recv()    # kind TEXT or BINARY, (CLOSE, b"") at the end
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from urllib.parse import urlsplit
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE = 1 << 20        # bytes; a terminal sends 20-100 ms of PCM per message
+
+CONT, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class WebSocketError(Exception):
+    pass
+
+
+def _accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+
+async def _read_head(reader):
+    """Request/status line and headers (lower-case names)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+class WebSocket:
+    def __init__(self, reader, writer, client=False):
+        self.reader = reader
+        self.writer = writer
+        self.client = client         # clients mask what they send
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    # -------------------------
+    # frames
+    # -------------------------
+    async def _send_frame(self, opcode, data):
+        n = len(data)
+        if n < 126:
+            head = struct.pack("!BB", 0x80 | opcode, n | (0x80 if self.client else 0))
+        elif n < 1 << 16:
+            head = struct.pack("!BBH", 0x80 | opcode, 126 | (0x80 if self.client else 0), n)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127 | (0x80 if self.client else 0), n)
+        if self.client:
+            mask = os.urandom(4)
+            data = _mask(data, mask)
+            head += mask
+        async with self._send_lock:
+            self.writer.write(head + data)
+            await self.writer.drain()
+
+    async def _recv_frame(self):
+        b0, b1 = await self.reader.readexactly(2)
+        fin, opcode, masked, n = b0 & 0x80, b0 & 0x0F, b1 & 0x80, b1 & 0x7F
+        if n == 126:
+            n, = struct.unpack("!H", await self.reader.readexactly(2))
+        elif n == 127:
+            n, = struct.unpack("!Q", await self.reader.readexactly(8))
+        if n > MAX_MESSAGE:
+            raise WebSocketError(f"frame of {n} bytes")
+        mask = await self.reader.readexactly(4) if masked else None
+        data = await self.reader.readexactly(n)
+        return bool(fin), opcode, _mask(data, mask) if mask else data
+
+    # -------------------------
+    # messages
+    # -------------------------
+    async def send(self, message):
+        if self.closed:
+            raise WebSocketError("closed")
+        if isinstance(message, str):
+            await self._send_frame(TEXT, message.encode("utf-8"))
+        else:
+            await self._send_frame(BINARY, bytes(message))
+
+    async def recv(self):
+        """(TEXT, str) or (BINARY, bytes); (CLOSE, b"") once the peer is gone."""
+        kind, parts = None, []
+        while True:
+            try:
+                fin, opcode, data = await self._recv_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return CLOSE, b""
+            if opcode == PING:
+                await self._send_frame(PONG, data)
+                continue
+            if opcode == PONG:
+                continue
+            if opcode == CLOSE:
+                if not self.closed:
+                    self.closed = True
+                    try:
+                        await self._send_frame(CLOSE, data[:2])
+                    except ConnectionError:
+                        pass
+                return CLOSE, b""
+            if opcode != CONT:
+                kind, parts = opcode, []
+            parts.append(data)
+            if sum(map(len, parts)) > MAX_MESSAGE:
+                raise WebSocketError("message too large")
+            if fin:
+                data = b"".join(parts)
+                return (TEXT, data.decode("utf-8")) if kind == TEXT else (BINARY, data)
+
+    async def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            try:
+                await self._send_frame(CLOSE, struct.pack("!H", code))
+            except ConnectionError:
+                pass
+        self.writer.close()
+
+
+def _mask(data, mask):
+    if not data:
+        return data
+    n = len(data)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(key, "little")).to_bytes(n, "little")
+
+
+# -------------------------
+# handshakes
+# -------------------------
+async def reject(writer, status="400 Bad Request", reason=""):
+    body = reason.encode("utf-8")
+    writer.write(f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    writer.close()
+
+
+async def accept(reader, writer):
+    """Server side of the opening handshake. Returns (WebSocket, request path)."""
+    request, headers = await _read_head(reader)
+    parts = request.split()
+    key = headers.get("sec-websocket-key")
+    if len(parts) < 2 or parts[0] != "GET" or not key or \
+            "websocket" not in headers.get("upgrade", "").lower():
+        await reject(writer, reason="expected a WebSocket upgrade")
+        raise WebSocketError(f"not a WebSocket request: {request!r}")
+    writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                  "Connection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n").encode())
+    await writer.drain()
+    return WebSocket(reader, writer), parts[1]
+
+
+async def connect(url):
+    """Client side: connect("ws://host:port/path")."""
+    u = urlsplit(url)
+    if u.scheme != "ws":
+        raise WebSocketError(f"only ws:// is supported, not {u.scheme}://")
+    reader, writer = await asyncio.open_connection(u.hostname, u.port or 80)
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    await writer.drain()
+    status, headers = await _read_head(reader)
+    if status.split()[1:2] != ["101"] or headers.get("sec-websocket-accept") != _accept_key(key):
+        writer.close()
+        raise WebSocketError(f"handshake refused: {status}")
+    return WebSocket(reader, writer, client=True)